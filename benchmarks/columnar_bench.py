@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""逐行映射与按列批量映射的基准测试 (需要 pandas)。
+
+对不同行数的合成数据 (夹杂全角字符、多余空白、零宽字符和无法解析的日期) 比较:
+
+* 逐行: DocConverter._process_row，与转换时的逐行处理相同 (含日志调用，日志级别设为 ERROR);
+* 按列: columnar.map_rows。
+
+每个规模都先检查两种方式的输出完全相同，然后报告各自的耗时、加速比以及按列处理开始更快的行数
+(用于确定 columnar.COLUMNAR_MIN_ROWS)。逐行处理使用的标准化和日期解析缓存在每次计时前清空，
+两种方式都从冷缓存开始。
+
+用法:
+    python -m benchmarks.columnar_bench
+    python -m benchmarks.columnar_bench --rows 100 1000 10000 300000 --repeat 5
+"""
+
+import argparse
+import logging
+import time
+
+from benchmarks.normalize_bench import build_rows
+from src import columnar, utils
+from src.converter import DocConverter
+
+DEFAULT_ROWS = [100, 300, 1000, 2000, 3000, 10000, 30000, 100000, 300000]
+
+
+def _clear_caches():
+    utils.normalize_cell_cached.cache_clear()
+    utils.parse_date.cache_clear()
+
+
+def _copy(rows):
+    # _process_row 会就地补空，每次计时使用新的行列表
+    return [list(row) for row in rows]
+
+
+def run_scalar(converter, rows):
+    return [converter._process_row(row, 0, i + 2) for i, row in enumerate(rows)]
+
+
+def run_columnar(rows):
+    return columnar.map_rows(rows)[0]
+
+
+def _best(func, rows, repeat):
+    best = None
+    for _ in range(repeat):
+        data = _copy(rows)
+        _clear_caches()
+        start = time.perf_counter()
+        func(data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="逐行 / 按列映射基准测试")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--repeat", type=int, default=3, help="每个规模取最快的一次")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if not columnar.available():
+        parser.error("columnar mapping needs pandas (pip install pandas)")
+
+    logger = logging.getLogger("docConverter.columnar_bench")
+    logger.setLevel(logging.ERROR)  # 保留日志调用的开销，不输出警告
+    converter = DocConverter("bench.docx", None, logger=logger)
+    converter.logger = logger
+
+    print(f"{'rows':>8} {'row-wise':>10} {'columnar':>10} {'speedup':>8}")
+    crossover = None
+    for count in sorted(args.rows):
+        rows = build_rows(count * 8, seed=args.seed)
+        _clear_caches()
+        if run_scalar(converter, _copy(rows)) != run_columnar(_copy(rows)):
+            raise SystemExit(f"outputs differ at {count} rows")
+        scalar = _best(lambda data: run_scalar(converter, data), rows, args.repeat)
+        batched = _best(run_columnar, rows, args.repeat)
+        print(
+            f"{len(rows):>8} {scalar * 1000:>8.1f}ms {batched * 1000:>8.1f}ms "
+            f"{scalar / batched:>7.2f}x"
+        )
+        if batched < scalar:
+            crossover = crossover or len(rows)
+        else:
+            crossover = None  # 只记录此后一直更快的起点
+    if crossover is None:
+        print("columnar mapping was not faster at any measured size")
+    else:
+        print(
+            f"columnar mapping is faster from {crossover} rows "
+            f"(COLUMNAR_MIN_ROWS = {columnar.COLUMNAR_MIN_ROWS})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""单元格文本标准化的基准测试。
+
+在一百万个合成单元格上比较:
+  * strip:        原来的做法，只对每个单元格调用 .strip() (不做任何标准化)
+  * regex header: 原来的 normalize_header (五次 str.replace + re.sub)
+  * normalize:    utils.normalize_cell (NFKC + translate)，不使用缓存
+  * cached:       与 _process_row 相同的组合: 重复度高的列使用 normalize_cell_cached
+
+用法 (在项目根目录):
+    python -m benchmarks.normalize_bench --cells 1000000
+"""
+
+import argparse
+import random
+import re
+import time
+
+from benchmarks.docgen import synthetic_rows
+from src import utils
+
+_FULLWIDTH_DIGITS = str.maketrans("0123456789.", "０１２３４５６７８９．")
+
+
+def _legacy_normalize_header(text):
+    text = str(text).strip()
+    text = (
+        text.replace("（", "(")
+        .replace("）", ")")
+        .replace("：", ":")
+        .replace("，", ",")
+        .replace("。", ".")
+    )
+    return re.sub(r"\s+", "", text)
+
+
+def _messy(value, rng):
+    """模拟真实数据: 全角数字、NBSP、全角空格、零宽字符、首尾空白。"""
+    roll = rng.random()
+    if roll < 0.05:
+        return value.translate(_FULLWIDTH_DIGITS)
+    if roll < 0.08 and len(value) > 1:
+        return value[0] + " " + value[1:]
+    if roll < 0.10:
+        return "　" + value
+    if roll < 0.11:
+        return value + "​"
+    if roll < 0.20:
+        return f" {value} "
+    return value
+
+
+def build_rows(cells, seed=0):
+    """返回合成数据行 (每行 8 个单元格)，单元格总数约为 cells。"""
+    rng = random.Random(seed)
+    return [
+        [_messy(value, rng) for value in row]
+        for row in synthetic_rows(max(cells // 8, 1), seed=seed)
+    ]
+
+
+def _time(label, func, rows):
+    cells = len(rows) * 8
+    start = time.perf_counter()
+    func(rows)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<14} {elapsed:8.3f}s  {cells / elapsed / 1e6:6.2f} M cells/sec")
+    return elapsed
+
+
+def run_strip(rows):
+    for row in rows:
+        for text in row:
+            text.strip()
+
+
+def run_legacy_header(rows):
+    for row in rows:
+        for text in row:
+            _legacy_normalize_header(text)
+
+
+def run_normalize(rows):
+    norm = utils.normalize_cell
+    for row in rows:
+        for text in row:
+            norm(text)
+
+
+def run_cached(rows):
+    # 与 _process_row 相同: 名称和备注不缓存，其余列使用缓存 (序号列也计入，保证单元格数一致)
+    norm = utils.normalize_cell
+    cached = utils.normalize_cell_cached
+    for row in rows:
+        norm(row[0])
+        norm(row[1])
+        cached(row[2])
+        cached(row[3])
+        cached(row[4])
+        cached(row[5])
+        cached(row[6])
+        norm(row[7])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="单元格文本标准化基准测试")
+    parser.add_argument("--cells", type=int, default=1_000_000, help="单元格数量")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rows = build_rows(args.cells, seed=args.seed)
+    print(f"cells: {len(rows) * 8} ({len(rows)} rows)")
+    _time("strip", run_strip, rows)
+    _time("regex header", run_legacy_header, rows)
+    _time("normalize", run_normalize, rows)
+    utils.normalize_cell_cached.cache_clear()
+    _time("cached", run_cached, rows)
+    info = utils.normalize_cell_cached.cache_info()
+    print(
+        f"cache: hits {info.hits}, misses {info.misses}, "
+        f"hit rate {info.hits / max(info.hits + info.misses, 1):.1%}"
+    )
+
+
+if __name__ == "__main__":
+    main()
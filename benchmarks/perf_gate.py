@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""性能回归门禁: 与提交到仓库中的基线 (benchmarks/perf_baseline.json) 比较。
+
+转换固定规模的合成文档 (默认 1k / 10k / 100k 行)，分别写入新文件 (fresh) 和
+已有 10 万行数据的大文件 (append)，测量:
+  * wall time (秒，越小越好)
+  * rows/sec (越大越好)
+  * peak RSS (MiB，越小越好)
+
+每个用例在独立的子进程中运行 (spawn)，峰值内存互不影响。任何指标超出基线容差时
+打印差异表并以退出码 1 结束，可直接接入 CI。只依赖标准库和项目本身，离线可用 (Linux)。
+
+用法 (在项目根目录):
+    python -m benchmarks.perf_gate                     # 与基线比较
+    python -m benchmarks.perf_gate --cases fresh-1k append-1k
+    python -m benchmarks.perf_gate --update-baseline   # 在参考机器上重新生成基线
+
+tests/test_perf_gate.py 把每个用例包装为 pytest 用例 (需要 --perf-gate，慢用例还需要 --run-slow)。
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+from openpyxl import Workbook
+
+from benchmarks.docgen import write_docx, synthetic_rows
+from src.converter import EXPECTED_EXCEL_HEADERS, DocConverter
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "perf_baseline.json")
+APPEND_BASE_ROWS = 100_000  # append 用例中目标文件已有的数据行数
+TABLES = 4  # 合成文档中的表格数
+DEFAULT_TOLERANCE = {
+    "wall_time": 0.5,  # 允许慢 50%
+    "rows_per_sec": 0.33,  # 允许吞吐量下降 33%
+    "peak_rss_mib": 0.25,  # 允许峰值内存增加 25%
+}
+# 指标名 -> 是否越大越好
+METRICS = {"wall_time": False, "rows_per_sec": True, "peak_rss_mib": False}
+
+CASES = {
+    f"{target}-{label}": {"rows": rows, "target": target}
+    for target in ("fresh", "append")
+    for label, rows in (("1k", 1_000), ("10k", 10_000), ("100k", 100_000))
+}
+
+
+def _quiet_logger():
+    logger = logging.getLogger("docConverterApp.perf_gate")
+    if not logger.handlers:
+        logger.addHandler(logging.NullHandler())
+        logger.propagate = False
+    return logger
+
+
+def _run_case(word_path, excel_path, conn):
+    """子进程入口: 执行一次转换，通过 Pipe 返回测量结果。"""
+    start = time.perf_counter()
+    result = DocConverter(word_path, excel_path, logger=_quiet_logger()).convert()
+    elapsed = time.perf_counter() - start
+    # Linux 上 ru_maxrss 的单位是 KiB
+    peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    conn.send(
+        {
+            "status": result["status"],
+            "rows": result["success"],
+            "wall_time": elapsed,
+            "peak_rss_mib": peak_kib / 1024,
+        }
+    )
+    conn.close()
+
+
+def _measure(word_path, excel_path):
+    ctx = multiprocessing.get_context("spawn")
+    parent, child = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_run_case, args=(word_path, excel_path, child))
+    process.start()
+    child.close()
+    measurement = parent.recv()
+    process.join()
+    if measurement["status"] != "success":
+        raise RuntimeError(f"conversion failed: {measurement}")
+    measurement["rows_per_sec"] = measurement["rows"] / measurement["wall_time"]
+    return measurement
+
+
+def _write_append_base(path, rows):
+    """生成已有 rows 行数据的目标 Excel (表头与转换器一致)。"""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(EXPECTED_EXCEL_HEADERS)
+    for row in synthetic_rows(rows, seed=1, bad_date_every=0):
+        if not any(row):
+            continue
+        sheet.append(
+            ["", row[1], "", row[2], row[3], row[4], "", row[5], row[6], row[7]]
+            + [""] * 4
+        )
+    workbook.save(path)
+
+
+def run_cases(names, workdir, repeat):
+    """执行用例，返回 {用例名: 指标}。重复多次时取各指标的最好值。"""
+    append_base = None
+    results = {}
+    for name in names:
+        case = CASES[name]
+        word_path = os.path.join(workdir, f"{case['rows']}.docx")
+        if not os.path.exists(word_path):
+            write_docx(word_path, case["rows"], tables=TABLES)
+        if case["target"] == "append" and append_base is None:
+            append_base = os.path.join(workdir, "append_base.xlsx")
+            # 同一工作目录中已生成过时直接使用 (pytest 逐个用例调用 run_cases)
+            if not os.path.exists(append_base):
+                print(
+                    f"preparing append target with {APPEND_BASE_ROWS} rows...",
+                    flush=True,
+                )
+                _write_append_base(append_base, APPEND_BASE_ROWS)
+
+        runs = []
+        for _ in range(repeat):
+            excel_path = os.path.join(workdir, f"{name}.xlsx")
+            if os.path.exists(excel_path):
+                os.remove(excel_path)
+            if case["target"] == "append":
+                shutil.copyfile(append_base, excel_path)
+            runs.append(_measure(word_path, excel_path))
+        results[name] = {
+            "rows": runs[0]["rows"],
+            "wall_time": round(min(r["wall_time"] for r in runs), 3),
+            "rows_per_sec": round(max(r["rows_per_sec"] for r in runs), 1),
+            "peak_rss_mib": round(min(r["peak_rss_mib"] for r in runs), 1),
+        }
+        m = results[name]
+        print(
+            f"{name:<12} {m['rows']:>7} rows  {m['wall_time']:8.2f}s  "
+            f"{m['rows_per_sec']:9.1f} rows/s  {m['peak_rss_mib']:7.1f} MiB",
+            flush=True,
+        )
+    return results
+
+
+def _limit(baseline_value, tolerance, higher_is_better):
+    if higher_is_better:
+        return baseline_value * (1 - tolerance)
+    return baseline_value * (1 + tolerance)
+
+
+def compare(baseline, results):
+    """与基线比较，返回 (差异表行列表, 是否有回归)。"""
+    tolerance = {**DEFAULT_TOLERANCE, **baseline.get("tolerance", {})}
+    lines = [
+        f"{'case':<12} {'metric':<13} {'baseline':>10} {'current':>10} {'change':>8} {'limit':>10}  status"
+    ]
+    regressed = False
+    for name, current in results.items():
+        expected = baseline.get("cases", {}).get(name)
+        if expected is None:
+            lines.append(f"{name:<12} (no baseline, skipped)")
+            continue
+        for metric, higher_is_better in METRICS.items():
+            base_value = expected[metric]
+            value = current[metric]
+            limit = _limit(base_value, tolerance[metric], higher_is_better)
+            failed = value < limit if higher_is_better else value > limit
+            regressed = regressed or failed
+            change = (value - base_value) / base_value if base_value else 0.0
+            lines.append(
+                f"{name:<12} {metric:<13} {base_value:>10.2f} {value:>10.2f} {change:>+8.1%} {limit:>10.2f}  "
+                + ("REGRESSION" if failed else "ok")
+            )
+    return lines, regressed
+
+
+def _machine():
+    return {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="docConverter 性能回归门禁")
+    parser.add_argument(
+        "--cases",
+        nargs="+",
+        choices=sorted(CASES),
+        default=list(CASES),
+        help="要运行的用例 (默认全部)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="每个用例重复次数 (取最好值以减少噪声)"
+    )
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="基线 JSON 路径")
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="用本次结果覆盖基线中的对应用例，而不是比较",
+    )
+    parser.add_argument("--workdir", help="保留生成的文档和输出文件的目录")
+    args = parser.parse_args(argv)
+
+    try:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        baseline = {"tolerance": DEFAULT_TOLERANCE, "cases": {}}
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="docconverter_perf_")
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        results = run_cases(args.cases, workdir, args.repeat)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.update_baseline:
+        baseline.setdefault("cases", {}).update(results)
+        baseline["machine"] = _machine()
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"baseline updated: {args.baseline}")
+        return 0
+
+    if baseline.get("machine") and baseline["machine"] != _machine():
+        print(
+            f"note: baseline was recorded on {baseline['machine']}, "
+            f"this machine is {_machine()}; absolute numbers may not be comparable."
+        )
+    lines, regressed = compare(baseline, results)
+    print("\n".join(lines))
+    if regressed:
+        print("performance regression detected")
+        return 1
+    print("no performance regression")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""对本地转换服务 (src/service.py) 进行压测，输出吞吐量 (jobs/sec) 和延迟分位数。
+
+用法 (在项目根目录):
+    python -m src.service --port 8765 --workers 4 &
+    python -m benchmarks.service_load --port 8765 --jobs 50 --concurrency 8 --rows 2000
+
+--docx 可以指定一个真实文档；否则使用 benchmarks.docgen 生成的合成文档。
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from benchmarks.docgen import build_docx
+
+
+async def _request(args, method, path, body=b""):
+    if args.unix:
+        reader, writer = await asyncio.open_unix_connection(args.unix)
+    else:
+        reader, writer = await asyncio.open_connection(args.host, args.port)
+    head = (
+        f"{method} {path} HTTP/1.1\r\n"
+        f"Host: {args.host}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: close\r\n\r\n"
+    )
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    return status, payload
+
+
+def _dechunk(payload):
+    """解析 chunked 编码的响应体。"""
+    out = bytearray()
+    while payload:
+        size_line, _, payload = payload.partition(b"\r\n")
+        size = int(size_line, 16)
+        if size == 0:
+            break
+        out += payload[:size]
+        payload = payload[size + 2 :]
+    return bytes(out)
+
+
+async def _one_job(args, docx_bytes):
+    """提交一个任务，订阅事件流直到结束，再下载输出文件。返回 (状态, 延迟秒数)。"""
+    start = time.perf_counter()
+    status, payload = await _request(args, "POST", f"/jobs?{args.query}", docx_bytes)
+    if status != 202:
+        return f"http_{status}", time.perf_counter() - start
+    job_id = json.loads(payload)["job_id"]
+
+    _, events = await _request(args, "GET", f"/jobs/{job_id}/events")
+    final = json.loads(_dechunk(events).splitlines()[-1])
+    job_status = final.get("status", "unknown")
+    if job_status == "succeeded":
+        status, _ = await _request(args, "GET", f"/jobs/{job_id}/output")
+        if status != 200:
+            job_status = f"output_http_{status}"
+    await _request(args, "DELETE", f"/jobs/{job_id}")
+    return job_status, time.perf_counter() - start
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return float("nan")
+    k = (len(sorted_values) - 1) * pct / 100
+    lower = int(k)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (
+        k - lower
+    )
+
+
+async def run(args):
+    if args.docx:
+        with open(args.docx, "rb") as f:
+            docx_bytes = f.read()
+    else:
+        docx_bytes = build_docx(args.rows, tables=args.tables)
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    results = []
+
+    async def worker():
+        async with semaphore:
+            results.append(await _one_job(args, docx_bytes))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.jobs)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for status, latency in results if status == "succeeded")
+    statuses = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+
+    print(
+        f"document: {len(docx_bytes)} bytes, jobs: {args.jobs}, concurrency: {args.concurrency}"
+    )
+    print(f"statuses: {statuses}")
+    print(
+        f"wall time: {elapsed:.2f}s, throughput: {len(latencies) / elapsed:.2f} jobs/sec"
+    )
+    if latencies:
+        print(
+            "latency (s): "
+            f"min {latencies[0]:.3f}, mean {statistics.mean(latencies):.3f}, "
+            f"p50 {_percentile(latencies, 50):.3f}, p90 {_percentile(latencies, 90):.3f}, "
+            f"p99 {_percentile(latencies, 99):.3f}, max {latencies[-1]:.3f}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="docConverter 转换服务压测")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="服务的 Unix socket 路径")
+    parser.add_argument("--jobs", type=int, default=20, help="提交的任务总数")
+    parser.add_argument("--concurrency", type=int, default=4, help="同时在途的客户端数")
+    parser.add_argument("--rows", type=int, default=1000, help="合成文档的数据行数")
+    parser.add_argument("--tables", type=int, default=1, help="合成文档的表格数")
+    parser.add_argument("--docx", help="使用指定的 .docx 文件代替合成文档")
+    parser.add_argument("--query", default="", help="附加到 POST /jobs 的查询参数")
+    asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""合并同一进程内对同一个 Excel 目标的并发写入。
+
+追加写入的开销主要是加载和保存整个工作簿，与追加的行数关系不大。多个任务同时写同一目标时，
+第一个到达的任务成为 "leader": 获得跨进程文件锁 (filelock) 后，一次性取走此时所有等待中的
+写入请求，用一次 load/append/save 全部写入，再通知各任务结果。写入期间新到达的请求会在下一轮
+由其中一个等待者接任 leader 继续合并。这样 N 个并发任务只需要一次 (或少数几次) 工作簿重写。
+
+leader 用自己的写入设置 (分片等) 写入整批，因此只合并写入设置 (options) 相同的请求；
+设置不同的请求各自排队，由文件锁串行。
+
+跨进程的写入者之间只通过文件锁串行，不做合并。
+"""
+
+import os
+import threading
+
+
+def _target_key(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+class _Request:
+    def __init__(self, rows, writer, lock_factory):
+        self.rows = rows
+        self.writer = writer
+        self.lock_factory = lock_factory
+        self.done = threading.Event()
+        self.promoted = False  # 被指定为下一轮的 leader
+        self.shards = None
+        self.error = None
+        self.batch_size = 0
+
+
+class AppendCoalescer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}  # (目标键, 写入设置) -> 等待写入的请求列表
+        self._leaders = set()  # 当前有 leader 在写的 (目标键, 写入设置)
+
+    def write(self, target_path, rows, writer, lock_factory, options=None):
+        """提交一批行并等待写入完成。
+
+        :param target_path: 目标 Excel 路径。
+        :param rows: 本任务要写入的数据 (原样传给 writer，例如行列表)。
+        :param writer: writer(batches) -> shards，在持有文件锁时把多个任务的数据依次写入并保存；
+                       本任务成为 leader 时使用。
+        :param lock_factory: 返回文件锁上下文管理器的函数。
+        :param options: 影响写入结果的设置 (可哈希)，只与设置相同的请求合并。
+        :return: (shards, batch_size)，batch_size 为与本任务合并写入的任务数 (含本任务)。
+        :raises: 合并写入失败时的异常 (同一批的所有任务都会收到)。
+        """
+        key = (_target_key(target_path), options)
+        request = _Request(rows, writer, lock_factory)
+        with self._lock:
+            self._pending.setdefault(key, []).append(request)
+            lead = key not in self._leaders
+            if lead:
+                self._leaders.add(key)
+
+        if lead:
+            self._lead(key, request)
+        else:
+            request.done.wait()
+            if request.promoted:
+                # 上一轮 leader 写完后指定本任务接任，请求仍在等待列表中
+                self._lead(key, request)
+        if request.error is not None:
+            raise request.error
+        return request.shards, request.batch_size
+
+    def _lead(self, key, request):
+        """持有文件锁，写入当前所有等待中的请求；之后把 leader 交给下一个等待者。"""
+        batch = None
+        try:
+            with request.lock_factory():
+                with self._lock:
+                    batch = self._pending.pop(key, [])
+                shards = request.writer([r.rows for r in batch])
+            error = None
+        except Exception as e:
+            shards, error = None, e
+            if batch is None:
+                # 取走请求之前就失败 (如等待文件锁超时)：本轮只有 leader 自己失败
+                with self._lock:
+                    batch = self._take_one(key, request)
+
+        for r in batch:
+            r.shards, r.error, r.batch_size = shards, error, len(batch)
+            r.done.set()
+
+        with self._lock:
+            waiting = self._pending.get(key)
+            if waiting:
+                successor = waiting[0]
+                successor.promoted = True
+                successor.done.set()
+            else:
+                self._pending.pop(key, None)
+                self._leaders.discard(key)
+
+    def _take_one(self, key, request):
+        waiting = self._pending.get(key, [])
+        if request in waiting:
+            waiting.remove(request)
+        return [request]
+
+
+# 进程内共享的实例
+default_coalescer = AppendCoalescer()
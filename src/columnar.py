@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""按列批量映射数据行 (可选，需要 pandas)。
+
+逐行处理 (DocConverter._process_row) 对每一行做 Python 级的索引、标准化、日期解析和列表构建。
+行数很多时改为按列处理: 把一个表格的数据行转置为列，取值重复的列先去重 (pandas.factorize)，只对不同的
+取值做标准化 (NFKC、统一空白、去首尾空白)，交接日期用 pandas.to_datetime 按 utils.DATE_FORMATS
+的顺序逐个格式批量解析，最后按列组装 14 列的 Excel 行。
+
+结果与逐行处理完全相同: 标准化使用同一个函数；to_datetime 无法解析的日期文本 (例如非 ASCII 数字)
+再交给 utils.parse_date 确认，日期格式化也使用与逐行处理相同的 strftime。
+行数较少时批量处理的固定开销 (构建 Series、逐个格式调用 to_datetime) 大于节省的时间，
+见 COLUMNAR_MIN_ROWS 和 benchmarks/columnar_bench.py。
+"""
+
+from datetime import MINYEAR
+from itertools import repeat
+from operator import itemgetter
+
+from . import utils
+
+# 一个表格待处理的行数达到该值时才按列处理 (低于该值时逐行处理更快，见 columnar_bench)
+COLUMNAR_MIN_ROWS = 1000
+WORD_COLUMNS = 8
+
+# pandas 是可选依赖，第一次按列处理时才导入 (导入约需 0.3 秒，逐行处理的转换不必承担)
+np = pd = None
+
+
+def available():
+    """是否可以按列处理 (已安装 pandas)。"""
+    global np, pd
+    if pd is None:
+        try:
+            import numpy
+            import pandas
+        except ImportError:
+            return False
+        np, pd = numpy, pandas
+    return True
+
+
+def _normalize_column(column):
+    """返回 (标准化后的列 (object 数组), 去重后的标准化取值, 每行对应的取值下标)。
+
+    只对不同的取值调用 utils.normalize_cell (与逐行处理使用同一函数)，再按下标展开。
+    """
+    codes, uniques = pd.factorize(np.asarray(column, dtype=object))
+    normalized = np.asarray(list(map(utils.normalize_cell, uniques)), dtype=object)
+    return normalized[codes], normalized, codes
+
+
+def _format_dates(texts):
+    """把日期文本 (已标准化) 格式化为 "YYYY-MM-DD"，无法解析或为空的为 ""。"""
+    series = pd.Series(texts, dtype=object)
+    formatted = np.full(len(series), "", dtype=object)
+    pending = (series != "").to_numpy(copy=True)
+    for fmt in utils.DATE_FORMATS:
+        # 与 parse_date 相同: 按顺序尝试，不含该格式分隔符的文本跳过
+        candidates = pending & series.str.contains(fmt[2], regex=False).to_numpy()
+        if not candidates.any():
+            continue
+        parsed = pd.to_datetime(series[candidates], format=fmt, errors="coerce")
+        # pandas 接受 strptime 不接受的 0000 年
+        ok = (parsed.notna() & (parsed.dt.year >= MINYEAR)).to_numpy()
+        if not ok.any():
+            continue
+        positions = np.flatnonzero(candidates)[ok]
+        formatted[positions] = [
+            value.strftime("%Y-%m-%d") for value in parsed[ok].dt.to_pydatetime()
+        ]
+        pending[positions] = False
+    # to_datetime 只覆盖 strptime 能接受的文本的一个子集 (时间范围、非 ASCII 数字等)，
+    # 剩下的文本由逐行处理使用的 parse_date 确认
+    for position in np.flatnonzero(pending):
+        date = utils.parse_date(series.iat[position])
+        if date:
+            formatted[position] = date.strftime("%Y-%m-%d")
+    return formatted
+
+
+def map_rows(raw_rows):
+    """把 Word 数据行按列映射为 Excel 行，结果与逐行调用 _process_row 相同。
+
+    :param raw_rows: 数据行列表，每行至少 WORD_COLUMNS 个单元格 (多出的单元格忽略)。
+    :return: (excel_rows, bad_dates)。bad_dates 为 {行位置: 标准化后的日期文本}，
+             包含交接日期为空或无法解析的行。
+    :raises RuntimeError: 没有安装 pandas。
+    """
+    if not available():
+        raise RuntimeError("columnar row mapping needs pandas")
+    if not raw_rows:
+        return [], {}
+    columns = [list(map(itemgetter(i), raw_rows)) for i in range(WORD_COLUMNS)]
+    # 资料名称几乎各不相同，去重没有收益，直接逐个标准化
+    name = list(map(utils.normalize_cell, columns[1]))
+    source = _normalize_column(columns[2])[0].tolist()
+    submitter = _normalize_column(columns[3])[0].tolist()
+    receiver = _normalize_column(columns[4])[0].tolist()
+    _, date_values, date_codes = _normalize_column(columns[5])
+    location = _normalize_column(columns[6])[0].tolist()
+    remarks = _normalize_column(columns[7])[0].tolist()
+
+    # 日期只解析不同的取值，再按下标展开到各行
+    formatted = _format_dates(date_values)
+    date = formatted[date_codes].tolist()
+    unparsed = np.fromiter((value == "" for value in formatted), dtype=bool)
+    bad_dates = {
+        int(position): date_values[date_codes[position]]
+        for position in np.flatnonzero(unparsed[date_codes])
+    }
+
+    blank = repeat("")
+    # 14 列 EXPECTED_EXCEL_HEADERS 顺序，与 _process_row 相同
+    excel_rows = list(
+        map(
+            list,
+            zip(
+                blank,  # 0: 文档 ID
+                name,  # 1: 文档名称
+                blank,  # 2: 文档类型
+                source,  # 3: 来源部门
+                submitter,  # 4: 提交人
+                receiver,  # 5: 接收人
+                blank,  # 6: 签收(章)人
+                date,  # 7: 交接日期
+                location,  # 8: 保管位置
+                remarks,  # 9: 备注
+                blank,  # 10: 创建人
+                blank,  # 11: 创建时间
+                blank,  # 12: 最后修改人
+                blank,  # 13: 最后修改时间
+            ),
+        )
+    )
+    return excel_rows, bad_dates
@@ -1,13 +1,31 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 import logging
+import io
 import os
+import queue
+import tempfile
+import threading
 import docx
 import zipfile  # Potentially needed by openpyxl for error handling
-from openpyxl import Workbook, load_workbook
+from openpyxl import load_workbook
 from openpyxl.utils.exceptions import InvalidFileException
 from . import utils  # 使用相对导入
 from . import logger_config  # 使用相对导入
+from . import columnar as columnar_mapping
+from . import docx_reader
+from . import delta as delta_manifest
+from . import docid
+from . import profiling
+from . import prefetch
+from . import rejects
+from . import filelock
+from .coalesce import default_coalescer
+from .sink import ExcelSink, check_shard_limit
+
+# 输出到流/内存且没有注入 logger 时使用本模块的 logger；由应用决定是否输出，
+# 没有配置日志时不经 logging.lastResort 打印到 stderr
+logging.getLogger(__name__).addHandler(logging.NullHandler())
 
 # --- Constants ---
 # Word 表头（标准化后）
@@ -39,22 +57,163 @@ EXPECTED_EXCEL_HEADERS = [
     "最后修改时间",
 ]
 
+# _process_row 报告的问题代码
+ISSUE_SHORT_ROW = "short_row"  # 单元格少于预期，已补空
+ISSUE_LONG_ROW = "long_row"  # 单元格多于预期，已截断
+ISSUE_BAD_DATE = "bad_date"  # 交接日期无法解析，已置空
+ISSUE_MISSING_DATE = "missing_date"  # 交接日期为空
+ISSUE_PROCESS_ERROR = "process_error"  # 处理失败，未写入
+# 问题行报告和 GUI 中显示的说明
+ISSUE_DESCRIPTIONS = {
+    ISSUE_SHORT_ROW: "单元格少于表头 (已补空)",
+    ISSUE_LONG_ROW: "单元格多于表头 (已截断)",
+    ISSUE_BAD_DATE: "交接日期无法解析 (已置空)",
+    ISSUE_MISSING_DATE: "交接日期为空",
+    ISSUE_PROCESS_ERROR: "处理失败 (未写入)",
+}
+
+# 流水线模式: 每批传递的行数，以及队列中最多缓存的批数 (背压)
+PIPELINE_BATCH_ROWS = 500
+PIPELINE_QUEUE_SIZE = 8
+_PIPELINE_DONE = object()
+
+
+def _describe_target(target):
+    """返回用于日志和消息的源/目标描述 (路径，或内存对象的简短说明)。"""
+    if target is None:
+        return "<in-memory>"
+    if isinstance(target, (str, os.PathLike)):
+        return os.fspath(target)
+    if isinstance(target, io.BytesIO):
+        return f"<in-memory, {target.getbuffer().nbytes} bytes>"
+    return f"<stream {getattr(target, 'name', type(target).__name__)}>"
+
+
+class _IdSequences:
+    """一次写入中按格式懒创建的 docid.IdSequence，共享同一份 ID 记录 (marks)。"""
+
+    def __init__(self, excel_path, marks, logger):
+        self.excel_path = excel_path
+        self.marks = marks
+        self.logger = logger
+        self._sequences = {}
+
+    def get(self, id_pattern):
+        sequence = self._sequences.get(id_pattern)
+        if sequence is None:
+            sequence = docid.IdSequence(
+                self.excel_path, id_pattern, self.marks, self.logger
+            ).start()
+            self._sequences[id_pattern] = sequence
+        return sequence
+
 
 class DocConverter:
-    def __init__(self, word_path, excel_path):
+    def __init__(
+        self,
+        word_path,
+        excel_path,
+        shard_rows=None,
+        shard_bytes=None,
+        shard_by="sheet",
+        pipeline=False,
+        queue_size=PIPELINE_QUEUE_SIZE,
+        logger=None,
+        progress_callback=None,
+        job_id=None,
+        delta=False,
+        profile=None,
+        id_pattern=None,
+        prefetcher=None,
+        rejects_format="xlsx",
+        columnar=False,
+    ):
         """
         初始化转换器。
-        :param word_path: 源 Word 文档路径。
-        :param excel_path: 目标 Excel 文件路径。
+        :param word_path: 源 Word 文档路径，也可以是 bytes 或可读的二进制文件对象。
+        :param excel_path: 目标 Excel 文件路径，也可以是可写的二进制流；为 None 时在内存中生成，
+                           结果字典的 "excel_bytes" 中返回 xlsx 内容。
+        :param shard_rows: 每个分片 (工作表或文件) 的最大数据行数，None 表示仅受 Excel 行数上限约束。
+        :param shard_bytes: 每个输出文件的估算字节预算，超出后切换到新的编号文件 (name_part002.xlsx)。
+        :param shard_by: 达到行数上限时切换到新 "sheet" 还是新 "file"。
+        :param pipeline: 为 True 时读取与写入在两个线程中重叠进行。
+        :param queue_size: 流水线模式下队列最多缓存的批数。
+        :param logger: 外部注入的日志记录器；提供时不再创建日志文件。
+        :param progress_callback: 可选回调，以字典形式接收进度事件 (见 _report_progress)。
+        :param job_id: 任务 ID，用于区分同一进程中并发转换的日志，默认自动生成。
+        :param delta: 为 True 时进行增量转换: 根据 Excel 旁边的清单 (name_delta.json)
+                      跳过未变化的表格，只写入新增或修改的行。需要 Excel 文件路径。
+        :param profile: 是否对本次转换做性能分析 (见 profiling 模块)，结果文件写在日志旁边；
+                        None 时由环境变量 DOCCONVERTER_PROFILE 决定。
+        :param id_pattern: 自动填写 "文档 ID" 列的格式 (如 "DOC-{n:06d}"，见 docid 模块)，
+                           编号接在目标文件中同格式 ID 的最大编号之后；None 时该列留空。
+        :param prefetcher: 批量转换时共享的 prefetch.Prefetcher；源文档已在后台预读时直接使用。
+        :param rejects_format: 问题行报告的格式 ("xlsx" 或 "csv")，写在 Excel 旁边 (见 rejects 模块)；
+                               None 时不写报告 (结果中仍有按原因的计数)。
+        :param columnar: 为 True 时行数较多的表格按列批量映射 (见 columnar 模块，需要 pandas；
+                         没有安装 pandas 时记录警告并逐行处理)。结果与逐行处理相同。
         """
+        if shard_by not in ("sheet", "file"):
+            raise ValueError(f"shard_by must be 'sheet' or 'file', got {shard_by!r}")
+        check_shard_limit("shard_rows", shard_rows)
+        check_shard_limit("shard_bytes", shard_bytes)
+        if rejects_format is not None and rejects_format not in rejects.FORMATS:
+            raise ValueError(
+                f"rejects_format must be one of {rejects.FORMATS} or None, got {rejects_format!r}"
+            )
+        if isinstance(word_path, (bytes, bytearray, memoryview)):
+            word_path = io.BytesIO(word_path)
         self.word_path = word_path
-        self.excel_path = excel_path
+        self.word_label = _describe_target(word_path)
+        if excel_path is None or isinstance(excel_path, (str, os.PathLike)):
+            self.excel_path = os.fspath(excel_path) if excel_path is not None else None
+            self.excel_stream = None
+        else:
+            self.excel_path = None
+            self.excel_stream = excel_path
+        self.excel_label = _describe_target(excel_path)
+        if delta and self.excel_path is None:
+            raise ValueError(
+                "delta conversion needs an Excel file path for its manifest"
+            )
+        if id_pattern is not None:
+            docid.compile_pattern(id_pattern)  # 格式无效时立即抛出 ValueError
+        self.id_pattern = id_pattern
+        self.prefetcher = prefetcher
+        self.rejects_format = rejects_format
+        self._rejects = None  # 本次转换的 rejects.RejectsReport
+        self.columnar = columnar
+        self.delta = delta
+        self._delta = None  # 本次转换的 delta_manifest.DocumentDelta
+        self.profile = profiling.profiling_requested(profile)
+        self._profiler = None  # 本次转换的 profiling.ConversionProfiler
+        self.shard_rows = shard_rows
+        self.shard_bytes = shard_bytes
+        self.shard_by = shard_by
+        self.pipeline = pipeline
+        self.queue_size = queue_size
         self.log_path = None  # 初始化为 None
         self.logger = None
+        self._injected_logger = logger
+        self._owns_logger = False
+        self.job_id = job_id or logger_config.new_job_id()
+        self._excel_output = None  # 实际写入的目标 (路径或流)
+        self.progress_callback = progress_callback
         # self._setup_logger() # 将在 convert 方法开始时调用
 
     def _setup_logger(self):
         """配置日志记录器，日志文件与 Excel 文件同目录。"""
+        if self._injected_logger is not None:
+            # 使用调用方提供的 logger，不创建日志文件
+            self.logger = self._injected_logger
+            self.log_path = None
+            return
+        if self.excel_path is None:
+            # 输出到流/内存时没有可以放日志文件的目录
+            self.logger = logging.getLogger(__name__)
+            self.log_path = None
+            return
+
         intended_log_path_for_error = "Unknown (error before path generation)"
         try:
             log_dir = os.path.dirname(self.excel_path)
@@ -71,7 +230,8 @@ class DocConverter:
                 pass
 
             # 尝试设置日志
-            self.logger = logger_config.setup_logging(self.log_path)
+            self.logger = logger_config.setup_logging(self.log_path, self.job_id)
+            self._owns_logger = True
             if not self.logger:
                 # setup_logging 内部应该处理错误，但以防万一它返回了 None
                 raise RuntimeError(
@@ -103,6 +263,28 @@ class DocConverter:
             self.logger = None
             self.log_path = None
 
+    def _report_progress(self, event, **data):
+        """向 progress_callback 发送进度事件。
+
+        事件类型: "opened" (tables), "table" (table, tables, matched, rows_done),
+        "writing" (mode), "saved" (rows, shards)。回调出错不会中断转换。
+        """
+        if self.progress_callback is None:
+            return
+        try:
+            self.progress_callback({"event": event, **data})
+        except Exception as e:
+            if self.logger:
+                self.logger.warning(
+                    f"Progress callback failed for event '{event}': {e}"
+                )
+
+    def _close_logger(self):
+        """关闭本次转换创建的日志 handler，避免文件句柄泄漏。"""
+        if self._owns_logger and self.logger is not None:
+            logger_config.close_logging(self.logger)
+        self._owns_logger = False
+
     def _check_word_table_header(self, table):
         """检查 Word 表格的表头是否符合预期（逻辑不变）。"""
         if not self.logger:
@@ -147,6 +329,12 @@ class DocConverter:
         if not self.logger:
             return "error"
 
+        if self.excel_path is None:
+            self.logger.info(
+                f"Excel target is {self.excel_label}. Will create a new workbook."
+            )
+            return "create"
+
         if not os.path.exists(self.excel_path):
             self.logger.info(
                 f"Excel file '{self.excel_path}' not found. Will create a new file."
@@ -272,43 +460,50 @@ class DocConverter:
             )
             return [], [], skipped_empty_count  # 出错时也返回当前计数
 
-    def _process_row(self, raw_row_data, table_index, row_index):
-        """处理单行 Word 数据，准备写入 Excel (映射到最新的14列中文表头)。"""
+    def _process_row(self, raw_row_data, table_index, row_index, issues=None):
+        """处理单行 Word 数据，准备写入 Excel (映射到最新的14列中文表头)。
+
+        :param issues: 可选列表，发现的问题代码 (ISSUE_*) 会追加到其中。
+        """
         if not self.logger:
             return None
+        if issues is None:
+            issues = []
 
         expected_word_cols = len(EXPECTED_WORD_HEADERS_NORMALIZED)
         # 检查列数是否符合 Word 表头预期 (逻辑不变)
         if len(raw_row_data) < expected_word_cols:
-            self.logger.warning(
-                f"Row {row_index} in table {table_index + 1} has fewer cells ({len(raw_row_data)}) than expected ({expected_word_cols}). Padding with empty strings. Data: {raw_row_data}"
-            )
+            issues.append(ISSUE_SHORT_ROW)
+            self._warn_cell_count(raw_row_data, table_index, row_index)
             raw_row_data.extend([""] * (expected_word_cols - len(raw_row_data)))
         elif len(raw_row_data) > expected_word_cols:
-            self.logger.warning(
-                f"Row {row_index} in table {table_index + 1} has more cells ({len(raw_row_data)}) than expected ({expected_word_cols}). Truncating extra cells. Data: {raw_row_data}"
-            )
+            issues.append(ISSUE_LONG_ROW)
+            self._warn_cell_count(raw_row_data, table_index, row_index)
             raw_row_data = raw_row_data[:expected_word_cols]
 
         # 按 Word 表头顺序提取数据
         try:
             # Word 列索引: 0:序号, 1:资料名称, 2:资料来源, 3:提交人, 4:接收人, 5:交接日期, 6:存放位置, 7:备注
-            data_name = raw_row_data[1].strip()  # -> 文档名称 (Excel Index 1)
-            data_source = raw_row_data[2].strip()  # -> 来源部门 (Excel Index 3)
-            submitter = raw_row_data[3].strip()  # -> 提交人   (Excel Index 4)
-            receiver = raw_row_data[4].strip()  # -> 接收人   (Excel Index 5)
-            handover_date_str = raw_row_data[5].strip()  # -> 交接日期 (Excel Index 7)
-            location = raw_row_data[6].strip()  # -> 保管位置 (Excel Index 8)
-            remarks = raw_row_data[7].strip()  # -> 备注     (Excel Index 9)
+            # 文本经过 utils 的标准化 (NFKC、空白字符统一)；取值高度重复的列使用带缓存的版本
+            norm = utils.normalize_cell
+            cached = utils.normalize_cell_cached
+            data_name = norm(raw_row_data[1])  # -> 文档名称 (Excel Index 1)
+            data_source = cached(raw_row_data[2])  # -> 来源部门 (Excel Index 3)
+            submitter = cached(raw_row_data[3])  # -> 提交人   (Excel Index 4)
+            receiver = cached(raw_row_data[4])  # -> 接收人   (Excel Index 5)
+            handover_date_str = cached(raw_row_data[5])  # -> 交接日期 (Excel Index 7)
+            location = cached(raw_row_data[6])  # -> 保管位置 (Excel Index 8)
+            remarks = norm(raw_row_data[7])  # -> 备注     (Excel Index 9)
 
             # 处理日期
             handover_date_obj = utils.parse_date(handover_date_str)
             if handover_date_obj:
                 handover_date_formatted = handover_date_obj.strftime("%Y-%m-%d")
             else:
-                self.logger.warning(
-                    f"Could not parse date '{handover_date_str}' (交接日期) in table {table_index + 1}, row {row_index}. Leaving date field empty."
+                issues.append(
+                    ISSUE_BAD_DATE if handover_date_str else ISSUE_MISSING_DATE
                 )
+                self._warn_bad_date(handover_date_str, table_index, row_index)
                 handover_date_formatted = ""  # 如果日期解析失败，保留为空
 
             # 构建 Excel 行数据列表 (映射到14列 EXPECTED_EXCEL_HEADERS 顺序)
@@ -351,242 +546,965 @@ class DocConverter:
             )
             return None
 
-    def convert(self):
-        """执行 Word 到 Excel 的转换过程。"""
-        self._setup_logger()
-        if not self.logger:
-            # 即使没有文件日志，也应该能在控制台看到错误
-            print("ERROR: Logger setup failed critically. Cannot proceed.")
-            # 返回错误信息，避免程序完全崩溃
-            return {
-                "status": "error",
-                "message": "Logger setup failed. Cannot proceed.",
-                "success": 0,
-                "errors": 0,
-                "total_skipped_rows": 0,
-                "excel_path": self.excel_path,
-                "log_path": self.log_path,
-            }
+    def _warn_cell_count(self, raw_row_data, table_index, row_index):
+        expected_word_cols = len(EXPECTED_WORD_HEADERS_NORMALIZED)
+        if len(raw_row_data) < expected_word_cols:
+            self.logger.warning(
+                f"Row {row_index} in table {table_index + 1} has fewer cells ({len(raw_row_data)}) than expected ({expected_word_cols}). Padding with empty strings. Data: {raw_row_data}"
+            )
+        else:
+            self.logger.warning(
+                f"Row {row_index} in table {table_index + 1} has more cells ({len(raw_row_data)}) than expected ({expected_word_cols}). Truncating extra cells. Data: {raw_row_data}"
+            )
 
-        self.logger.info(
-            f"Starting conversion from '{self.word_path}' to '{self.excel_path}'"
+    def _warn_bad_date(self, handover_date_str, table_index, row_index):
+        self.logger.warning(
+            f"Could not parse date '{handover_date_str}' (交接日期) in table {table_index + 1}, row {row_index}. Leaving date field empty."
         )
 
-        excel_mode = self._check_excel_header()  # 调用新的检查函数
+    def _map_rows(self, pending, table_index):
+        """映射一个表格中待处理的行，产出 (原始行, 原始行号, 原始单元格数, Excel 行或 None, 问题代码列表)。
 
-        if excel_mode == "mismatch" or excel_mode == "error":
-            msg = f"Excel header check failed (mode: {excel_mode}). Please check the Excel file or logs."
-            self.logger.error(msg)
-            return {
-                "status": "error",
-                "message": msg,
-                "success": 0,
-                "errors": 0,
-                "total_skipped_rows": 0,
-                "excel_path": self.excel_path,
-                "log_path": self.log_path,
-            }
+        启用 columnar 且行数达到 columnar.COLUMNAR_MIN_ROWS 时按列批量映射，否则逐行调用
+        _process_row；两种方式的结果、问题代码和日志警告相同。
+        """
+        if self.columnar and len(pending) >= columnar_mapping.COLUMNAR_MIN_ROWS:
+            if not columnar_mapping.available():
+                self.logger.warning(
+                    f"Columnar mapping needs pandas, which is not installed. Processing table {table_index + 1} row by row."
+                )
+            else:
+                try:
+                    mapped = self._map_rows_columnar(pending, table_index)
+                except Exception as e:
+                    self.logger.warning(
+                        f"Columnar mapping of table {table_index + 1} failed: {e}. Processing its rows one by one.",
+                        exc_info=True,
+                    )
+                else:
+                    # 警告在产出每一行时记录，与逐行处理的日志顺序相同
+                    yield from self._iter_columnar_rows(pending, table_index, *mapped)
+                    return
+        for raw_row, row_index in pending:
+            issues = []
+            raw_cell_count = len(raw_row)  # _process_row 会就地补空
+            processed_row_data = self._process_row(
+                raw_row, table_index, row_index, issues
+            )
+            yield raw_row, row_index, raw_cell_count, processed_row_data, issues
 
-        success_count = 0
-        error_count = 0
-        total_skipped_empty = 0  # Word 读取时跳过
-        processed_data_for_excel = []
-        processed_tables = 0
-        processed_rows_total = 0
-        skipped_processed_empty_count = 0  # 处理后变空跳过
+    def _map_rows_columnar(self, pending, table_index):
+        """一次映射整个表格，返回 (原始单元格数列表, Excel 行列表, 日期无法解析的行)。"""
+        expected_word_cols = len(EXPECTED_WORD_HEADERS_NORMALIZED)
+        raw_rows = [raw_row for raw_row, _ in pending]
+        raw_cell_counts = [len(raw_row) for raw_row in raw_rows]
+        # 映射成功之前不修改原始行 (失败时改为逐行处理)
+        excel_rows, bad_dates = columnar_mapping.map_rows(
+            [
+                (
+                    raw_row
+                    if len(raw_row) >= expected_word_cols
+                    else raw_row + [""] * (expected_word_cols - len(raw_row))
+                )
+                for raw_row in raw_rows
+            ]
+        )
+        self.logger.debug(
+            f"Mapped {len(excel_rows)} rows of table {table_index + 1} column-wise."
+        )
+        for raw_row in raw_rows:
+            if len(raw_row) < expected_word_cols:
+                # 与 _process_row 相同，就地补空
+                raw_row.extend([""] * (expected_word_cols - len(raw_row)))
+        return raw_cell_counts, excel_rows, bad_dates
 
-        try:
-            document = docx.Document(self.word_path)
-            self.logger.info(f"Successfully opened Word document: '{self.word_path}'")
-            self.logger.info(f"Found {len(document.tables)} tables in the document.")
+    def _iter_columnar_rows(
+        self, pending, table_index, raw_cell_counts, excel_rows, bad_dates
+    ):
+        expected_word_cols = len(EXPECTED_WORD_HEADERS_NORMALIZED)
+        for position, (raw_row, row_index) in enumerate(pending):
+            issues = []
+            raw_cell_count = raw_cell_counts[position]
+            if raw_cell_count != expected_word_cols:
+                issues.append(
+                    ISSUE_SHORT_ROW
+                    if raw_cell_count < expected_word_cols
+                    else ISSUE_LONG_ROW
+                )
+                self._warn_cell_count(raw_row[:raw_cell_count], table_index, row_index)
+            if position in bad_dates:
+                handover_date_str = bad_dates[position]
+                issues.append(
+                    ISSUE_BAD_DATE if handover_date_str else ISSUE_MISSING_DATE
+                )
+                self._warn_bad_date(handover_date_str, table_index, row_index)
+            yield raw_row, row_index, raw_cell_count, excel_rows[position], issues
+
+    def _record_issues(self, stats, table_stats, row_index, issues, cells):
+        """统计一行的问题代码并记入问题行报告 (只用于写入或处理失败的行，跳过的空行不算)。"""
+        if not issues:
+            return
+        for code in issues:
+            stats["issues"][code] = stats["issues"].get(code, 0) + 1
+            table_stats["issues"][code] = table_stats["issues"].get(code, 0) + 1
+        if self._rejects is not None:
+            self._rejects.add(table_stats["table"], row_index, issues, cells)
+
+    def _make_result(
+        self, status, message, success=0, errors=0, total_skipped_rows=0, **extra
+    ):
+        """构建 convert() 返回的结果字典。"""
+        result = {
+            "status": status,
+            "message": message,
+            "success": success,
+            "errors": errors,
+            "total_skipped_rows": total_skipped_rows,
+            "excel_path": self.excel_path,
+            "log_path": self.log_path,
+            "shards": [],
+        }
+        result.update(extra)
+        return result
+
+    def _new_stats(self):
+        """创建转换过程中使用的计数器。"""
+        return {
+            "success": 0,
+            "errors": 0,
+            "skipped_empty": 0,  # Word 读取时跳过
+            "skipped_processed_empty": 0,  # 处理后变空跳过
+            "processed_tables": 0,
+            "processed_rows_total": 0,
+            "tables": [],  # 每个表格的明细
+            "issues": {},  # 问题代码 -> 行数
+            "unchanged_tables": 0,  # 增量转换: 内容未变化而跳过的表格
+            "unchanged_rows": 0,  # 增量转换: 内容未变化而跳过的行
+        }
+
+    def _read_tables(self, fast=False):
+        """读取 Word 文档中的表格。fast=True 时使用轻量读取器 (docx_reader)。
+
+        文件路径先经 prefetch 整个取到本地 (网络文件一次顺序读，本地文件 mmap)，
+        避免 zipfile 在网络共享上做大量小的随机读。两种读取器都在返回前读完所需内容。
+        """
+        if isinstance(self.word_path, (str, os.PathLike)):
+            source = None
+            if self.prefetcher is not None:
+                source = self.prefetcher.take(self.word_path)
+            if source is not None:
+                self.logger.info(
+                    f"Using prefetched Word document ({source.describe()})."
+                )
+            else:
+                source = prefetch.load(self.word_path)
+                self.logger.info(f"Loaded Word document ({source.describe()}).")
+            with source:
+                tables = self._parse_tables(source.open(), fast)
+        else:
+            if hasattr(self.word_path, "seek"):
+                self.word_path.seek(0)  # 允许同一个流多次转换
+            tables = self._parse_tables(self.word_path, fast)
+        self.logger.info(f"Successfully opened Word document: '{self.word_label}'")
+        return tables
+
+    @staticmethod
+    def _parse_tables(stream, fast):
+        if fast:
+            return docx_reader.read_tables(stream)
+        return docx.Document(stream).tables
 
-            for table_index, table in enumerate(document.tables):
-                self.logger.info(f"Processing table {table_index + 1}...")
-                if self._check_word_table_header(table):
+    def _iter_processed_rows(self, stats, fast=False):
+        """打开 Word 文档，逐行产出处理后的 Excel 行数据，同时更新 stats 计数。"""
+        delta = self._delta
+        # 增量转换需要表格的 XML 来计算哈希，轻量读取器可以在不解析单元格的情况下提供
+        tables = self._read_tables(fast or delta is not None)
+        self.logger.info(f"Found {len(tables)} tables in the document.")
+        self._report_progress("opened", tables=len(tables))
+
+        for table_index, table in enumerate(tables):
+            self.logger.info(f"Processing table {table_index + 1}...")
+            table_stats = {
+                "table": table_index + 1,
+                "matched": False,
+                "rows": 0,  # 不含表头
+                "written": 0,
+                "empty": 0,
+                "empty_after_processing": 0,
+                "errors": 0,
+                "issues": {},
+                "unchanged": False,
+                "unchanged_rows": 0,
+            }
+            stats["tables"].append(table_stats)
+
+            if delta is not None:
+                digest = delta_manifest.table_digest(table)
+                if delta.unchanged(table_index, digest):
                     self.logger.info(
-                        f"Table {table_index + 1} header matches. Extracting data..."
+                        f"Table {table_index + 1} is unchanged since the last conversion. Skipping."
                     )
-                    processed_tables += 1
-                    extracted_rows, original_indices, skipped_in_table = (
-                        self._extract_data_from_table(table, table_index)
+                    stats["unchanged_tables"] += 1
+                    table_stats.update(
+                        matched=True,
+                        unchanged=True,
+                        rows=delta.row_count(table_index),
                     )
-                    total_skipped_empty += skipped_in_table  # 累加到总数
-                    self.logger.info(
-                        f"Extracted {len(extracted_rows)} non-empty rows from table {table_index + 1}. Skipped {skipped_in_table} empty rows in this table."
+                    self._report_progress(
+                        "table",
+                        table=table_index + 1,
+                        tables=len(tables),
+                        matched=True,
+                        rows_done=stats["success"],
                     )
+                    continue
+
+            table_stats["rows"] = max(len(table.rows) - 1, 0)
+            if not self._check_word_table_header(table):
+                self.logger.warning(
+                    f"Skipping table {table_index + 1} due to header mismatch."
+                )
+                self._report_progress(
+                    "table",
+                    table=table_index + 1,
+                    tables=len(tables),
+                    matched=False,
+                    rows_done=stats["success"],
+                )
+                continue
+
+            self.logger.info(
+                f"Table {table_index + 1} header matches. Extracting data..."
+            )
+            stats["processed_tables"] += 1
+            table_stats["matched"] = True
+            extracted_rows, original_indices, skipped_in_table = (
+                self._extract_data_from_table(table, table_index)
+            )
+            stats["skipped_empty"] += skipped_in_table  # 累加到总数
+            table_stats["empty"] = skipped_in_table
+            self.logger.info(
+                f"Extracted {len(extracted_rows)} non-empty rows from table {table_index + 1}. Skipped {skipped_in_table} empty rows in this table."
+            )
+
+            row_hashes = previous_hashes = None
+            if delta is not None:
+                # 按行位置 (不含表头) 记录哈希，与上次的记录逐位置比较
+                row_hashes = [
+                    delta_manifest.row_digest([cell.text for cell in row.cells])
+                    for row in table.rows[1:]
+                ]
+                previous_hashes = delta.record(table_index, digest, row_hashes)
 
-                    if not extracted_rows:
+            pending = []  # (原始行, 原始行号)
+            for i, raw_row in enumerate(extracted_rows):
+                original_row_index = original_indices[i]
+                if previous_hashes:
+                    position = original_row_index - 2
+                    if (
+                        position < len(previous_hashes)
+                        and previous_hashes[position] == row_hashes[position]
+                    ):
+                        stats["unchanged_rows"] += 1
+                        table_stats["unchanged_rows"] += 1
                         continue
+                pending.append((raw_row, original_row_index))
 
-                    for i, raw_row in enumerate(extracted_rows):
-                        original_row_index = original_indices[i]
-                        processed_rows_total += 1
-                        processed_row_data = self._process_row(
-                            raw_row, table_index, original_row_index
-                        )
+            for (
+                raw_row,
+                original_row_index,
+                raw_cell_count,
+                processed_row_data,
+                issues,
+            ) in self._map_rows(pending, table_index):
+                stats["processed_rows_total"] += 1
+                if not processed_row_data:  # _process_row 返回了 None (处理失败)
+                    issues.append(ISSUE_PROCESS_ERROR)
+                    self._record_issues(
+                        stats,
+                        table_stats,
+                        original_row_index,
+                        issues,
+                        raw_row[:raw_cell_count],
+                    )
+                    stats["errors"] += 1
+                    table_stats["errors"] += 1
+                    continue
 
-                        if processed_row_data:
-                            # --- 新增检查: 检查处理后的行是否有效空行 ---
-                            is_processed_row_empty = all(
-                                str(cell).strip() == "" for cell in processed_row_data
-                            )
-                            if is_processed_row_empty:
-                                self.logger.warning(
-                                    f"Skipping effectively empty row after processing: table {table_index + 1}, original row {original_row_index}. Raw data: {raw_row}"
-                                )
-                                skipped_processed_empty_count += 1  # 计数
-                                # 不将此行添加到 processed_data_for_excel，也不计入 success_count 或 error_count
-                            else:
-                                # --- 只有非空行才添加到最终列表并计数 ---
-                                success_count += 1
-                                processed_data_for_excel.append(processed_row_data)
-                                self.logger.debug(
-                                    f"Successfully processed row: table {table_index + 1}, original row {original_row_index}."
-                                )
-                        else:  # _process_row 返回了 None (处理失败)
-                            error_count += 1
-                else:
+                # --- 检查处理后的行是否有效空行 ---
+                if all(str(cell).strip() == "" for cell in processed_row_data):
                     self.logger.warning(
-                        f"Skipping table {table_index + 1} due to header mismatch."
+                        f"Skipping effectively empty row after processing: table {table_index + 1}, original row {original_row_index}. Raw data: {raw_row}"
                     )
+                    stats["skipped_processed_empty"] += 1
+                    table_stats["empty_after_processing"] += 1
+                    # 不写入 Excel，也不计入 success 或 errors (也不算问题行)
+                    continue
 
-        except docx.opc.exceptions.PackageNotFoundError as e:
-            msg = f"Word 文档未找到或无效: '{self.word_path}'"
+                self._record_issues(
+                    stats,
+                    table_stats,
+                    original_row_index,
+                    issues,
+                    raw_row[:raw_cell_count],
+                )
+
+                # --- 只有非空行才写入并计数 ---
+                stats["success"] += 1
+                table_stats["written"] += 1
+                self.logger.debug(
+                    f"Successfully processed row: table {table_index + 1}, original row {original_row_index}."
+                )
+                yield processed_row_data
+
+            self._report_progress(
+                "table",
+                table=table_index + 1,
+                tables=len(tables),
+                matched=True,
+                rows_done=stats["success"],
+            )
+
+    def _total_skipped(self, stats):
+        return stats["skipped_empty"] + stats["skipped_processed_empty"]
+
+    def _word_error_result(self, e, stats):
+        """读取 Word 文档失败时的结果。"""
+        if isinstance(
+            e,
+            (
+                docx.opc.exceptions.PackageNotFoundError,
+                FileNotFoundError,
+                zipfile.BadZipFile,
+            ),
+        ):
+            msg = f"Word 文档未找到或无效: '{self.word_label}'"
             self.logger.error(msg)
-            total_skipped_rows = (
-                total_skipped_empty + skipped_processed_empty_count
-            )  # 计算总数
-            return {
-                "status": "error",
-                "message": msg,
-                "success": 0,
-                "errors": error_count,
-                "total_skipped_rows": total_skipped_rows,  # 返回总数
-                "excel_path": self.excel_path,
-                "log_path": self.log_path,
-            }
-        except Exception as e:
+        else:
             msg = f"读取 Word 文档时发生意外错误: {e}"
-            self.logger.error(msg, exc_info=True)
-            total_skipped_rows = (
-                total_skipped_empty + skipped_processed_empty_count
-            )  # 计算总数
-            return {
-                "status": "error",
-                "message": msg,
-                "success": 0,
-                "errors": error_count,
-                "total_skipped_rows": total_skipped_rows,  # 返回总数
-                "excel_path": self.excel_path,
-                "log_path": self.log_path,
-            }
+            self.logger.error(msg, exc_info=e)
+        return self._make_result(
+            "error",
+            msg,
+            errors=stats["errors"],
+            total_skipped_rows=self._total_skipped(stats),
+        )
+
+    def _no_data_result(self, stats):
+        """没有任何数据需要写入时的结果。"""
+        processed_tables = stats["processed_tables"]
+        processed_rows_total = stats["processed_rows_total"]
+        error_count = stats["errors"]
+        skipped_processed_empty_count = stats["skipped_processed_empty"]
+        total_skipped_rows = self._total_skipped(stats)
+
+        if processed_tables == 0:
+            msg = "未在 Word 文档中找到表头匹配的表格。未写入数据。"
+        elif error_count > 0:
+            msg = f"从 {processed_tables} 个匹配表格中处理了 {processed_rows_total} 个非空行，但 {error_count} 行处理失败，{skipped_processed_empty_count} 行处理后变为空。总共跳过 {total_skipped_rows} 行。未写入数据。请检查日志。"
+        elif (
+            skipped_processed_empty_count > 0
+            and processed_rows_total == skipped_processed_empty_count
+        ):
+            msg = f"从 {processed_tables} 个匹配表格中处理了 {processed_rows_total} 个非空行，但所有行处理后均变为空。总共跳过 {total_skipped_rows} 行。未写入数据。"
+        elif total_skipped_rows > 0 and processed_rows_total == 0:
+            msg = f"在 {processed_tables} 个匹配表格中只找到空行 (总共跳过 {total_skipped_rows} 行)。未写入数据。"
+        else:
+            msg = "未从 Word 文档成功提取或处理任何数据。未写入数据。"
+
+        self.logger.warning(msg)
+        status = (
+            "warning"
+            if error_count == 0 and skipped_processed_empty_count == 0
+            else "error"
+        )
+        return self._make_result(
+            status,
+            msg,
+            errors=error_count,
+            total_skipped_rows=total_skipped_rows,
+        )
+
+    def _write_error_result(self, e, stats):
+        """写入 Excel 失败时的结果。"""
+        if isinstance(e, PermissionError):
+            msg = f"写入 Excel 文件 '{self.excel_label}' 失败。权限不足或文件被占用?"
+            self.logger.error(msg, exc_info=False)
+        elif isinstance(e, filelock.LockTimeout):
+            msg = f"写入 Excel 文件 '{self.excel_label}' 失败: 等待其它程序释放文件锁超时。"
+            self.logger.error(f"{msg} {e}")
+        else:
+            msg = f"写入 Excel 文件 '{self.excel_label}' 时发生意外错误: {e}"
+            self.logger.error(msg, exc_info=e)
+        return self._make_result(
+            "error",
+            msg,
+            errors=stats["errors"],
+            total_skipped_rows=self._total_skipped(stats),
+        )
+
+    def _open_sink(self, excel_mode):
+        shard_by = self.shard_by
+        shard_bytes = self.shard_bytes
+        if self.excel_path is None and (shard_by == "file" or shard_bytes):
+            # 流只能容纳一个文件，退化为按工作表分片
+            self.logger.warning(
+                f"File sharding is not possible when writing to {self.excel_label}. Sharding by sheet instead."
+            )
+            shard_by = "sheet"
+            shard_bytes = None
+        sink = ExcelSink(
+            self._excel_output,
+            excel_mode,
+            EXPECTED_EXCEL_HEADERS,
+            self.logger,
+            shard_rows=self.shard_rows,
+            shard_bytes=shard_bytes,
+            shard_by=shard_by,
+        )
+        sink.open()
+        self._report_progress("writing", mode=excel_mode)
+        return sink
+
+    def _write_batches(self, batches):
+        """在持有目标文件锁时调用: 重新检查表头 (等待锁期间文件可能已被其它程序创建或追加)，
+        依次写入各批行并保存一次。"""
+        excel_mode = self._check_excel_header()
+        if excel_mode == "mismatch" or excel_mode == "error":
+            raise RuntimeError(
+                f"Excel header check failed (mode: {excel_mode}) after acquiring the lock."
+            )
+        sink = self._open_sink(excel_mode)
+        sequences = self._id_sequences()
+        for id_pattern, rows, logger in batches:
+            if id_pattern:
+                next_id = sequences.get(id_pattern).next_id
+                for row_data in rows:
+                    row_data[0] = next_id()
+                    sink.append(row_data)
+            else:
+                for row_data in rows:
+                    sink.append(row_data)
+            self._log_batch(logger, id_pattern, rows)
+        shards = sink.close()
+        self._commit_ids(sequences)
+        return shards
+
+    def _log_batch(self, logger, id_pattern, rows):
+        """把一批行的写入记录到该批所属转换的日志 (合并写入时 leader 也写入其它任务的行)。"""
+        message = f"Appended {len(rows)} rows to '{self.excel_label}'"
+        if id_pattern and rows:
+            message += f" (document IDs {rows[0][0]} to {rows[-1][0]})"
+        if logger is not self.logger:
+            message += f" in a save by job {self.job_id}"
+        logger.info(f"{message}.")
+
+    def _id_sequences(self):
+        """本次写入使用的 ID 分配器: get(格式) 返回该格式的分配器 (每种格式只确定一次最大编号)。
+
+        在打开目标文件之前调用，读取的 ID 记录与写入前的文件对应。
+        """
+        marks = {}
+        if self.excel_path is not None:
+            marks = docid.load_marks(self.excel_path, self.logger)
+        return _IdSequences(self.excel_path, marks, self.logger)
+
+    def _commit_ids(self, sequences):
+        """Excel 保存后更新 ID 记录。不分配 ID 的追加也要更新，否则记录会因文件指纹变化而失效。
+
+        失败时只记录警告: 下一次分配会重新扫描 A 列。
+        """
+        if self.excel_path is None or not sequences.marks:
+            return
+        try:
+            docid.save_marks(self.excel_path, sequences.marks)
+        except Exception as e:
+            self.logger.warning(
+                f"Failed to save document ID record '{docid.sidecar_path(self.excel_path)}': {e}. "
+                "The next append with document IDs will rescan the workbook."
+            )
+
+    def _write_rows(self, rows):
+        """写入本次转换的所有行，返回 (shards, 合并写入的任务数)。
+
+        写文件时先获得跨进程文件锁；同一进程中同时写同一目标的其它转换会合并为一次写入。
+        每批行带着各自转换的 ID 格式和日志记录器，文档 ID 在锁内按写入顺序分配。
+        只与分片设置相同的转换合并，合并写入使用 leader 的分片设置。
+        """
+        batch = (self.id_pattern, rows, self.logger)
+        if self.excel_path is None:
+            return self._write_batches([batch]), 1  # 流/内存目标只属于本次转换
+        shards, coalesced_jobs = default_coalescer.write(
+            self.excel_path,
+            batch,
+            writer=self._write_batches,
+            lock_factory=lambda: filelock.FileLock(self.excel_path, logger=self.logger),
+            options=(self.shard_rows, self.shard_bytes, self.shard_by),
+        )
+        if coalesced_jobs > 1:
+            self.logger.info(
+                f"Rows were written together with {coalesced_jobs - 1} other pending conversions in one save."
+            )
+        return shards, coalesced_jobs
+
+    def _acquire_target_lock(self):
+        """流水线模式使用: 整个流式写入期间持有目标文件锁 (流/内存目标不需要锁)。"""
+        if self.excel_path is None:
+            return None
+        return filelock.FileLock(self.excel_path, logger=self.logger).acquire()
+
+    def _success_result(
+        self, excel_mode, stats, shards, coalesced_jobs=1, document_ids=None
+    ):
+        """写入成功后的日志与结果。document_ids 为本次分配的 (第一个, 最后一个) 文档 ID。"""
+        self._report_progress("saved", rows=stats["success"], shards=len(shards))
+        extra = {"coalesced_jobs": coalesced_jobs}
+        if isinstance(self._excel_output, io.BytesIO) and self.excel_stream is None:
+            extra["excel_bytes"] = self._excel_output.getvalue()
+        success_count = stats["success"]
+        error_count = stats["errors"]
+        total_skipped_rows = self._total_skipped(stats)
+        if excel_mode == "create":
+            self.logger.info(
+                f"Successfully wrote {success_count} rows to new Excel file."
+            )
+        else:
+            self.logger.info(
+                f"Successfully appended {success_count} rows to Excel file."
+            )
+        if len(shards) > 1:
+            self.logger.info(
+                f"Output was split into {len(shards)} shards: "
+                + ", ".join(
+                    f"{s['path']} [{s['sheet']}] ({s['rows']} rows)" for s in shards
+                )
+            )
+
+        # 简化最终消息
+        final_message = f"转换完成: 成功 {success_count} 行, 失败 {error_count} 行, 共跳过空行 {total_skipped_rows} 行."
+        if len(shards) > 1:
+            final_message += f" 输出已拆分为 {len(shards)} 个分片."
+        if document_ids:
+            final_message += f" 文档 ID: {document_ids[0]} - {document_ids[1]}."
+            extra["document_ids"] = list(document_ids)
+        if self._delta is not None:
+            self._commit_delta()
+            final_message += f" 增量转换: 跳过未变化的表格 {stats['unchanged_tables']} 个、未变化的行 {stats['unchanged_rows']} 行."
+            extra.update(
+                unchanged_tables=stats["unchanged_tables"],
+                unchanged_rows=stats["unchanged_rows"],
+            )
+        self.logger.info(final_message)
+        return self._make_result(
+            "success",
+            final_message,
+            success=success_count,
+            errors=error_count,
+            total_skipped_rows=total_skipped_rows,
+            shards=shards,
+            **extra,
+        )
+
+    def _load_delta(self):
+        """读取增量清单。目标 Excel 不存在时忽略旧清单，重新完整转换。"""
+        path = delta_manifest.manifest_path(self.excel_path)
+        if os.path.exists(self.excel_path):
+            manifest = delta_manifest.DeltaManifest.load(path, self.logger)
+        else:
+            manifest = delta_manifest.DeltaManifest(path)
+        if isinstance(self.word_path, (str, os.PathLike)):
+            key = delta_manifest.document_key(self.word_path)
+            legacy_key = os.path.basename(os.fspath(self.word_path))
+        else:
+            key, legacy_key = self.word_label, None
+        document = delta_manifest.DocumentDelta(manifest, key, legacy_key)
+        if document.legacy_key is not None:
+            self.logger.info(
+                f"Using the delta record stored under the file name '{legacy_key}' by an earlier version; it will be saved under '{key}'."
+            )
+        self.logger.info(
+            f"Delta conversion enabled. Manifest: '{path}', {len(document.previous)} tables recorded for '{key}'."
+        )
+        return document
+
+    def _commit_delta(self):
+        """Excel 保存成功后写入清单。失败时只记录错误: 下一次转换会重新输出这些行。"""
+        try:
+            self._delta.commit()
+        except Exception as e:
+            self.logger.error(
+                f"Failed to save delta manifest '{self._delta.manifest.path}': {e}",
+                exc_info=e,
+            )
+
+    def _has_unchanged_content(self, stats):
+        return self._delta is not None and (
+            stats["unchanged_tables"] > 0 or stats["unchanged_rows"] > 0
+        )
+
+    def _delta_unchanged_result(self, stats):
+        """增量转换时没有新增或修改的行: 不写入 Excel，只更新清单。"""
+        self._commit_delta()
+        msg = (
+            f"增量转换: 自上次转换以来没有新增或修改的行 (未变化的表格 {stats['unchanged_tables']} 个、"
+            f"未变化的行 {stats['unchanged_rows']} 行). 未写入数据."
+        )
+        self.logger.info(msg)
+        return self._make_result(
+            "success",
+            msg,
+            errors=stats["errors"],
+            total_skipped_rows=self._total_skipped(stats),
+            unchanged_tables=stats["unchanged_tables"],
+            unchanged_rows=stats["unchanged_rows"],
+        )
+
+    def _profile_base_path(self):
+        """性能分析文件的路径前缀: 与 _conversion.log 同目录同前缀；没有日志文件时放在临时目录。"""
+        if self.log_path:
+            return self.log_path[: -len("_conversion.log")] + "_profile"
+        return os.path.join(
+            tempfile.gettempdir(), f"docconverter_{self.job_id}_profile"
+        )
+
+    def _run_profiled(self, func):
+        """执行 func()；开启性能分析时在结果中加入 "profile_paths"。"""
+        if not self.profile or not self.logger:
+            return func()
+        profiler = profiling.ConversionProfiler(self._profile_base_path(), self.logger)
+        profiler.start()
+        self._profiler = profiler
+        try:
+            result = func()
+        finally:
+            self._profiler = None
+            try:
+                paths = profiler.stop()
+            except Exception as e:
+                # 分析文件写入失败不影响转换结果
+                self.logger.error(f"Failed to write profiling output: {e}", exc_info=e)
+                paths = {}
+        result["profile_paths"] = paths
+        return result
+
+    def convert(self):
+        """执行 Word 到 Excel 的转换过程。"""
+        self._setup_logger()
+        try:
+            return self._run_profiled(self._convert)
+        finally:
+            self._close_logger()
+
+    def _convert(self):
+        if not self.logger:
+            # 即使没有文件日志，也应该能在控制台看到错误
+            print("ERROR: Logger setup failed critically. Cannot proceed.")
+            # 返回错误信息，避免程序完全崩溃
+            return self._make_result("error", "Logger setup failed. Cannot proceed.")
+
+        self._rejects = rejects.RejectsReport(
+            EXPECTED_WORD_HEADERS_NORMALIZED, ISSUE_DESCRIPTIONS
+        )
+        try:
+            return self._finish_rejects(self._convert_document())
+        finally:
+            self._rejects.close()
+            self._rejects = None
+
+    def _rejects_path(self):
+        if self.rejects_format is None or self.excel_path is None:
+            return None
+        return rejects.report_path(
+            self.excel_path, self.word_label, self.rejects_format
+        )
+
+    def _finish_rejects(self, result):
+        """在结果中加入按原因的问题行计数 ("reject_counts")，并一次性写出问题行报告 ("rejects_path")。
+
+        无论 Excel 是否写入成功都会生成报告。本次没有问题行时删除同名的旧报告，避免误导。
+        报告写入失败只记录错误，不影响转换结果。
+        """
+        report = self._rejects
+        result["reject_counts"] = dict(report.counts)
+        result["rejects_path"] = None
+        path = self._rejects_path()
+        if path is None:
+            return result
+        if report.rows == 0:
+            if os.path.exists(path):
+                try:
+                    os.remove(path)
+                    self.logger.info(f"Removed outdated rejects report '{path}'.")
+                except OSError as e:
+                    self.logger.warning(
+                        f"Could not remove outdated rejects report '{path}': {e}"
+                    )
+            return result
+        try:
+            report.write(path, self.rejects_format)
+        except Exception as e:
+            self.logger.error(
+                f"Failed to write rejects report '{path}': {e}", exc_info=e
+            )
+            return result
+        self.logger.info(f"Wrote {report.rows} rejected rows to '{path}'.")
+        result["rejects_path"] = path
+        result[
+            "message"
+        ] += f" 问题行 {report.rows} 行，明细见 {os.path.basename(path)}."
+        return result
+
+    def _convert_document(self):
+        self.logger.info(
+            f"Starting conversion from '{self.word_label}' to '{self.excel_label}'"
+        )
+        if self.excel_path is not None:
+            self._excel_output = self.excel_path
+        elif self.excel_stream is not None:
+            self._excel_output = self.excel_stream
+        else:
+            self._excel_output = io.BytesIO()
+        if self.delta:
+            self._delta = self._load_delta()
+
+        if self.pipeline:
+            return self._convert_pipelined()
+
+        excel_mode = self._check_excel_header()  # 调用新的检查函数
+
+        if excel_mode == "mismatch" or excel_mode == "error":
+            msg = f"Excel header check failed (mode: {excel_mode}). Please check the Excel file or logs."
+            self.logger.error(msg)
+            return self._make_result("error", msg)
 
-        # --- 计算总的跳过行数 ---
-        total_skipped_rows = total_skipped_empty + skipped_processed_empty_count
+        stats = self._new_stats()
+        try:
+            processed_data_for_excel = list(self._iter_processed_rows(stats))
+        except Exception as e:
+            return self._word_error_result(e, stats)
 
         # --- 处理没有数据写入的情况 ---
         if not processed_data_for_excel:
-            msg = "..."
-            # ... (Update messages to reflect the single total_skipped_rows)
-            if processed_tables == 0:
-                msg = "未在 Word 文档中找到表头匹配的表格。未写入数据。"
-            elif error_count > 0:
-                msg = f"从 {processed_tables} 个匹配表格中处理了 {processed_rows_total} 个非空行，但 {error_count} 行处理失败，{skipped_processed_empty_count} 行处理后变为空。总共跳过 {total_skipped_rows} 行。未写入数据。请检查日志。"
-            elif (
-                skipped_processed_empty_count > 0
-                and processed_rows_total == skipped_processed_empty_count
-            ):
-                msg = f"从 {processed_tables} 个匹配表格中处理了 {processed_rows_total} 个非空行，但所有行处理后均变为空。总共跳过 {total_skipped_rows} 行。未写入数据。"
-            elif total_skipped_rows > 0 and processed_rows_total == 0:
-                msg = f"在 {processed_tables} 个匹配表格中只找到空行 (总共跳过 {total_skipped_rows} 行)。未写入数据。"
-            else:
-                msg = "未从 Word 文档成功提取或处理任何数据。未写入数据。"
-
-            self.logger.warning(msg)
-            status = (
-                "warning"
-                if error_count == 0 and skipped_processed_empty_count == 0
-                else "error"
-            )
-            return {
-                "status": status,
-                "message": msg,
-                "success": 0,
-                "errors": error_count,
-                "total_skipped_rows": total_skipped_rows,  # 返回总数
-                "excel_path": self.excel_path,
-                "log_path": self.log_path,
-            }
+            if self._has_unchanged_content(stats):
+                return self._delta_unchanged_result(stats)
+            return self._no_data_result(stats)
 
         # --- 写入 Excel 文件 ---
         try:
-            os.makedirs(os.path.dirname(self.excel_path), exist_ok=True)
+            shards, coalesced_jobs = self._write_rows(processed_data_for_excel)
+        except Exception as e:
+            return self._write_error_result(e, stats)
 
-            if excel_mode == "create":
-                self.logger.info(f"Creating new Excel file: '{self.excel_path}'")
-                wb = Workbook()
-                ws = wb.active
-                ws.append(EXPECTED_EXCEL_HEADERS)
-                self.logger.info(
-                    f"Writing header to new Excel file: {EXPECTED_EXCEL_HEADERS}"
-                )
-                for row_data in processed_data_for_excel:
-                    ws.append(row_data)
-                wb.save(self.excel_path)
-                self.logger.info(
-                    f"Successfully wrote {success_count} rows to new Excel file."
-                )
+        document_ids = None
+        if self.id_pattern:
+            # 行在写入时被填上了 ID
+            document_ids = (
+                processed_data_for_excel[0][0],
+                processed_data_for_excel[-1][0],
+            )
+        return self._success_result(
+            excel_mode, stats, shards, coalesced_jobs, document_ids
+        )
 
-            elif excel_mode == "append":
-                self.logger.info(
-                    f"Appending data to existing Excel file: '{self.excel_path}'"
+    def preflight(self):
+        """预检 (dry-run): 只做 Word 表头检查与行校验，不读写任何 Excel 文件。
+
+        使用轻量读取器 (docx_reader) 读取表格。返回与 convert() 相同的计数，
+        另含 "dry_run": True、"tables" (每个表格的明细) 与 "issues" (问题代码 -> 行数)。
+        """
+        self._setup_logger()
+        try:
+            return self._run_profiled(self._preflight)
+        finally:
+            self._close_logger()
+
+    def _preflight(self):
+        if not self.logger:
+            print("ERROR: Logger setup failed critically. Cannot proceed.")
+            return self._make_result("error", "Logger setup failed. Cannot proceed.")
+
+        self.logger.info(f"Starting preflight (dry run) of '{self.word_label}'")
+        stats = self._new_stats()
+        try:
+            for _ in self._iter_processed_rows(stats, fast=True):
+                pass
+        except Exception as e:
+            result = self._word_error_result(e, stats)
+        else:
+            if stats["success"] == 0:
+                result = self._no_data_result(stats)
+            else:
+                msg = (
+                    f"预检完成: 将写入 {stats['success']} 行, 失败 {stats['errors']} 行, "
+                    f"共跳过空行 {self._total_skipped(stats)} 行, 匹配表格 {stats['processed_tables']} 个."
                 )
-                wb = load_workbook(self.excel_path)
-                ws = wb.active
-                for row_data in processed_data_for_excel:
-                    ws.append(row_data)
-                wb.save(self.excel_path)
-                self.logger.info(
-                    f"Successfully appended {success_count} rows to Excel file."
+                if stats["issues"]:
+                    msg += " 问题行: " + ", ".join(
+                        f"{code} {count}"
+                        for code, count in sorted(stats["issues"].items())
+                    )
+                self.logger.info(msg)
+                result = self._make_result(
+                    "success",
+                    msg,
+                    success=stats["success"],
+                    errors=stats["errors"],
+                    total_skipped_rows=self._total_skipped(stats),
                 )
+        result.update(dry_run=True, tables=stats["tables"], issues=stats["issues"])
+        return result
 
-            # 简化最终消息
-            final_message = f"转换完成: 成功 {success_count} 行, 失败 {error_count} 行, 共跳过空行 {total_skipped_rows} 行."
-            self.logger.info(final_message)
-            return {
-                "status": "success",
-                "message": final_message,
-                "success": success_count,
-                "errors": error_count,
-                "total_skipped_rows": total_skipped_rows,  # 返回总数
-                "excel_path": self.excel_path,
-                "log_path": self.log_path,
-            }
+    def _convert_pipelined(self):
+        """生产者/消费者模式: 读取线程解析 Word 并映射行，当前线程检查表头、打开并写入 Excel。
 
-        except PermissionError as e:
-            msg = f"写入 Excel 文件 '{self.excel_path}' 失败。权限不足或文件被占用?"
-            self.logger.error(msg, exc_info=False)
-            return {
-                "status": "error",
-                "message": msg,
-                "success": 0,
-                "errors": error_count,
-                "total_skipped_rows": total_skipped_rows,  # 返回总数
-                "excel_path": self.excel_path,
-                "log_path": self.log_path,
-            }
+        两者通过有界队列连接 (背压)，读取与写入可以重叠进行。
+        """
+        stats = self._new_stats()
+        row_queue = queue.Queue(maxsize=self.queue_size)
+        stop_event = threading.Event()
+        producer_errors = []
+
+        def put(item):
+            # 队列满时阻塞等待，但在消费者放弃时及时退出
+            while not stop_event.is_set():
+                try:
+                    row_queue.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+        def produce():
+            batch = []
+            try:
+                for row_data in self._iter_processed_rows(stats):
+                    batch.append(row_data)
+                    if len(batch) >= PIPELINE_BATCH_ROWS:
+                        put(batch)
+                        batch = []
+                        if stop_event.is_set():
+                            return
+                if batch:
+                    put(batch)
+            except Exception as e:
+                producer_errors.append(e)
+            finally:
+                put(_PIPELINE_DONE)
+
+        reader = threading.Thread(
+            target=produce, name="docConverter-reader", daemon=True
+        )
+        reader.start()
+        if self._profiler is not None:
+            self._profiler.add_thread(reader)
+
+        # 等待目标文件锁、表头检查、打开目标文件都与 Word 解析同时进行
+        try:
+            target_lock = self._acquire_target_lock()
         except Exception as e:
-            msg = f"写入 Excel 文件 '{self.excel_path}' 时发生意外错误: {e}"
-            self.logger.error(msg, exc_info=True)
-            return {
-                "status": "error",
-                "message": msg,
-                "success": 0,
-                "errors": error_count,
-                "total_skipped_rows": total_skipped_rows,  # 返回总数
-                "excel_path": self.excel_path,
-                "log_path": self.log_path,
-            }
+            stop_event.set()
+            reader.join()
+            return self._write_error_result(e, stats)
+        try:
+            excel_mode = self._check_excel_header()
+            if excel_mode == "mismatch" or excel_mode == "error":
+                stop_event.set()
+                reader.join()
+                msg = f"Excel header check failed (mode: {excel_mode}). Please check the Excel file or logs."
+                self.logger.error(msg)
+                return self._make_result("error", msg)
+
+            first_id = last_id = None
+            try:
+                sequences = self._id_sequences()
+                sink = self._open_sink(excel_mode)
+                next_id = None
+                if self.id_pattern:
+                    next_id = sequences.get(self.id_pattern).next_id
+                while True:
+                    batch = row_queue.get()
+                    if batch is _PIPELINE_DONE:
+                        break
+                    for row_data in batch:
+                        if next_id is not None:
+                            last_id = row_data[0] = next_id()
+                            if first_id is None:
+                                first_id = last_id
+                        sink.append(row_data)
+            except Exception as e:
+                stop_event.set()
+                reader.join()
+                return self._write_error_result(e, stats)
+
+            reader.join()
+            if producer_errors:
+                # 未保存的数据直接丢弃；已按文件切分保存的分片不会回滚
+                return self._word_error_result(producer_errors[0], stats)
+            if sink.total_rows == 0:
+                if self._has_unchanged_content(stats):
+                    return self._delta_unchanged_result(stats)
+                return self._no_data_result(stats)
+
+            try:
+                shards = sink.close()
+            except Exception as e:
+                return self._write_error_result(e, stats)
+            self._commit_ids(sequences)
+
+            return self._success_result(
+                excel_mode,
+                stats,
+                shards,
+                document_ids=(first_id, last_id) if first_id else None,
+            )
+        finally:
+            if target_lock is not None:
+                target_lock.release()
+
+
+def convert_bytes(word_data, logger=None, **options):
+    """在内存中完成一次转换，不读写任何临时文件。
+
+    :param word_data: .docx 内容 (bytes) 或可读的二进制文件对象。
+    :param logger: 可选的日志记录器；默认使用模块 logger，不创建日志文件。
+    :param options: 传给 DocConverter 的其它参数 (如 shard_rows, pipeline)。
+    :return: convert() 的结果字典；成功时 "excel_bytes" 为生成的 xlsx 内容。
+    """
+    return DocConverter(word_data, None, logger=logger, **options).convert()
+
+
+def preflight_many(
+    word_paths,
+    logger=None,
+    prefetch_depth=prefetch.DEFAULT_DEPTH,
+    memory_budget=prefetch.DEFAULT_MEMORY_BUDGET,
+):
+    """批量预检多个 Word 文档，不写入任何文件。
+
+    :param word_paths: Word 文档路径列表。
+    :param logger: 可选的日志记录器；默认丢弃逐行日志以保证速度。
+    :param prefetch_depth: 处理当前文档时在后台预读的后续文档数，0 表示不预读。
+    :param memory_budget: 预读内容的总字节数上限。
+    :return: {路径: preflight() 结果字典}
+    """
+    if logger is None:
+        logger = logging.getLogger(f"{logger_config.APP_LOGGER_NAME}.preflight")
+        if not logger.handlers:
+            logger.addHandler(logging.NullHandler())
+            logger.propagate = False
+    prefetcher = None
+    if prefetch_depth > 0:
+        prefetcher = prefetch.Prefetcher(prefetch_depth, memory_budget, logger)
+        prefetcher.schedule(word_paths)
+    try:
+        return {
+            path: DocConverter(
+                path, None, logger=logger, prefetcher=prefetcher
+            ).preflight()
+            for path in word_paths
+        }
+    finally:
+        if prefetcher is not None:
+            prefetcher.close()
 
 
 # --- 测试块 (需要 openpyxl 来运行) ---
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""增量转换使用的清单 (manifest)。
+
+清单保存在输出 Excel 旁边 (name_delta.json)，按源文档记录每个表头匹配表格的内容哈希，
+以及表格中每个数据行位置的哈希。源文档以标准化的绝对路径 (document_key) 区分，不同文件夹中
+同名的文档 (如各部门的 资料清单.docx) 追加到同一目标时各有各的记录。再次转换修订后的文档时:
+
+* 表格哈希未变的表格直接跳过，不做表头检查和数据提取;
+* 表格有变化时，只输出新增位置或哈希改变的行。
+
+清单只在 Excel 成功保存后写入，因此一次失败的转换不会让下一次漏掉数据。
+"""
+
+import hashlib
+import json
+import os
+from lxml import etree
+
+from . import filelock
+
+MANIFEST_VERSION = 1
+_ROW_SEPARATOR = "\x1f"  # 单元格之间的分隔符，避免 ["ab", "c"] 与 ["a", "bc"] 相同
+
+
+def manifest_path(excel_path):
+    """返回 Excel 文件对应的清单路径 (与 _conversion.log 同目录同前缀)。"""
+    root = os.path.splitext(excel_path)[0]
+    return f"{root}_delta.json"
+
+
+def document_key(word_path):
+    """清单中源文档的键: 标准化的绝对路径。"""
+    return os.path.normcase(os.path.abspath(os.fspath(word_path)))
+
+
+def table_element(table):
+    """返回表格的 w:tbl XML 元素 (python-docx 与 docx_reader 的表格都支持)。"""
+    element = getattr(table, "element", None)
+    if element is None:
+        element = table._tbl
+    return element
+
+
+def table_digest(table):
+    """表格的内容哈希: 对 w:tbl 的原始 XML 计算，不需要提取单元格文本。"""
+    return hashlib.blake2b(
+        etree.tostring(table_element(table)), digest_size=16
+    ).hexdigest()
+
+
+def row_digest(cell_texts):
+    """一行原始单元格文本的哈希。"""
+    return hashlib.blake2b(
+        _ROW_SEPARATOR.join(cell_texts).encode("utf-8"), digest_size=8
+    ).hexdigest()
+
+
+class DeltaManifest:
+    """一个输出文件的增量清单: {文档键: {表格序号: {"hash": ..., "rows": [...]}}}。"""
+
+    def __init__(self, path, documents=None):
+        self.path = path
+        self.documents = documents or {}
+
+    @classmethod
+    def load(cls, path, logger=None):
+        """读取清单；文件不存在或无法解析时返回空清单 (即退化为完整转换)。"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != MANIFEST_VERSION:
+                raise ValueError(f"unsupported manifest version {data.get('version')}")
+            return cls(path, data.get("documents", {}))
+        except FileNotFoundError:
+            return cls(path)
+        except Exception as e:
+            if logger:
+                logger.warning(
+                    f"Ignoring unreadable delta manifest '{path}': {e}. Doing a full conversion."
+                )
+            return cls(path)
+
+    def document(self, key):
+        """返回某个文档的已记录表格 ({表格序号字符串: 记录})。"""
+        return self.documents.get(key, {})
+
+    def set_document(self, key, tables):
+        self.documents[key] = tables
+
+    def save(self):
+        """原子地写入清单 (先写临时文件再替换)。"""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": MANIFEST_VERSION, "documents": self.documents},
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(tmp_path, self.path)
+
+
+class DocumentDelta:
+    """一次转换中单个文档的增量状态: 对比旧记录，并收集新的记录。"""
+
+    def __init__(self, manifest, key, legacy_key=None):
+        """
+        :param key: 文档键 (见 document_key)。
+        :param legacy_key: 旧版本清单使用的键 (只有文件名)。key 没有记录而旧键有时沿用旧记录，
+                           提交时改存到 key 下，避免升级后第一次转换把所有行重新追加一遍。
+        """
+        self.manifest = manifest
+        self.key = key
+        self.legacy_key = None
+        self.previous = manifest.document(key)
+        if not self.previous and legacy_key and manifest.document(legacy_key):
+            self.legacy_key = legacy_key
+            self.previous = manifest.document(legacy_key)
+        self.current = {}
+
+    def unchanged(self, table_index, digest):
+        """表格哈希与上次相同时返回 True，并沿用上次的记录。"""
+        entry = self.previous.get(str(table_index))
+        if entry is not None and entry["hash"] == digest:
+            self.current[str(table_index)] = entry
+            return True
+        return False
+
+    def row_count(self, table_index):
+        """本次记录中该表格的数据行数。"""
+        return len(self.current[str(table_index)]["rows"])
+
+    def record(self, table_index, digest, row_hashes):
+        """记录表格的新哈希，返回上次记录的行哈希列表 (没有记录时为空列表)。"""
+        entry = self.previous.get(str(table_index))
+        self.current[str(table_index)] = {"hash": digest, "rows": row_hashes}
+        return entry["rows"] if entry is not None else []
+
+    def commit(self):
+        """用本次的记录替换该文档的旧记录并保存清单。
+
+        写同一目标的其它转换可能已经更新了清单中其它文档的记录，因此在锁内重新读取后合并。
+        """
+        with filelock.FileLock(self.manifest.path):
+            latest = DeltaManifest.load(self.manifest.path)
+            latest.set_document(self.key, self.current)
+            if self.legacy_key is not None:
+                latest.documents.pop(self.legacy_key, None)
+            latest.save()
+        self.manifest = latest
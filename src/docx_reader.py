@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""轻量的 Word 表格读取器。
+
+直接用 lxml 解析 word/document.xml，只提取正文中的表格文本，不构建 python-docx 的对象模型，
+速度明显快于 docx.Document(...).tables。返回的对象提供与 python-docx 相同的
+table.rows[i].cells[j].text 接口，单元格文本规则 (合并单元格、制表符、换行等) 与 python-docx 一致，
+因此可以直接交给 DocConverter 的表头检查和数据提取逻辑。
+"""
+
+import posixpath
+import zipfile
+from lxml import etree
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_W = "{%s}" % W_NS
+_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_OFFICE_DOCUMENT_REL = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+)
+
+_T = _W + "t"
+_TAB = _W + "tab"
+_PTAB = _W + "ptab"
+_BR = _W + "br"
+_CR = _W + "cr"
+_NO_BREAK_HYPHEN = _W + "noBreakHyphen"
+_R = _W + "r"
+_HYPERLINK = _W + "hyperlink"
+_P = _W + "p"
+_TC = _W + "tc"
+_TR = _W + "tr"
+_TBL = _W + "tbl"
+_VAL = _W + "val"
+_TYPE = _W + "type"
+
+
+class Cell:
+    __slots__ = ("text",)
+
+    def __init__(self, text):
+        self.text = text
+
+
+class Row:
+    __slots__ = ("cells",)
+
+    def __init__(self, cells):
+        self.cells = cells
+
+
+class Table:
+    """一个 w:tbl 表格。行在第一次访问 rows 时才解析，只需要 XML 元素 (element) 时不产生开销。"""
+
+    __slots__ = ("element", "_rows")
+
+    def __init__(self, element):
+        self.element = element
+        self._rows = None
+
+    @property
+    def rows(self):
+        if self._rows is None:
+            self._rows = _read_rows(self.element)
+        return self._rows
+
+
+def _run_text(r):
+    parts = []
+    for e in r:
+        tag = e.tag
+        if tag == _T:
+            parts.append(e.text or "")
+        elif tag == _TAB or tag == _PTAB:
+            parts.append("\t")
+        elif tag == _BR:
+            if e.get(_TYPE, "textWrapping") == "textWrapping":
+                parts.append("\n")
+        elif tag == _CR:
+            parts.append("\n")
+        elif tag == _NO_BREAK_HYPHEN:
+            parts.append("-")
+    return "".join(parts)
+
+
+def _paragraph_text(p):
+    parts = []
+    for child in p:
+        if child.tag == _R:
+            parts.append(_run_text(child))
+        elif child.tag == _HYPERLINK:
+            parts.extend(_run_text(r) for r in child.iterchildren(_R))
+    return "".join(parts)
+
+
+def _cell_text(tc):
+    return "\n".join(_paragraph_text(p) for p in tc.iterchildren(_P))
+
+
+def _int_attr(parent, path, default):
+    el = parent.find(path)
+    if el is None:
+        return default
+    try:
+        return int(el.get(_VAL))
+    except (TypeError, ValueError):
+        return default
+
+
+def _read_rows(tbl):
+    rows = []
+    above = {}  # 上一行: 网格起始列 -> (单元格, 跨列数)，用于解析纵向合并
+    for tr in tbl.iterchildren(_TR):
+        offset = _int_attr(tr, f"{_W}trPr/{_W}gridBefore", 0)
+        cells = []
+        current = {}
+        for tc in tr.iterchildren(_TC):
+            span = _int_attr(tc, f"{_W}tcPr/{_W}gridSpan", 1)
+            v_merge = tc.find(f"{_W}tcPr/{_W}vMerge")
+            if v_merge is not None and v_merge.get(_VAL, "continue") == "continue":
+                # 纵向合并的后续单元格: 内容来自上一行同一列的单元格 (python-docx 同样处理)
+                cell, span = above.get(offset, (Cell(""), span))
+            else:
+                cell = Cell(_cell_text(tc))
+            current[offset] = (cell, span)
+            cells.extend([cell] * span)
+            offset += span
+        above = current
+        rows.append(Row(cells))
+    return rows
+
+
+def _main_document_part(archive):
+    """通过 _rels/.rels 找到主文档部件，默认 word/document.xml。"""
+    try:
+        rels = etree.fromstring(archive.read("_rels/.rels"))
+        for rel in rels.iterchildren(f"{_REL_NS}Relationship"):
+            if rel.get("Type") == _OFFICE_DOCUMENT_REL:
+                return posixpath.normpath(rel.get("Target").lstrip("/"))
+    except KeyError:
+        pass
+    return "word/document.xml"
+
+
+def read_tables(source):
+    """读取 .docx 正文中的所有顶层表格 (与 docx.Document(source).tables 顺序一致)。
+
+    :param source: 文件路径或可读的二进制文件对象。
+    :return: Table 列表。
+    """
+    with zipfile.ZipFile(source) as archive:
+        xml = archive.read(_main_document_part(archive))
+    root = etree.fromstring(xml, parser=etree.XMLParser(huge_tree=True))
+    body = root.find(f"{_W}body")
+    if body is None:
+        return []
+    return [Table(tbl) for tbl in body.iterchildren(_TBL)]
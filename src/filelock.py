@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""基于锁文件的跨进程建议锁 (advisory lock)。
+
+锁文件 <目标>.lock 用 O_CREAT | O_EXCL 原子创建，内容记录持有者的主机、进程号和随机令牌。
+持有期间后台线程定期刷新锁文件的修改时间 (心跳)。以下情况视为过期锁，可以被接管:
+
+* 锁文件超过 stale_after 秒没有心跳 (持有者崩溃、断网等，适用于网络共享盘上的其它主机);
+* 持有者在本机，且进程已不存在。
+
+只有同样使用本模块的程序会遵守该锁；直接用 Excel 打开并保存文件不受保护。
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+
+LOCK_SUFFIX = ".lock"
+DEFAULT_TIMEOUT = 600.0  # 等待锁的最长时间 (秒)
+DEFAULT_STALE_AFTER = 120.0  # 超过此时间没有心跳的锁视为过期
+DEFAULT_HEARTBEAT = 15.0
+DEFAULT_POLL_INTERVAL = 0.2
+
+
+class LockTimeout(TimeoutError):
+    """在超时时间内未能获得锁。"""
+
+
+def lock_path(target_path):
+    return f"{target_path}{LOCK_SUFFIX}"
+
+
+# Windows: OpenProcess 所需权限及 GetExitCodeProcess 对运行中进程返回的退出码
+_PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+_STILL_ACTIVE = 259
+_ERROR_ACCESS_DENIED = 5
+
+
+def _pid_alive_windows(pid):
+    # Windows 上 os.kill(pid, 0) 会向进程组发送 CTRL_C_EVENT，不能用来探测进程
+    import ctypes
+    from ctypes import wintypes
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    kernel32.OpenProcess.argtypes = (wintypes.DWORD, wintypes.BOOL, wintypes.DWORD)
+    kernel32.GetExitCodeProcess.argtypes = (
+        wintypes.HANDLE,
+        ctypes.POINTER(wintypes.DWORD),
+    )
+    kernel32.CloseHandle.argtypes = (wintypes.HANDLE,)
+    handle = kernel32.OpenProcess(_PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        # 拒绝访问说明进程存在 (属于其它用户)；其它错误 (参数无效) 说明进程已不存在
+        return ctypes.get_last_error() == _ERROR_ACCESS_DENIED
+    try:
+        exit_code = wintypes.DWORD()
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code)):
+            return True  # 无法确定时按存活处理，只依靠心跳判断
+        return exit_code.value == _STILL_ACTIVE
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def _pid_alive(pid):
+    if os.name == "nt":
+        return _pid_alive_windows(pid)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True  # 进程存在但属于其它用户，或平台不支持
+    return True
+
+
+class FileLock:
+    """目标文件的锁。可作为上下文管理器使用: with FileLock(path): ..."""
+
+    def __init__(
+        self,
+        target_path,
+        timeout=DEFAULT_TIMEOUT,
+        stale_after=DEFAULT_STALE_AFTER,
+        heartbeat=DEFAULT_HEARTBEAT,
+        poll_interval=DEFAULT_POLL_INTERVAL,
+        logger=None,
+    ):
+        self.path = lock_path(os.fspath(target_path))
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self.heartbeat = heartbeat
+        self.poll_interval = poll_interval
+        self.logger = logger
+        self.token = None
+        self._stop_heartbeat = None
+        self._heartbeat_thread = None
+
+    def _log(self, level, message):
+        if self.logger:
+            self.logger.log(level, message)
+
+    def _read_owner(self, path=None):
+        try:
+            with open(path or self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _is_stale(self):
+        try:
+            age = time.time() - os.path.getmtime(self.path)
+        except FileNotFoundError:
+            return False  # 已被释放，下一轮直接重试创建
+        if age > self.stale_after:
+            return True
+        owner = self._read_owner()
+        if owner and owner.get("host") == socket.gethostname():
+            return not _pid_alive(owner.get("pid", -1))
+        return False
+
+    def _break_stale(self):
+        """把过期锁改名移走。改名是原子的，多个等待者中只有一个会成功。"""
+        owner = self._read_owner()
+        moved = f"{self.path}.stale-{uuid.uuid4().hex}"
+        try:
+            os.rename(self.path, moved)
+        except FileNotFoundError:
+            return
+        stolen = self._read_owner(moved)
+        if owner and stolen and stolen.get("token") != owner.get("token"):
+            # 判断过期后、改名前锁被别人重新获得: 放回去。os.link 在目标已存在时失败，
+            # 不会覆盖期间又创建的锁；无论是否放回，都不能删除这个仍然有效的锁文件
+            try:
+                os.link(moved, self.path)
+            except OSError as e:
+                self._log(
+                    logging.ERROR,
+                    f"Lock '{self.path}' was re-acquired by {stolen} while being broken and "
+                    f"could not be restored ({e}). Its file is left at '{moved}'.",
+                )
+                return
+            try:
+                os.remove(moved)
+            except OSError:
+                pass
+            return
+        self._log(logging.WARNING, f"Removed stale lock '{self.path}' held by {owner}.")
+        try:
+            os.remove(moved)
+        except OSError:
+            pass
+
+    def acquire(self):
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.timeout
+        waited = False
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if self._is_stale():
+                    self._break_stale()
+                    continue
+                if time.monotonic() >= deadline:
+                    raise LockTimeout(
+                        f"Timed out after {self.timeout}s waiting for lock '{self.path}' "
+                        f"held by {self._read_owner()}"
+                    )
+                if not waited:
+                    self._log(
+                        logging.INFO,
+                        f"Waiting for lock '{self.path}' held by {self._read_owner()}.",
+                    )
+                    waited = True
+                time.sleep(self.poll_interval)
+                continue
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "host": socket.gethostname(),
+                        "pid": os.getpid(),
+                        "token": token,
+                        "acquired": time.time(),
+                    },
+                    f,
+                )
+            self.token = token
+            self._start_heartbeat()
+            self._log(logging.INFO, f"Acquired lock '{self.path}'.")
+            return self
+
+    def _start_heartbeat(self):
+        self._stop_heartbeat = threading.Event()
+
+        def beat():
+            while not self._stop_heartbeat.wait(self.heartbeat):
+                try:
+                    os.utime(self.path)
+                except OSError:
+                    pass
+
+        self._heartbeat_thread = threading.Thread(
+            target=beat, name="lock-heartbeat", daemon=True
+        )
+        self._heartbeat_thread.start()
+
+    def release(self):
+        if self.token is None:
+            return
+        self._stop_heartbeat.set()
+        self._heartbeat_thread.join()
+        owner = self._read_owner()
+        if owner and owner.get("token") == self.token:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+        else:
+            # 锁在持有期间被当作过期锁移走了 (例如长时间挂起)，不能删除别人的锁
+            self._log(logging.WARNING, f"Lock '{self.path}' was taken over while held.")
+        self.token = None
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
@@ -7,6 +7,9 @@ import threading
 import os
 from . import converter  # 相对导入
 from . import utils  # 相对导入
+from . import profiling  # 相对导入
+from . import jobqueue  # 相对导入
+from . import docid  # 相对导入
 import logging
 import webbrowser
 
@@ -31,8 +34,8 @@ class App:
         master.title("Word 表格转 Excel 工具")
 
         # 增大窗口尺寸
-        window_width = 650
-        window_height = 400  # 增加高度以容纳 Text 区域
+        window_width = 800
+        window_height = 560  # 增加高度以容纳任务列表和 Text 区域
         screen_width = master.winfo_screenwidth()
         screen_height = master.winfo_screenheight()
         center_x = int(screen_width / 2 - window_width / 2)
@@ -47,10 +50,19 @@ class App:
         # 变量
         self.word_path_var = tk.StringVar()
         self.excel_path_var = tk.StringVar()
+        self.delta_var = tk.BooleanVar(value=False)
+        self.id_enabled_var = tk.BooleanVar(value=False)
+        self.id_pattern_var = tk.StringVar(value=docid.DEFAULT_ID_PATTERN)
+        # 性能分析: 默认由环境变量决定，可用隐藏快捷键 Ctrl+Shift+P 切换
+        self.profile_enabled = profiling.profiling_requested()
         self.log_path = None
         self.output_excel_path = None
+        self.rejects_path = None
+        # 任务队列: 有界并发，同一目标文件的写入自动合并 (见 jobqueue 模块)
+        self.job_queue = jobqueue.JobQueue(on_update=self._on_job_update)
 
         self._create_widgets()
+        master.bind("<Control-P>", self._toggle_profiling)  # Ctrl+Shift+P
         # 初始状态显示在 Text 区域
         self.status_text.config(state=tk.NORMAL)
         self.status_text.delete(1.0, tk.END)
@@ -90,29 +102,73 @@ class App:
         )
         excel_button.grid(row=1, column=2, sticky=tk.E, padx=5, pady=3)
 
-        # --- 转换按钮 --- (单独一行，居中)
+        # --- 转换/预检按钮 --- (单独一行，居中)
+        action_frame = ttk.Frame(main_frame)
+        action_frame.grid(row=1, column=0, pady=10)
         self.convert_button = ttk.Button(
-            main_frame, text="开始转换", command=self._start_conversion
+            action_frame, text="开始转换", command=self._start_conversion
         )
-        self.convert_button.grid(row=1, column=0, pady=10)
+        self.convert_button.pack(side=tk.LEFT, padx=10)
+        self.preflight_button = ttk.Button(
+            action_frame, text="预检 (不写入)", command=self._start_preflight
+        )
+        self.preflight_button.pack(side=tk.LEFT, padx=10)
+        ttk.Checkbutton(
+            action_frame, text="增量转换 (只追加新增/修改的行)", variable=self.delta_var
+        ).pack(side=tk.LEFT, padx=10)
+        ttk.Checkbutton(
+            action_frame, text="自动编号文档 ID:", variable=self.id_enabled_var
+        ).pack(side=tk.LEFT, padx=(10, 2))
+        ttk.Entry(action_frame, textvariable=self.id_pattern_var, width=14).pack(
+            side=tk.LEFT
+        )
+
+        # --- 任务列表 --- (每个任务一行: 状态、进度、速度)
+        job_header = ttk.Frame(main_frame)
+        job_header.grid(row=2, column=0, sticky=(tk.W, tk.E), padx=5)
+        ttk.Label(job_header, text="任务列表:").pack(side=tk.LEFT)
+        ttk.Button(
+            job_header, text="清除已完成", command=self._clear_finished_jobs
+        ).pack(side=tk.RIGHT)
+        columns = ("word", "excel", "status", "progress", "speed")
+        self.job_tree = ttk.Treeview(
+            main_frame, columns=columns, show="headings", height=6, selectmode="browse"
+        )
+        for column, heading, width in (
+            ("word", "Word 文件", 220),
+            ("excel", "目标 Excel", 180),
+            ("status", "状态", 110),
+            ("progress", "进度", 60),
+            ("speed", "速度 (行/秒)", 90),
+        ):
+            self.job_tree.heading(column, text=heading)
+            self.job_tree.column(
+                column, width=width, stretch=column in ("word", "excel")
+            )
+        self.job_tree.grid(
+            row=3, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), padx=5, pady=5
+        )
+        self.job_tree.bind("<<TreeviewSelect>>", self._on_job_selected)
+        self._enable_drag_and_drop()
 
         # --- 状态/结果显示区域 (使用 ScrolledText) ---
         ttk.Label(main_frame, text="状态与结果:").grid(
-            row=2, column=0, sticky=tk.W, padx=5, pady=(10, 0)
+            row=4, column=0, sticky=tk.W, padx=5, pady=(10, 0)
         )
         self.status_text = scrolledtext.ScrolledText(
             main_frame, height=8, wrap=tk.WORD, state=tk.DISABLED
         )
         self.status_text.grid(
-            row=3, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), padx=5, pady=5
+            row=5, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), padx=5, pady=5
         )
-        # 让 Text 区域随窗口缩放
+        # 让任务列表和 Text 区域随窗口缩放
         main_frame.rowconfigure(3, weight=1)
+        main_frame.rowconfigure(5, weight=1)
         main_frame.columnconfigure(0, weight=1)
 
         # --- 底部按钮区域 --- (使用新的 frame)
         bottom_button_frame = ttk.Frame(main_frame)
-        bottom_button_frame.grid(row=4, column=0, pady=10)
+        bottom_button_frame.grid(row=6, column=0, pady=10)
 
         self.open_excel_button = ttk.Button(
             bottom_button_frame,
@@ -138,11 +194,24 @@ class App:
         )
         self.open_log_button.pack(side=tk.LEFT, padx=10)
 
+        self.open_rejects_button = ttk.Button(
+            bottom_button_frame,
+            text="打开问题行报告",
+            command=self._open_rejects,
+            state=tk.DISABLED,
+        )
+        self.open_rejects_button.pack(side=tk.LEFT, padx=10)
+
     def _select_word_file(self):
-        file_path = filedialog.askopenfilename(
-            title="选择 Word 文档",
+        file_paths = filedialog.askopenfilenames(
+            title="选择 Word 文档 (可多选)",
             filetypes=(("Word 文档", "*.docx"), ("所有文件", "*.*")),
         )
+        if len(file_paths) > 1:
+            # 多选时直接加入任务列表
+            self._add_jobs(file_paths)
+            return
+        file_path = file_paths[0] if file_paths else ""
         if file_path:
             self.word_path_var.set(file_path)
             logger.info(f"Word file selected: {file_path}")
@@ -185,63 +254,212 @@ class App:
             logger.error("Start conversion attempt failed: Invalid Excel path.")
             return
 
-        # 禁用按钮
-        self.convert_button.config(state=tk.DISABLED)
-        self.open_excel_button.config(state=tk.DISABLED)
-        self.open_folder_button.config(state=tk.DISABLED)
-        self.open_log_button.config(state=tk.DISABLED)
-        self.log_path = None
+        try:
+            id_pattern = self._selected_id_pattern()
+        except ValueError:
+            return
+
+        # 加入任务队列；按钮保持可用，可以继续添加其它任务
+        self._enqueue(word_path, excel_path, id_pattern)
+        self.status_text.config(state=tk.NORMAL)
+        self.status_text.delete(1.0, tk.END)
+        self.status_text.insert(tk.END, "任务已加入队列，正在处理中...")
+        self.status_text.config(state=tk.DISABLED)
+
+    def _selected_id_pattern(self):
+        """勾选 "自动编号文档 ID" 时返回 ID 格式，否则返回 None。
+
+        格式无效时在状态区显示错误并抛出 ValueError。
+        """
+        if not self.id_enabled_var.get():
+            return None
+        id_pattern = self.id_pattern_var.get().strip()
+        try:
+            docid.compile_pattern(id_pattern)
+        except ValueError as e:
+            self.status_text.config(state=tk.NORMAL)
+            self.status_text.delete(1.0, tk.END)
+            self.status_text.insert(
+                tk.END,
+                f"错误: 文档 ID 格式无效，需要恰好包含一个编号字段 {{n}}，例如 {docid.DEFAULT_ID_PATTERN}",
+            )
+            self.status_text.config(state=tk.DISABLED)
+            logger.error(f"Invalid document ID pattern: {e}")
+            raise
+        return id_pattern
+
+    def _enqueue(self, word_path, excel_path, id_pattern=None):
+        logger.info(f"Queueing conversion job: '{word_path}' -> '{excel_path}'")
+        return self.job_queue.add(
+            word_path,
+            excel_path,
+            delta=self.delta_var.get(),
+            profile=self.profile_enabled,
+            id_pattern=id_pattern,
+        )
 
-        # 更新状态区
+    def _add_jobs(self, word_paths):
+        """批量加入任务。目标为 "Excel 保存为" 中的文件 (所有任务追加到同一文件，写入自动合并)；
+        未指定时每个 Word 文件输出到同目录下的同名 .xlsx。"""
+        try:
+            id_pattern = self._selected_id_pattern()
+        except ValueError:
+            return
+        shared_target = self.excel_path_var.get()
+        added = 0
+        for word_path in word_paths:
+            if not word_path.lower().endswith(".docx") or not os.path.isfile(word_path):
+                logger.warning(f"Ignoring non-docx file: {word_path}")
+                continue
+            excel_path = shared_target or os.path.splitext(word_path)[0] + ".xlsx"
+            self._enqueue(word_path, excel_path, id_pattern)
+            added += 1
         self.status_text.config(state=tk.NORMAL)
         self.status_text.delete(1.0, tk.END)
-        self.status_text.insert(tk.END, "正在处理中，请稍候...")
+        self.status_text.insert(tk.END, f"已加入 {added} 个任务。")
         self.status_text.config(state=tk.DISABLED)
-        logger.info("Starting conversion process in a new thread...")
+
+    def _enable_drag_and_drop(self):
+        """根窗口由 tkinterdnd2 创建时 (可选依赖)，允许把 Word 文件拖到任务列表上。"""
+        if not hasattr(self.master, "drop_target_register"):
+            return
+        try:
+            from tkinterdnd2 import DND_FILES
+
+            self.job_tree.drop_target_register(DND_FILES)
+            self.job_tree.dnd_bind(
+                "<<Drop>>",
+                lambda event: self._add_jobs(self.master.tk.splitlist(event.data)),
+            )
+        except Exception as e:
+            logger.warning(f"Drag and drop is not available: {e}")
+
+    def _on_job_update(self, job):
+        """JobQueue 回调 (可能在工作线程中)，转到主线程刷新任务行。"""
+        try:
+            self.master.after(0, lambda: self._refresh_job_row(job))
+        except (RuntimeError, tk.TclError):
+            pass  # 窗口已关闭
+
+    def _refresh_job_row(self, job):
+        if not self.master.winfo_exists():
+            return
+        status_labels = {
+            jobqueue.STATUS_QUEUED: "排队中",
+            jobqueue.STATUS_RUNNING: "转换中",
+            "success": "成功",
+            "warning": "警告",
+            "error": "失败",
+        }
+        values = (
+            os.path.basename(job.word_path),
+            os.path.basename(job.excel_path),
+            status_labels.get(job.status, job.status),
+            f"{job.progress:.0%}",
+            f"{job.throughput():.0f}" if job.started else "",
+        )
+        item = str(job.id)
+        if self.job_tree.exists(item):
+            self.job_tree.item(item, values=values)
+        else:
+            self.job_tree.insert("", tk.END, iid=item, values=values)
+        if job.done:
+            logger.info(f"Job {job.id} finished with status {job.status}.")
+            # 显示刚结束的任务的结果 (用户选中了其它任务时不打扰)
+            selected = self.job_tree.selection()
+            if not selected or selected[0] == item:
+                self._update_gui_post_conversion(job.result)
+
+    def _on_job_selected(self, event=None):
+        selected = self.job_tree.selection()
+        if not selected:
+            return
+        for job in self.job_queue.jobs:
+            if str(job.id) == selected[0] and job.done:
+                self._update_gui_post_conversion(job.result)
+                break
+
+    def _clear_finished_jobs(self):
+        for job in self.job_queue.remove_finished():
+            if self.job_tree.exists(str(job.id)):
+                self.job_tree.delete(str(job.id))
+
+    def _toggle_profiling(self, event=None):
+        """隐藏开关: 开启/关闭对之后转换的性能分析。"""
+        self.profile_enabled = not self.profile_enabled
+        state = "已开启" if self.profile_enabled else "已关闭"
+        self.status_text.config(state=tk.NORMAL)
+        self.status_text.delete(1.0, tk.END)
+        self.status_text.insert(
+            tk.END,
+            f"性能分析{state}。分析文件将保存在日志文件旁边 (*_profile.*)。"
+            "多个任务同时运行时内存统计包含其它任务，需要准确的内存数据时请一次只转换一个文档。",
+        )
+        self.status_text.config(state=tk.DISABLED)
+        logger.info(f"Profiling toggled: {self.profile_enabled}")
+
+    def _start_preflight(self):
+        word_path = self.word_path_var.get()
+        if not word_path or not os.path.exists(word_path):
+            self.status_text.config(state=tk.NORMAL)
+            self.status_text.delete(1.0, tk.END)
+            self.status_text.insert(tk.END, "错误: 请选择有效的 Word 文件路径！")
+            self.status_text.config(state=tk.DISABLED)
+            logger.error("Start preflight attempt failed: Invalid Word path.")
+            return
+
+        self.preflight_button.config(state=tk.DISABLED)
+        self.status_text.config(state=tk.NORMAL)
+        self.status_text.delete(1.0, tk.END)
+        self.status_text.insert(tk.END, "正在预检，请稍候...")
+        self.status_text.config(state=tk.DISABLED)
+        logger.info("Starting preflight in a new thread...")
 
         thread = threading.Thread(
-            target=self._run_conversion_thread,
-            args=(word_path, excel_path),
-            daemon=True,
+            target=self._run_preflight_thread, args=(word_path,), daemon=True
         )
         thread.start()
 
-    def _run_conversion_thread(self, word_path, excel_path):
-        """在后台线程中执行转换逻辑。"""
-        result = None
-        converter_instance = None  # 初始化
+    def _run_preflight_thread(self, word_path):
+        """在后台线程中执行预检，不写入任何 Excel 文件。"""
         try:
-            converter_instance = converter.DocConverter(word_path, excel_path)
-            result = converter_instance.convert()
-            logger.info("Conversion thread finished.")
+            result = converter.DocConverter(word_path, None).preflight()
         except Exception as e:
-            error_message = f"转换过程中发生意外错误: {e}"
-            logger.error(error_message, exc_info=True)
-            result = {
-                "status": "error",
-                "message": error_message,
-                "success": 0,
-                "errors": 0,
-                "skipped_empty": 0,
-                "excel_path": excel_path,
-                # 尝试获取日志路径，即使出错也可能需要
-                "log_path": (
-                    getattr(converter_instance, "log_path", None)
-                    if converter_instance
-                    else None
-                ),
-            }
+            logger.error(f"Preflight failed unexpectedly: {e}", exc_info=True)
+            result = {"status": "error", "message": f"预检过程中发生意外错误: {e}"}
         if self.master.winfo_exists():
-            self.master.after(0, lambda: self._update_gui_post_conversion(result))
+            self.master.after(0, lambda: self._update_gui_post_preflight(result))
+
+    def _update_gui_post_preflight(self, result):
+        """在主线程中显示预检结果 (含每个表格的明细)。"""
+        if not self.master.winfo_exists():
+            return
+        self.preflight_button.config(state=tk.NORMAL)
+
+        lines = [f"预检: {result.get('message', '发生未知错误')}"]
+        for table in result.get("tables", []):
+            if not table["matched"]:
+                lines.append(f"  表格 {table['table']}: 表头不匹配，跳过")
+                continue
+            issues = ", ".join(f"{k} {v}" for k, v in sorted(table["issues"].items()))
+            lines.append(
+                f"  表格 {table['table']}: 将写入 {table['written']} 行, 空行 {table['empty'] + table['empty_after_processing']}, "
+                f"失败 {table['errors']}" + (f", 问题: {issues}" if issues else "")
+            )
+        self.status_text.config(state=tk.NORMAL)
+        self.status_text.delete(1.0, tk.END)
+        self.status_text.insert(tk.END, "\n".join(lines))
+        self.status_text.config(state=tk.DISABLED)
+        logger.info(f"Preflight finished. Status: {result.get('status')}")
 
     def _update_gui_post_conversion(self, result):
         """在主线程中根据转换结果更新 GUI。"""
         if not self.master.winfo_exists():
-            logger.warning("GUI window closed before conversion result could be displayed.")
+            logger.warning(
+                "GUI window closed before conversion result could be displayed."
+            )
             return
 
-        self.convert_button.config(state=tk.NORMAL)
-
         # 准备状态消息
         status_message = result.get("message", "发生未知错误")
         success_count = result.get("success", 0)
@@ -254,6 +472,26 @@ class App:
             f"状态: {status_message}\n"
             f"(成功: {success_count}, 失败: {error_count}, 跳过空行: {total_skipped})"
         )
+        shards = result.get("shards") or []
+        if len(shards) > 1:
+            final_status += f"\n输出分片 ({len(shards)} 个):"
+            for shard in shards:
+                final_status += (
+                    f"\n  {os.path.basename(shard['path'])} [{shard['sheet']}]: {shard['rows']} 行"
+                )
+        reject_counts = result.get("reject_counts")
+        if reject_counts:
+            # 按原因列出问题行，便于直接回到源文档修改
+            final_status += "\n问题行:"
+            for code, count in sorted(reject_counts.items(), key=lambda item: -item[1]):
+                final_status += f"\n  {converter.ISSUE_DESCRIPTIONS.get(code, code)}: {count} 行"
+            if result.get("rejects_path"):
+                final_status += f"\n  明细: {os.path.basename(result['rejects_path'])}"
+        profile_paths = result.get("profile_paths")
+        if profile_paths:
+            final_status += "\n性能分析文件: " + ", ".join(
+                os.path.basename(path) for path in profile_paths.values()
+            )
 
         # 将状态消息写入 Text 区域
         self.status_text.config(state=tk.NORMAL)
@@ -264,6 +502,7 @@ class App:
         # 更新 internal state
         self.log_path = result.get("log_path")
         self.output_excel_path = result.get("excel_path")
+        self.rejects_path = result.get("rejects_path")
 
         # 更新按钮状态
         # 移除所有 messagebox 调用
@@ -288,6 +527,10 @@ class App:
             self.open_log_button.config(state=tk.NORMAL)
         else:
             self.open_log_button.config(state=tk.DISABLED)
+        if self.rejects_path and os.path.exists(self.rejects_path):
+            self.open_rejects_button.config(state=tk.NORMAL)
+        else:
+            self.open_rejects_button.config(state=tk.DISABLED)
 
     def _open_generic(self, path, file_type="文件"):
         """通用打开文件或文件夹的方法。"""
@@ -332,8 +575,13 @@ class App:
     def _open_log(self):
         self._open_generic(self.log_path, "日志文件")
 
+    def _open_rejects(self):
+        self._open_generic(self.rejects_path, "问题行报告")
+
     def run(self):
         self.master.mainloop()
+        # 窗口关闭后不再启动新任务；正在写入的任务会完成后再退出
+        self.job_queue.shutdown(wait=False)
 
 
 # 主程序块 (如果需要直接运行 GUI 测试)
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""GUI 使用的转换任务队列。
+
+任务在有界线程池中并发执行。目标为同一个 Excel 文件的任务也可以同时读取 Word 文档：
+写入由 DocConverter 通过文件锁串行，并把同时等待的写入合并为一次保存 (见 coalesce 模块)，
+不会互相覆盖。本模块不依赖 tkinter，状态变化通过 on_update 回调通知
+(回调在工作线程或调用 add() 的线程中执行)。
+
+排队中的任务的 Word 文档会在后台按顺序预读 (见 prefetch 模块)，轮到它们时不必再等网络读取。
+"""
+
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import converter
+from . import prefetch
+
+DEFAULT_MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+STATUS_QUEUED = "queued"  # 等待空闲的工作线程
+STATUS_RUNNING = "running"
+# 结束状态与 convert() 结果的 status 一致: "success" / "warning" / "error"
+
+_job_ids = itertools.count(1)
+
+
+class ConversionJob:
+    def __init__(self, word_path, excel_path, options):
+        self.id = next(_job_ids)
+        self.word_path = word_path
+        self.excel_path = excel_path
+        self.options = options
+        self.status = STATUS_QUEUED
+        self.progress = 0.0  # 0.0 - 1.0
+        self.rows_done = 0
+        self.started = None
+        self.finished = None
+        self.result = None
+
+    @property
+    def done(self):
+        return self.finished is not None
+
+    def throughput(self):
+        """已处理行数 / 已用时间 (行/秒)，尚未开始时为 0。"""
+        if self.started is None:
+            return 0.0
+        elapsed = (self.finished or time.monotonic()) - self.started
+        return self.rows_done / elapsed if elapsed > 0 else 0.0
+
+
+class JobQueue:
+    """有界并发的转换队列，任务按加入顺序开始。"""
+
+    def __init__(
+        self,
+        max_workers=DEFAULT_MAX_WORKERS,
+        on_update=None,
+        prefetch_depth=prefetch.DEFAULT_DEPTH,
+        memory_budget=prefetch.DEFAULT_MEMORY_BUDGET,
+    ):
+        """
+        :param prefetch_depth: 在后台预读的排队任务文档数，0 表示不预读。
+        :param memory_budget: 预读内容的总字节数上限。
+        """
+        self.max_workers = max(1, max_workers)
+        self.on_update = on_update
+        self.jobs = []  # 按加入顺序
+        self._running = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="docConverter-job"
+        )
+        self._prefetcher = None
+        if prefetch_depth > 0:
+            self._prefetcher = prefetch.Prefetcher(prefetch_depth, memory_budget)
+
+    def add(self, word_path, excel_path, **options):
+        """加入一个任务并尽快开始。options 传给 DocConverter (如 delta, profile)。"""
+        job = ConversionJob(word_path, excel_path, options)
+        with self._lock:
+            self.jobs.append(job)
+        if self._prefetcher is not None:
+            self._prefetcher.schedule([word_path])
+        self._notify(job)
+        self._schedule()
+        return job
+
+    def remove_finished(self):
+        """从列表中移除已结束的任务，返回被移除的任务。"""
+        with self._lock:
+            removed = [job for job in self.jobs if job.done]
+            self.jobs = [job for job in self.jobs if not job.done]
+        return removed
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        if self._prefetcher is not None:
+            self._prefetcher.close()
+
+    def _notify(self, job):
+        if self.on_update is not None:
+            self.on_update(job)
+
+    def _schedule(self):
+        """按加入顺序启动等待中的任务，直到占满工作线程。"""
+        started = []
+        with self._lock:
+            for job in self.jobs:
+                if self._running >= self.max_workers:
+                    break
+                if job.status != STATUS_QUEUED:
+                    continue
+                self._running += 1
+                job.status = STATUS_RUNNING
+                job.started = time.monotonic()
+                started.append(job)
+        for job in started:
+            self._notify(job)
+            self._executor.submit(self._run, job)
+
+    def _on_progress(self, job, event):
+        kind = event["event"]
+        if kind == "table":
+            # 读取和处理约占总时间的 90%，剩余为写入 Excel
+            job.progress = 0.9 * event["table"] / max(event["tables"], 1)
+            job.rows_done = event["rows_done"]
+        elif kind == "writing":
+            job.progress = max(job.progress, 0.9)
+        elif kind == "saved":
+            job.progress = 1.0
+            job.rows_done = event["rows"]
+        else:
+            return
+        self._notify(job)
+
+    def _run(self, job):
+        try:
+            job.result = converter.DocConverter(
+                job.word_path,
+                job.excel_path,
+                progress_callback=lambda event: self._on_progress(job, event),
+                prefetcher=self._prefetcher,
+                **job.options,
+            ).convert()
+        except Exception as e:
+            job.result = {
+                "status": "error",
+                "message": f"转换过程中发生意外错误: {e}",
+                "success": 0,
+                "errors": 0,
+                "total_skipped_rows": 0,
+                "excel_path": job.excel_path,
+                "log_path": None,
+            }
+        if self._prefetcher is not None:
+            self._prefetcher.discard(job.word_path)  # 未读取文档就结束的任务
+        job.rows_done = job.result.get("success", job.rows_done)
+        job.status = job.result.get("status", "error")
+        job.finished = time.monotonic()
+        with self._lock:
+            self._running -= 1
+        self._notify(job)
+        self._schedule()
@@ -1,26 +1,40 @@
+import itertools
 import logging
 import os
 
 DEFAULT_LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
 DEFAULT_LOG_LEVEL = logging.INFO
+APP_LOGGER_NAME = "docConverterApp"
 
+_job_ids = itertools.count(1)
 
-def setup_logging(log_file_path):
-    """配置日志记录器
+
+def new_job_id():
+    """生成进程内唯一的任务 ID。"""
+    return f"{os.getpid()}-{next(_job_ids)}"
+
+
+def setup_logging(log_file_path, job_id=None):
+    """为一次转换配置独立的日志记录器
+
+    每次调用返回一个子 logger (docConverterApp.job.<job_id>)，拥有自己的 FileHandler，
+    因此同一进程中并发的多个转换各自写入自己的日志文件。用完后需调用 close_logging。
 
     Args:
         log_file_path (str): 日志文件的完整路径。
+        job_id (str): 任务 ID，默认自动生成。
     """
     log_dir = os.path.dirname(log_file_path)
     if log_dir and not os.path.exists(log_dir):
-        os.makedirs(log_dir)  # 确保日志目录存在
+        os.makedirs(log_dir, exist_ok=True)  # 确保日志目录存在
 
-    # 获取或创建 logger
-    # 使用特定的名字，避免直接修改 root logger，除非确实需要
-    logger = logging.getLogger("docConverterApp")
+    # 每个任务一个子 logger，避免修改 root logger 或共享的 docConverterApp logger
+    if job_id is None:
+        job_id = new_job_id()
+    logger = logging.getLogger(f"{APP_LOGGER_NAME}.job.{job_id}")
     logger.setLevel(DEFAULT_LOG_LEVEL)
 
-    # 防止重复添加 handler (如果此函数可能被多次调用)
+    # 防止重复添加 handler (同一个 job_id 被重复调用时)
     if not logger.handlers:
         # 创建 FileHandler
         # 使用追加模式 'a'，编码为 utf-8
@@ -43,6 +57,19 @@ def setup_logging(log_file_path):
     return logger
 
 
+def close_logging(logger):
+    """关闭并移除 setup_logging 创建的 handler，并从 logging 的注册表中删除该子 logger。"""
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        try:
+            handler.close()
+        except Exception:
+            pass
+    # logging.getLogger 创建的 logger 会被永久缓存，按任务创建时需要手动释放
+    if logger.name.startswith(f"{APP_LOGGER_NAME}.job."):
+        logging.Logger.manager.loggerDict.pop(logger.name, None)
+
+
 if __name__ == "__main__":
     # 测试日志配置
     test_log_file = "test_app.log"
@@ -52,6 +79,7 @@ if __name__ == "__main__":
     logger.warning("这是 WARNING 级别的测试日志。")
     logger.error("这是 ERROR 级别的测试日志。")
     print(f"测试日志已写入 {test_log_file}")
+    close_logging(logger)
 
     # 清理测试文件
     # import time
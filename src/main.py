@@ -1,3 +1,5 @@
+import argparse
+import os
 import tkinter as tk
 
 # 确保 gui 在 src 目录下，并且 Python 可以找到它
@@ -5,10 +7,26 @@ import tkinter as tk
 # 或者使用相对导入 (如果作为包运行)
 # 为了简单起见，假设从根目录运行或者 src 在 PYTHONPATH
 from src.gui import App
+from src.profiling import PROFILE_ENV_VAR
 
 if __name__ == "__main__":
-    # 创建 Tkinter 根窗口
-    root = tk.Tk()
+    parser = argparse.ArgumentParser(description="Word 表格转 Excel 工具")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="对每次转换做性能分析，结果保存在日志文件旁边",
+    )
+    args = parser.parse_args()
+    if args.profile:
+        os.environ[PROFILE_ENV_VAR] = "1"
+
+    # 创建 Tkinter 根窗口 (安装了 tkinterdnd2 时支持把 Word 文件拖到任务列表上)
+    try:
+        from tkinterdnd2 import TkinterDnD
+
+        root = TkinterDnD.Tk()
+    except ImportError:
+        root = tk.Tk()
     # 创建应用程序实例
     app = App(root)
     # 运行应用程序主循环
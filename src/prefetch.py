@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Word 文档的预读输入层。
+
+源文档通常放在 SMB 共享盘上，而 zipfile (python-docx 和 docx_reader 都用它) 会按需 seek/read
+中央目录和各个部件，经过网络就是大量小的随机读。因此在交给解析器之前先把整个文件取到本地:
+
+* 网络路径 (UNC 路径、映射的网络驱动器、CIFS/NFS 等挂载) 用一次大的顺序读读入内存;
+* 本地文件用 mmap 映射，不复制数据，并提示内核提前读入 (MADV_WILLNEED)。
+
+批量处理时 Prefetcher 在后台线程中按顺序预读接下来的 N 个文件，当前文件处理的同时下一个文件
+已经在读；已预读的文件总大小受内存预算限制。
+"""
+
+import io
+import mmap
+import os
+import threading
+import time
+from collections import deque
+
+DEFAULT_DEPTH = 2  # 最多提前读入的文件数
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024  # 已预读文件的总字节数上限
+# 视为网络文件系统的挂载类型 (Linux / macOS)
+NETWORK_FS_TYPES = {
+    "cifs",
+    "smb3",
+    "smbfs",
+    "nfs",
+    "nfs4",
+    "afs",
+    "9p",
+    "davfs",
+    "fuse.sshfs",
+    "fuse.rclone",
+}
+_DRIVE_REMOTE = 4  # GetDriveTypeW 的返回值
+
+
+def _mount_fs_type(path):
+    """返回 path 所在挂载点的文件系统类型 (读取 /proc/self/mounts)，无法判断时返回 None。"""
+    try:
+        with open("/proc/self/mounts", "r", encoding="utf-8") as f:
+            mounts = [line.split()[1:3] for line in f if line.strip()]
+    except OSError:
+        return None
+    path = os.path.realpath(path)
+    best, fs_type = "", None
+    for mount_point, mount_type in mounts:
+        mount_point = mount_point.replace("\\040", " ")
+        prefix = mount_point.rstrip("/") + "/"
+        if (path == mount_point or path.startswith(prefix)) and len(mount_point) > len(
+            best
+        ):
+            best, fs_type = mount_point, mount_type
+    return fs_type
+
+
+def is_network_path(path):
+    """粗略判断文件是否位于网络共享上。"""
+    path = os.path.abspath(os.fspath(path))
+    if os.name == "nt":
+        if path.startswith("\\\\"):
+            return True  # UNC 路径
+        drive = os.path.splitdrive(path)[0]
+        if not drive:
+            return False
+        import ctypes
+
+        return ctypes.windll.kernel32.GetDriveTypeW(drive + "\\") == _DRIVE_REMOTE
+    return _mount_fs_type(path) in NETWORK_FS_TYPES
+
+
+class _MappedFile:
+    """mmap 的文件对象包装: mmap 本身有 read/seek/tell，但缺少 zipfile 需要的 seekable()。"""
+
+    def __init__(self, mapped):
+        self._mapped = mapped
+
+    def seekable(self):
+        return True
+
+    def readable(self):
+        return True
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        try:
+            self._mapped.seek(offset, whence)
+        except ValueError as e:
+            # 普通文件越界 seek 抛出 OSError，zipfile 依此判断文件不是 zip
+            raise OSError(str(e)) from e
+        return self._mapped.tell()
+
+    def __getattr__(self, name):
+        return getattr(self._mapped, name)
+
+
+class Source:
+    """已读入内存 (或已映射) 的文档内容。可作为上下文管理器使用，退出时释放映射。"""
+
+    def __init__(self, path, data, method, seconds):
+        self.path = path
+        self.data = data  # bytes 或 mmap
+        self.size = len(data)
+        self.method = method  # "read" / "mmap"
+        self.seconds = seconds
+
+    def open(self):
+        """返回可交给 zipfile / python-docx 的二进制流 (不复制数据)。"""
+        if isinstance(self.data, mmap.mmap):
+            self.data.seek(0)
+            return _MappedFile(self.data)
+        return io.BytesIO(self.data)
+
+    def describe(self):
+        how = (
+            "memory-mapped" if self.method == "mmap" else "read in one sequential read"
+        )
+        return f"{self.size} bytes, {how} in {self.seconds:.3f}s"
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.data = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def load(path, network=None):
+    """把文档整个取到本地。
+
+    :param path: 文档路径。
+    :param network: 是否按网络文件处理；None 时由 is_network_path 判断。
+    :raises FileNotFoundError / OSError: 文件无法读取。
+    """
+    path = os.fspath(path)
+    if network is None:
+        network = is_network_path(path)
+    start = time.perf_counter()
+    with open(path, "rb", buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        if not network and size > 0:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if hasattr(data, "madvise") and hasattr(mmap, "MADV_WILLNEED"):
+                data.madvise(mmap.MADV_WILLNEED)
+            return Source(path, data, "mmap", time.perf_counter() - start)
+        # FileIO.readall 按文件大小一次请求整个文件 (底层分几次返回时继续读)，
+        # 返回的 bytes 交给 BytesIO 时不会再复制
+        data = f.read()
+    return Source(path, data, "read", time.perf_counter() - start)
+
+
+def _key(path):
+    return os.path.normcase(os.path.abspath(os.fspath(path)))
+
+
+class Prefetcher:
+    """按顺序在后台预读文档。take() 取走已预读的内容，未预读到的文件由调用方自己 load()。"""
+
+    def __init__(
+        self, depth=DEFAULT_DEPTH, memory_budget=DEFAULT_MEMORY_BUDGET, logger=None
+    ):
+        """
+        :param depth: 最多提前读入的文件数 (不含正在处理的文件)。
+        :param memory_budget: 已预读文件的总字节数上限；单个文件超过预算时只在没有其它预读内容时读入。
+        """
+        self.depth = max(1, depth)
+        self.memory_budget = memory_budget
+        self.logger = logger
+        self._cond = threading.Condition()
+        self._queue = deque()  # 等待预读的键
+        self._paths = {}  # 键 -> 原始路径
+        self._ready = {}  # 键 -> Source
+        self._loading = None
+        self._bytes = 0
+        self._thread = None
+
+    def schedule(self, paths):
+        """按给定顺序加入预读队列 (已在队列中或已读入的文件忽略)。"""
+        with self._cond:
+            for path in paths:
+                key = _key(path)
+                if key in self._paths:
+                    continue
+                self._paths[key] = path
+                self._queue.append(key)
+            if self._queue and self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="docConverter-prefetch", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify_all()
+
+    def take(self, path):
+        """取走 path 的预读内容；正在读时等待其完成。尚未开始预读时从队列中移除并返回 None。"""
+        key = _key(path)
+        with self._cond:
+            while self._loading == key:
+                self._cond.wait()
+            source = self._ready.pop(key, None)
+            if source is not None:
+                self._bytes -= source.size
+            elif key in self._queue:
+                self._queue.remove(key)
+            self._paths.pop(key, None)
+            self._cond.notify_all()
+            return source
+
+    def discard(self, path):
+        """放弃 path 的预读内容 (例如任务在读取文档之前就失败了)。"""
+        source = self.take(path)
+        if source is not None:
+            source.close()
+
+    def close(self):
+        """清空队列并释放所有已预读的内容。"""
+        with self._cond:
+            self._queue.clear()
+            sources = list(self._ready.values())
+            self._ready.clear()
+            self._paths.clear()
+            self._bytes = 0
+            self._cond.notify_all()
+        for source in sources:
+            source.close()
+
+    def _has_room(self, size):
+        if len(self._ready) >= self.depth:
+            return False
+        return self._bytes == 0 or self._bytes + size <= self.memory_budget
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._queue:
+                    self._thread = None  # 之后的 schedule() 会启动新线程
+                    return
+                key = self._queue[0]
+            try:
+                size = os.path.getsize(self._paths.get(key, key))
+            except OSError:
+                size = 0  # 交给 load() 报告错误
+            with self._cond:
+                if not self._queue or self._queue[0] != key:
+                    continue  # 等待 stat 期间被取走
+                if not self._has_room(size):
+                    self._cond.wait()
+                    continue
+                self._queue.popleft()
+                path = self._paths[key]
+                self._loading = key
+            source = None
+            try:
+                source = load(path)
+            except OSError as e:
+                if self.logger:
+                    self.logger.warning(f"Prefetch of '{path}' failed: {e}")
+            with self._cond:
+                self._loading = None
+                if source is not None and key in self._paths:
+                    self._ready[key] = source
+                    self._bytes += source.size
+                    source = None
+                self._cond.notify_all()
+            if source is not None:
+                source.close()  # 预读期间已被放弃
@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""可选的转换性能分析。
+
+开启后 (DocConverter(profile=True)、环境变量 DOCCONVERTER_PROFILE=1、命令行 --profile
+或 GUI 中的隐藏开关 Ctrl+Shift+P)，一次转换会同时:
+
+* 用 cProfile 记录调用统计，保存为 <name>_profile.pstats (可用 pstats / snakeviz 查看);
+* 用后台线程定时采样转换线程 (以及本次转换登记的流水线读取线程) 的调用栈，保存为折叠栈文件
+  <name>_profile.collapsed (每行 "栈;帧;帧 次数"，可直接交给 flamegraph.pl / speedscope);
+* 用 tracemalloc 记录内存分配，保存转换结束时的快照 <name>_profile.tracemalloc，并把峰值和前几名写入日志。
+
+分析本身有开销 (主要来自 tracemalloc)，开启后转换会明显变慢，只用于诊断。
+
+同一进程中可以同时分析多个转换 (GUI 的任务队列并发执行任务)。栈采样只针对各自的线程，互不干扰；
+cProfile 同一时间只给一个转换使用 (Python 3.12 起同时启用第二个 Profile 会抛出 ValueError)，
+其它同时进行的转换只做栈采样和 tracemalloc，不生成 .pstats (日志中会注明)。
+tracemalloc 是整个进程共享的: 由第一个开始的分析启动、最后一个结束的分析停止，
+有其它分析同时进行时不重置峰值，此时内存峰值和快照包含同时运行的其它任务的分配 (日志中会注明)。
+需要准确的内存数据时，应一次只运行一个任务。
+
+文件与 _conversion.log 放在同一目录，方便用户把整个目录发回来离线分析。
+"""
+
+import collections
+import cProfile
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+PROFILE_ENV_VAR = "DOCCONVERTER_PROFILE"
+DEFAULT_SAMPLE_INTERVAL = 0.005  # 采样间隔 (秒)
+# tracemalloc 每次分配只记录 1 层调用栈: 按行统计已足够，10 层时转换会慢约 30 倍 (1 层约 4 倍)
+TRACEMALLOC_FRAMES = 1
+TOP_ALLOCATIONS = 10
+
+# 正在进行的分析共享 tracemalloc
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_owned = False  # tracemalloc 是否由本模块启动 (外部启动的不停止)
+
+# 同一时间只有一个分析启用 cProfile
+_cprofile_slot = threading.Lock()
+
+
+def _acquire_tracemalloc():
+    """登记一个分析，返回开始时是否有其它分析在进行。"""
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        shared = _tracemalloc_users > 0
+        if not shared:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                _tracemalloc_owned = True
+            # reset_peak 需要 Python 3.9+；更早的版本中峰值从 tracemalloc 启动时算起
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+        _tracemalloc_users += 1
+        return shared
+
+
+def _release_tracemalloc():
+    """取快照和峰值后注销；最后一个分析结束时停止由本模块启动的 tracemalloc。
+
+    :return: (快照, 当前内存, 峰值, 结束时是否有其它分析在进行)。
+    """
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        _tracemalloc_users -= 1
+        shared = _tracemalloc_users > 0
+        if not shared and _tracemalloc_owned:
+            tracemalloc.stop()
+            _tracemalloc_owned = False
+        return snapshot, current, peak, shared
+
+
+def _enable_cprofile():
+    """取得 cProfile 的使用权并启用，返回 Profile；已有其它分析在使用时返回 None。"""
+    if not _cprofile_slot.acquire(blocking=False):
+        return None
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # 进程中已有其它性能分析工具 (Python 3.12+ 的 sys.monitoring 只允许一个)
+        _cprofile_slot.release()
+        return None
+    except BaseException:
+        _cprofile_slot.release()
+        raise
+    return profile
+
+
+def _disable_cprofile(profile):
+    try:
+        profile.disable()
+    finally:
+        _cprofile_slot.release()
+
+
+def profiling_requested(flag=None):
+    """flag 为 None 时根据环境变量 DOCCONVERTER_PROFILE 决定是否开启。"""
+    if flag is not None:
+        return bool(flag)
+    return os.environ.get(PROFILE_ENV_VAR, "").strip().lower() in (
+        "1",
+        "true",
+        "yes",
+        "on",
+    )
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return (
+        f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    )
+
+
+def _collapse(frame):
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return ";".join(labels)
+
+
+class _StackSampler(threading.Thread):
+    """定时读取 sys._current_frames()，统计折叠后的调用栈出现次数。
+
+    只采样登记过的线程 (发起转换的线程和 add_thread() 加入的线程)，
+    同时进行的其它转换的工作线程不会混入。
+    """
+
+    def __init__(self, target_thread, interval):
+        super().__init__(name="profiler-sampler", daemon=True)
+        self.interval = interval
+        self.counts = collections.Counter()
+        self.samples = 0
+        self._threads = {target_thread.ident: target_thread.name}
+        self._stop_event = threading.Event()
+
+    def add_thread(self, thread):
+        # 整体替换字典，采样线程读取时不需要加锁
+        self._threads = {**self._threads, thread.ident: thread.name}
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            names = self._threads
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id in names:
+                    self.counts[f"{names[thread_id]};{_collapse(frame)}"] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class ConversionProfiler:
+    """在 start()/stop() 之间对当前线程执行 cProfile、栈采样和 tracemalloc。
+
+    start() 中途失败时撤销已经开始的部分，不会留下 cProfile、tracemalloc 登记或采样线程。
+    """
+
+    def __init__(self, base_path, logger, sample_interval=DEFAULT_SAMPLE_INTERVAL):
+        """
+        :param base_path: 输出文件的路径前缀，如 /data/out_profile (会追加 .pstats 等扩展名)。
+        :param logger: 用于记录摘要的日志记录器。
+        :param sample_interval: 栈采样间隔 (秒)。
+        """
+        self.base_path = base_path
+        self.logger = logger
+        self.sample_interval = sample_interval
+        self.paths = {}
+        self._profile = None
+        self._sampler = None
+        self._shared = False  # 分析期间是否有其它分析同时进行
+        self._started = None
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._profile = _enable_cprofile()
+        try:
+            self._shared = _acquire_tracemalloc()
+            try:
+                self._sampler = _StackSampler(
+                    threading.current_thread(), self.sample_interval
+                )
+                self._sampler.start()
+            except BaseException:
+                _release_tracemalloc()
+                raise
+        except BaseException:
+            if self._profile is not None:
+                _disable_cprofile(self._profile)
+                self._profile = None
+            raise
+        if self._profile is None:
+            self.logger.warning(
+                "cProfile skipped: another profiled conversion is using it. "
+                "This job records stack samples and tracemalloc only."
+            )
+
+    def add_thread(self, thread):
+        """把本次转换启动的其它线程 (如流水线读取线程) 加入栈采样。"""
+        if self._sampler is not None:
+            self._sampler.add_thread(thread)
+
+    def stop(self):
+        """停止分析并写出文件，返回 {"pstats": ..., "collapsed": ..., "tracemalloc": ...}。
+
+        本次没有使用 cProfile 时 (见 start()) 不含 "pstats"。
+        """
+        profile, self._profile = self._profile, None
+        if profile is not None:
+            _disable_cprofile(profile)
+        elapsed = time.perf_counter() - self._started
+        self._sampler.stop()
+        snapshot, current, peak, shared = _release_tracemalloc()
+        self._shared = self._shared or shared
+
+        self.paths = {}
+        if profile is not None:
+            self.paths["pstats"] = f"{self.base_path}.pstats"
+            profile.dump_stats(self.paths["pstats"])
+        self.paths["collapsed"] = f"{self.base_path}.collapsed"
+        self.paths["tracemalloc"] = f"{self.base_path}.tracemalloc"
+        with open(self.paths["collapsed"], "w", encoding="utf-8") as f:
+            for stack, count in self._sampler.counts.most_common():
+                f.write(f"{stack} {count}\n")
+        snapshot.dump(self.paths["tracemalloc"])
+
+        self.logger.info(
+            f"Profiling finished: {elapsed:.2f}s wall time, {self._sampler.samples} stack samples, "
+            f"peak traced memory {peak / 1024 / 1024:.1f} MiB (current {current / 1024 / 1024:.1f} MiB)."
+        )
+        if self._shared:
+            self.logger.warning(
+                "Other profiled conversions ran at the same time: the memory peak and "
+                "allocation snapshot include their allocations. Run one job at a time for exact memory figures."
+            )
+        for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]:
+            self.logger.info(f"Top allocation: {stat}")
+        self.logger.info(
+            "Profile files: " + ", ".join(f"{k}={v}" for k, v in self.paths.items())
+        )
+        return self.paths
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""问题行报告 (<Excel 名>_<源文档名>_rejects.xlsx 或 .csv)。
+
+转换时处理失败、交接日期无法解析或为空、单元格数与表头不符 (已补空/截断) 的每一个 Word 行
+(只限写入或处理失败的行，处理后为空而跳过的行不算) 记录一条: 表格序号、原始行号、原因代码及说明、原始单元格文本。操作人员据此直接定位并修改源文档，
+而不必在几十万行的日志中搜索警告。
+
+记录按批 (REJECTS_BATCH_ROWS 行) 以 CSV 形式写入 SpooledTemporaryFile: 数据量小时完全在内存中，
+超过 REJECTS_MEMORY_BYTES 后自动转存到临时文件，因此内存占用有上限。报告在转换结束时一次性生成。
+"""
+
+import csv
+import os
+import tempfile
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+FORMATS = ("xlsx", "csv")
+REJECTS_BATCH_ROWS = 1000
+REJECTS_MEMORY_BYTES = 8 * 1024 * 1024
+_FIXED_HEADERS = ["表格", "行号", "原因", "说明"]
+
+
+def report_path(excel_path, word_label, fmt):
+    """报告路径: Excel 所在目录下的 <Excel 名>_<源文档名>_rejects.<fmt>。
+
+    同时包含目标和源文档的名称: 多个文档追加到同一总表时各有一份报告，同一文档转换到同一目录下
+    的不同目标时也不会互相覆盖 (或被另一目标的转换当作旧报告删除)。
+    """
+    directory = os.path.dirname(excel_path)
+    excel_stem = os.path.splitext(os.path.basename(excel_path))[0]
+    word_stem = os.path.splitext(os.path.basename(word_label))[0]
+    if not word_stem or word_stem.startswith("<"):
+        # 源文档不是文件 (bytes/流)，只用 Excel 文件名
+        return os.path.join(directory, f"{excel_stem}_rejects.{fmt}")
+    return os.path.join(directory, f"{excel_stem}_{word_stem}_rejects.{fmt}")
+
+
+class RejectsReport:
+    """收集问题行，结束时写出报告。"""
+
+    def __init__(self, cell_headers, descriptions=None):
+        """
+        :param cell_headers: 原始单元格列的表头 (Word 表头)；多出的单元格列命名为 "额外列 N"。
+        :param descriptions: 原因代码 -> 说明。
+        """
+        self.cell_headers = list(cell_headers)
+        self.descriptions = descriptions or {}
+        self.counts = {}  # 原因代码 -> 行数
+        self.rows = 0
+        self._max_cells = len(self.cell_headers)
+        self._batch = []
+        self._spool = None
+
+    def add(self, table, row, reasons, cells):
+        """记录一行。
+
+        :param table: 表格序号 (从 1 开始)。
+        :param row: 原始行号 (与日志一致，表头为第 1 行)。
+        :param reasons: 原因代码列表。
+        :param cells: 原始单元格文本。
+        """
+        for code in reasons:
+            self.counts[code] = self.counts.get(code, 0) + 1
+        self._max_cells = max(self._max_cells, len(cells))
+        self._batch.append(
+            [
+                table,
+                row,
+                ";".join(reasons),
+                "; ".join(self.descriptions.get(code, code) for code in reasons),
+                *cells,
+            ]
+        )
+        self.rows += 1
+        if len(self._batch) >= REJECTS_BATCH_ROWS:
+            self._flush()
+
+    def _flush(self):
+        if not self._batch:
+            return
+        if self._spool is None:
+            self._spool = tempfile.SpooledTemporaryFile(
+                max_size=REJECTS_MEMORY_BYTES,
+                mode="w+",
+                encoding="utf-8",
+                newline="",
+                prefix="docconverter_rejects_",
+            )
+        csv.writer(self._spool).writerows(self._batch)
+        self._batch = []
+
+    def headers(self):
+        extra = self._max_cells - len(self.cell_headers)
+        return (
+            _FIXED_HEADERS
+            + self.cell_headers
+            + [f"额外列 {i}" for i in range(1, extra + 1)]
+        )
+
+    def _records(self):
+        self._flush()
+        if self._spool is None:
+            return
+        self._spool.seek(0)
+        for record in csv.reader(self._spool):
+            record[0] = int(record[0])
+            record[1] = int(record[1])
+            yield record
+
+    def write(self, path, fmt="xlsx"):
+        """一次性写出报告 (先写临时文件再替换)。"""
+        if fmt not in FORMATS:
+            raise ValueError(f"rejects format must be one of {FORMATS}, got {fmt!r}")
+        tmp_path = f"{path}.tmp"
+        if fmt == "csv":
+            # 带 BOM，Excel 直接打开时能正确识别 UTF-8 中文
+            with open(tmp_path, "w", encoding="utf-8-sig", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(self.headers())
+                writer.writerows(self._records())
+        else:
+            workbook = Workbook(write_only=True)
+            sheet = workbook.create_sheet("问题行")
+            sheet.append(self.headers())
+            for record in self._records():
+                # 原始文本可能含有 xlsx 不允许的控制字符
+                sheet.append(
+                    [
+                        ILLEGAL_CHARACTERS_RE.sub("", v) if isinstance(v, str) else v
+                        for v in record
+                    ]
+                )
+            workbook.save(tmp_path)
+        os.replace(tmp_path, path)
+
+    def close(self):
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+        self._batch = []
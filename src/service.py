@@ -0,0 +1,473 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""本地转换服务: 通过 HTTP (TCP 或 Unix socket) 接收 .docx 上传并排队转换。
+
+接口:
+    POST   /jobs?shard_rows=N&pipeline=1&timeout=S   请求体为 .docx 内容，返回 job_id
+    GET    /jobs/<id>          任务状态与结果字典
+    GET    /jobs/<id>/events   以 NDJSON 流式返回进度事件，直到任务结束
+    GET    /jobs/<id>/output   生成的 xlsx 文件
+    DELETE /jobs/<id>          删除已结束的任务
+    GET    /health             队列与工作进程状态
+
+每个任务在独立的子进程中执行 (同时运行的进程数受 max_workers 限制)，
+因此 CPU 密集的解析不会阻塞事件循环，超时的任务可以被直接终止。
+
+运行: python -m src.service --port 8765  或  python -m src.service --unix /tmp/docconverter.sock
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import time
+import uuid
+from urllib.parse import parse_qs, urlsplit
+
+from . import converter
+from . import docid
+from .sink import check_shard_limit
+
+DEFAULT_MAX_WORKERS = 2
+DEFAULT_MAX_QUEUE = 100
+DEFAULT_JOB_TIMEOUT = 300  # 秒
+DEFAULT_MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+DEFAULT_JOB_TTL = 3600  # 已结束任务保留的秒数
+
+HTTP_REASONS = {
+    200: "OK",
+    202: "Accepted",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    409: "Conflict",
+    413: "Payload Too Large",
+    503: "Service Unavailable",
+}
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+logger = logging.getLogger("docConverterApp.service")
+
+
+class _PipeLogHandler(logging.Handler):
+    """把子进程中的日志记录作为 "log" 事件发回服务进程。"""
+
+    def __init__(self, conn):
+        super().__init__(level=logging.WARNING)
+        self.conn = conn
+
+    def emit(self, record):
+        try:
+            self.conn.send(
+                (
+                    "event",
+                    {
+                        "event": "log",
+                        "level": record.levelname,
+                        "message": record.getMessage(),
+                    },
+                )
+            )
+        except Exception:
+            pass
+
+
+def _run_job(conn, word_data, options):
+    """子进程入口: 在内存中完成转换，通过管道发送进度事件和最终结果。"""
+    job_logger = logging.getLogger("docConverterApp.service.worker")
+    job_logger.setLevel(logging.INFO)
+    job_logger.propagate = False
+    job_logger.addHandler(_PipeLogHandler(conn))
+    try:
+        result = converter.convert_bytes(
+            word_data,
+            logger=job_logger,
+            progress_callback=lambda event: conn.send(("event", event)),
+            **options,
+        )
+        conn.send(("result", result))
+    except Exception as e:
+        conn.send(
+            ("result", {"status": "error", "message": f"转换过程中发生意外错误: {e}"})
+        )
+    finally:
+        conn.close()
+
+
+class Job:
+    """一个排队中的转换任务。"""
+
+    def __init__(self, word_data, options, timeout):
+        self.id = uuid.uuid4().hex
+        self.word_data = word_data
+        self.options = options
+        self.timeout = timeout
+        self.status = "queued"
+        self.result = None
+        self.output = None
+        self.events = []
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self._changed = asyncio.Condition()
+
+    @property
+    def done(self):
+        # finished 与最后的 "finished" 事件在同一步中设置，保证事件流不会漏掉它
+        return self.finished is not None
+
+    async def add_event(self, event):
+        event.setdefault("time", time.time())
+        self.events.append(event)
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def wait_for_events(self, seen):
+        """等待直到有新事件 (下标 >= seen) 或任务结束。"""
+        async with self._changed:
+            await self._changed.wait_for(lambda: len(self.events) > seen or self.done)
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "options": self.options,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "events": len(self.events),
+            "has_output": self.output is not None,
+            "result": self.result,
+        }
+
+
+class ConversionService:
+    """基于 asyncio 的转换服务: 有界任务队列 + 有限数量的工作进程。"""
+
+    def __init__(
+        self,
+        max_workers=DEFAULT_MAX_WORKERS,
+        max_queue=DEFAULT_MAX_QUEUE,
+        job_timeout=DEFAULT_JOB_TIMEOUT,
+        max_upload_bytes=DEFAULT_MAX_UPLOAD_BYTES,
+        job_ttl=DEFAULT_JOB_TTL,
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.job_timeout = job_timeout
+        self.max_upload_bytes = max_upload_bytes
+        self.job_ttl = job_ttl
+        self.jobs = {}
+        self.running = 0
+        self._queue = None
+        self._workers = []
+        self._server = None
+        self._mp = multiprocessing.get_context()
+
+    # --- 生命周期 ---
+    async def start(self, host="127.0.0.1", port=8765, unix_path=None):
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._workers = [
+            asyncio.create_task(self._worker_loop(), name=f"docConverter-worker-{i}")
+            for i in range(self.max_workers)
+        ]
+        if unix_path:
+            self._server = await asyncio.start_unix_server(
+                self._handle_client, path=unix_path
+            )
+            logger.info(f"Conversion service listening on unix socket {unix_path}")
+        else:
+            self._server = await asyncio.start_server(self._handle_client, host, port)
+            addresses = ", ".join(str(s.getsockname()) for s in self._server.sockets)
+            logger.info(f"Conversion service listening on {addresses}")
+        return self._server
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+    # --- 任务 ---
+    def submit(self, word_data, options, timeout=None):
+        """加入队列，队列已满时抛出 asyncio.QueueFull。"""
+        self._purge_finished()
+        timeout = min(timeout or self.job_timeout, self.job_timeout)
+        job = Job(word_data, options, timeout)
+        self._queue.put_nowait(job)
+        self.jobs[job.id] = job
+        job.events.append({"event": "queued", "time": job.created})
+        return job
+
+    def _purge_finished(self):
+        cutoff = time.time() - self.job_ttl
+        for job_id in [
+            j.id for j in self.jobs.values() if j.done and j.finished < cutoff
+        ]:
+            del self.jobs[job_id]
+
+    async def _worker_loop(self):
+        while True:
+            job = await self._queue.get()
+            self.running += 1
+            try:
+                await self._run(job)
+            finally:
+                self.running -= 1
+                job.word_data = None  # 释放上传内容
+                self._queue.task_done()
+
+    async def _run(self, job):
+        loop = asyncio.get_running_loop()
+        parent_conn, child_conn = self._mp.Pipe(duplex=False)
+        process = self._mp.Process(
+            target=_run_job,
+            args=(child_conn, job.word_data, job.options),
+            daemon=True,
+        )
+        job.status = "running"
+        job.started = time.time()
+        await job.add_event({"event": "started"})
+        process.start()
+        child_conn.close()
+
+        async def pump():
+            while True:
+                try:
+                    kind, payload = await loop.run_in_executor(None, parent_conn.recv)
+                except EOFError:
+                    return {"status": "error", "message": "工作进程意外退出。"}
+                if kind == "result":
+                    return payload
+                await job.add_event(payload)
+
+        try:
+            result = await asyncio.wait_for(pump(), timeout=job.timeout)
+            job.output = result.pop("excel_bytes", None)
+            job.result = result
+            job.status = "succeeded" if result.get("status") != "error" else "failed"
+        except asyncio.TimeoutError:
+            process.terminate()
+            job.status = "timeout"
+            job.result = {
+                "status": "error",
+                "message": f"任务超时 ({job.timeout} 秒)，已终止。",
+            }
+            logger.warning(
+                f"Job {job.id} timed out after {job.timeout}s and was terminated."
+            )
+        finally:
+            await loop.run_in_executor(None, process.join)
+            parent_conn.close()
+            job.finished = time.time()
+            await job.add_event(
+                {
+                    "event": "finished",
+                    "status": job.status,
+                    "seconds": round(job.finished - job.started, 3),
+                }
+            )
+
+    # --- HTTP ---
+    async def _handle_client(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            if not request_line:
+                return
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            await self._dispatch(method.upper(), target, headers, reader, writer)
+        except (ValueError, asyncio.IncompleteReadError):
+            await self._send_json(writer, 400, {"error": "malformed request"})
+        except ConnectionError:
+            pass
+        except Exception as e:
+            logger.error(f"Unexpected error handling request: {e}", exc_info=True)
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    async def _dispatch(self, method, target, headers, reader, writer):
+        url = urlsplit(target)
+        parts = [p for p in url.path.split("/") if p]
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        if parts == ["health"] and method == "GET":
+            await self._send_json(writer, 200, self.health())
+            return
+        if parts == ["jobs"] and method == "POST":
+            await self._post_job(query, headers, reader, writer)
+            return
+        if len(parts) < 2 or parts[0] != "jobs":
+            await self._send_json(writer, 404, {"error": "not found"})
+            return
+
+        job = self.jobs.get(parts[1])
+        if job is None:
+            await self._send_json(writer, 404, {"error": "unknown job"})
+            return
+        action = parts[2] if len(parts) > 2 else None
+        if method == "GET" and action is None:
+            await self._send_json(writer, 200, job.to_dict())
+        elif method == "GET" and action == "events":
+            await self._stream_events(job, writer)
+        elif method == "GET" and action == "output":
+            if job.output is None:
+                await self._send_json(
+                    writer, 409, {"error": "no output", "status": job.status}
+                )
+            else:
+                await self._send(writer, 200, job.output, XLSX_CONTENT_TYPE)
+        elif method == "DELETE" and action is None:
+            if not job.done:
+                await self._send_json(writer, 409, {"error": "job still active"})
+            else:
+                del self.jobs[job.id]
+                await self._send_json(writer, 200, {"deleted": job.id})
+        else:
+            await self._send_json(writer, 405, {"error": "method not allowed"})
+
+    async def _post_job(self, query, headers, reader, writer):
+        try:
+            length = int(headers.get("content-length", ""))
+        except ValueError:
+            await self._send_json(writer, 400, {"error": "Content-Length required"})
+            return
+        if length > self.max_upload_bytes:
+            await self._send_json(writer, 413, {"error": "upload too large"})
+            return
+        try:
+            options = _parse_options(query)
+            timeout = float(query["timeout"]) if "timeout" in query else None
+        except ValueError as e:
+            await self._send_json(writer, 400, {"error": str(e)})
+            return
+        word_data = await reader.readexactly(length)
+        try:
+            job = self.submit(word_data, options, timeout)
+        except asyncio.QueueFull:
+            await self._send_json(writer, 503, {"error": "queue full"})
+            return
+        await self._send_json(writer, 202, {"job_id": job.id, "status": job.status})
+
+    async def _stream_events(self, job, writer):
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: application/x-ndjson\r\n"
+            b"Transfer-Encoding: chunked\r\n"
+            b"Connection: close\r\n\r\n"
+        )
+        seen = 0
+        while True:
+            while seen < len(job.events):
+                line = (
+                    json.dumps(job.events[seen], ensure_ascii=False).encode("utf-8")
+                    + b"\n"
+                )
+                writer.write(b"%x\r\n%s\r\n" % (len(line), line))
+                seen += 1
+            await writer.drain()
+            if job.done and seen >= len(job.events):
+                break
+            await job.wait_for_events(seen)
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    def health(self):
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "running": self.running,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "jobs": len(self.jobs),
+        }
+
+    async def _send_json(self, writer, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        await self._send(writer, status, body, "application/json; charset=utf-8")
+
+    async def _send(self, writer, status, body, content_type):
+        head = (
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+
+def _parse_options(query):
+    """把查询参数转换为 DocConverter 的参数 (只接受适用于内存转换的选项)。"""
+    options = {}
+    if "shard_rows" in query:
+        options["shard_rows"] = int(query["shard_rows"])
+        check_shard_limit("shard_rows", options["shard_rows"])
+    if "pipeline" in query:
+        options["pipeline"] = query["pipeline"].lower() in ("1", "true", "yes")
+    if "columnar" in query:
+        options["columnar"] = query["columnar"].lower() in ("1", "true", "yes")
+    if "id_pattern" in query:
+        # 内存转换没有已有数据，编号从 1 开始
+        docid.compile_pattern(query["id_pattern"])
+        options["id_pattern"] = query["id_pattern"]
+    return options
+
+
+async def serve(args):
+    service = ConversionService(
+        max_workers=args.workers,
+        max_queue=args.queue,
+        job_timeout=args.timeout,
+        max_upload_bytes=args.max_upload_mb * 1024 * 1024,
+    )
+    server = await service.start(args.host, args.port, args.unix)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="docConverter 本地转换服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="监听 Unix socket 路径 (代替 TCP)")
+    parser.add_argument(
+        "--workers", type=int, default=DEFAULT_MAX_WORKERS, help="同时运行的转换进程数"
+    )
+    parser.add_argument(
+        "--queue", type=int, default=DEFAULT_MAX_QUEUE, help="最多排队的任务数"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=DEFAULT_JOB_TIMEOUT, help="单个任务的最长秒数"
+    )
+    parser.add_argument(
+        "--max-upload-mb", type=int, default=DEFAULT_MAX_UPLOAD_BYTES // (1024 * 1024)
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+from openpyxl import Workbook, load_workbook
+
+# Excel 单个工作表的最大行数 (含表头)
+EXCEL_MAX_ROWS = 1048576
+# 估算写入字节数时每个非空单元格的额外开销 (XML 标签等)
+CELL_OVERHEAD_BYTES = 24
+
+
+def part_path(excel_path, part_number):
+    """返回第 N 个分片文件的路径，第 1 片即原始文件 (name.xlsx, name_part002.xlsx, ...)。"""
+    if part_number <= 1:
+        return excel_path
+    root, ext = os.path.splitext(excel_path)
+    return f"{root}_part{part_number:03d}{ext}"
+
+
+def _label(target):
+    """日志中使用的目标描述: 路径原样返回，流返回简短说明。"""
+    if isinstance(target, str):
+        return target
+    return f"<stream {getattr(target, 'name', type(target).__name__)}>"
+
+
+def check_shard_limit(name, value):
+    """检查分片上限参数 (shard_rows / shard_bytes): 必须是 None 或正整数。
+
+    :raises ValueError: 0、负数、非整数等。
+    """
+    if value is not None and (
+        isinstance(value, bool) or not isinstance(value, int) or value <= 0
+    ):
+        raise ValueError(f"{name} must be None or a positive integer, got {value!r}")
+
+
+def estimate_row_bytes(row):
+    """粗略估算一行写入 Excel 后占用的字节数 (未计入压缩，偏保守)。"""
+    total = 0
+    for value in row:
+        if value is None or value == "":
+            continue
+        total += len(str(value).encode("utf-8")) + CELL_OVERHEAD_BYTES
+    return total
+
+
+class ExcelSink:
+    """按行写入 Excel，超出行数或字节预算时自动切换到新工作表或新的编号文件。"""
+
+    def __init__(
+        self,
+        excel_path,
+        mode,
+        headers,
+        logger,
+        shard_rows=None,
+        shard_bytes=None,
+        shard_by="sheet",
+    ):
+        """
+        :param excel_path: 目标 Excel 文件路径 (第一个分片)，也可以是可写的二进制流 (仅支持按工作表分片)。
+        :param mode: "create" 或 "append"，与 _check_excel_header 的返回值一致。
+        :param headers: 每个分片写入的表头行。
+        :param logger: 日志记录器。
+        :param shard_rows: 每个分片的最大数据行数，None 表示仅受 Excel 行数上限约束。
+        :param shard_bytes: 每个文件的估算字节预算，超出后切换到新文件，None 表示不限制。
+        :param shard_by: 达到行数上限时切换到新 "sheet" 还是新 "file"。
+        """
+        if shard_by not in ("sheet", "file"):
+            raise ValueError(f"shard_by must be 'sheet' or 'file', got {shard_by!r}")
+        check_shard_limit("shard_rows", shard_rows)
+        check_shard_limit("shard_bytes", shard_bytes)
+        self.excel_path = excel_path
+        self.mode = mode
+        self.headers = list(headers)
+        self.logger = logger
+        self.shard_by = shard_by
+        self.shard_bytes = shard_bytes
+        # 表头占一行，因此数据行上限为 EXCEL_MAX_ROWS - 1
+        self.max_rows = EXCEL_MAX_ROWS - 1
+        if shard_rows is not None:
+            self.max_rows = min(shard_rows, self.max_rows)
+
+        self._wb = None
+        self._ws = None
+        self._base_title = None
+        self._part_number = 1
+        self._sheet_number = 1
+        self._rows_in_sheet = 0
+        self._rows_in_file = 0
+        self._bytes_in_file = 0
+        self._current = None
+        self.manifest = []
+        self.total_rows = 0
+
+    # --- 打开 ---
+    def open(self):
+        """根据模式新建或加载目标文件，定位到可继续写入的分片。"""
+        if self.mode == "append":
+            self._open_for_append()
+        else:
+            self._new_file(self.excel_path)
+
+    def _open_for_append(self):
+        if self.shard_by == "file":
+            # 找到已存在的最后一个分片文件，继续向其追加
+            while os.path.exists(part_path(self.excel_path, self._part_number + 1)):
+                self._part_number += 1
+        path = part_path(self.excel_path, self._part_number)
+        self.logger.info(f"Appending data to existing Excel file: '{path}'")
+        self._wb = load_workbook(path)
+        self._base_title = self._wb.active.title
+        self._ws = self._wb.active
+
+        # 查找以前运行产生的分片工作表 (Sheet_part002, ...)，继续写最后一个
+        while (
+            f"{self._base_title}_part{self._sheet_number + 1:03d}"
+            in self._wb.sheetnames
+        ):
+            self._sheet_number += 1
+        if self._sheet_number > 1:
+            self._ws = self._wb[f"{self._base_title}_part{self._sheet_number:03d}"]
+
+        self._rows_in_sheet = max(self._ws.max_row - 1, 0)
+        self._rows_in_file = sum(max(ws.max_row - 1, 0) for ws in self._wb.worksheets)
+        if self.shard_bytes:
+            # 与新写入的行使用同一估算 (文件在磁盘上的大小是压缩后的，不可比)
+            self._bytes_in_file = sum(
+                estimate_row_bytes(row)
+                for ws in self._wb.worksheets
+                for row in ws.iter_rows(values_only=True)
+            )
+        self._start_shard(path)
+
+    def _new_file(self, path):
+        if isinstance(path, str):
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            if path != self.excel_path and os.path.exists(path):
+                self.logger.warning(
+                    f"Shard file '{path}' already exists and will be overwritten."
+                )
+        self.logger.info(f"Creating new Excel file: '{_label(path)}'")
+        self._wb = Workbook()
+        self._ws = self._wb.active
+        if self._base_title is None:
+            self._base_title = self._ws.title
+        self._sheet_number = 1
+        self._ws.append(self.headers)
+        self.logger.info(f"Writing header to new Excel file: {self.headers}")
+        self._rows_in_sheet = 0
+        self._rows_in_file = 0
+        self._bytes_in_file = estimate_row_bytes(self.headers)
+        self._start_shard(path)
+
+    def _start_shard(self, path):
+        self._current = {
+            "path": path if isinstance(path, str) else None,
+            "target": path,
+            "sheet": self._ws.title,
+            "first_row": self._ws.max_row + 1,
+            "rows": 0,
+        }
+        self.manifest.append(self._current)
+
+    # --- 分片切换 ---
+    def _roll_sheet(self):
+        self._sheet_number += 1
+        title = f"{self._base_title}_part{self._sheet_number:03d}"
+        self.logger.info(
+            f"Sheet '{self._ws.title}' reached {self._rows_in_sheet} rows. Rolling over to new sheet '{title}'."
+        )
+        self._ws = self._wb.create_sheet(title=title)
+        self._ws.append(self.headers)
+        self._bytes_in_file += estimate_row_bytes(self.headers)
+        self._rows_in_sheet = 0
+        self._start_shard(self._current["target"])
+
+    def _roll_file(self, reason):
+        self._save_current()
+        self._part_number += 1
+        path = part_path(self.excel_path, self._part_number)
+        self.logger.info(f"{reason} Rolling over to new file '{path}'.")
+        self._new_file(path)
+
+    def _save_current(self):
+        target = self._current["target"]
+        self._wb.save(target)
+        self.logger.info(f"Saved Excel file '{_label(target)}'.")
+
+    # --- 写入 ---
+    def append(self, row):
+        """写入一行数据，必要时先切换分片。"""
+        row_bytes = estimate_row_bytes(row)
+        if self._rows_in_sheet >= self.max_rows:
+            reason = f"Shard '{_label(self._current['target'])}' reached {self._rows_in_sheet} rows."
+            if self.shard_by == "file":
+                self._roll_file(reason)
+            else:
+                self._roll_sheet()
+        elif (
+            self.shard_bytes
+            and self._rows_in_file > 0
+            and self._bytes_in_file + row_bytes > self.shard_bytes
+        ):
+            self._roll_file(
+                f"File '{_label(self._current['target'])}' reached estimated size budget ({self._bytes_in_file} bytes)."
+            )
+        self._ws.append(row)
+        self._rows_in_sheet += 1
+        self._rows_in_file += 1
+        self._bytes_in_file += row_bytes
+        self._current["rows"] += 1
+        self.total_rows += 1
+
+    def close(self):
+        """保存当前文件并返回分片清单 (仅包含本次写入了数据的分片)。"""
+        if self._wb is None:
+            return []
+        self._save_current()
+        self._wb = None
+        self._ws = None
+        return [
+            {key: value for key, value in entry.items() if key != "target"}
+            for entry in self.manifest
+            if entry["rows"] > 0
+        ]
@@ -1,43 +1,91 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import re
+import functools
+import unicodedata
 from datetime import datetime
 
+# --- 单元格文本标准化 ---
+# 先做 NFKC (全角数字/字母/标点 -> 半角，NBSP、全角空格 \u3000 -> 普通空格)，
+# 再用预编译的 str.translate 表处理 NFKC 不覆盖的字符。
+_ZERO_WIDTH = "\u200b\u200c\u200d\u2060\ufeff"
+_WHITESPACE = [c for c in range(0x3001) if chr(c).isspace()]
 
+# 数据单元格: 删除零宽字符，其余空白统一为普通空格 (单元格内的换行保留)
+_CELL_TABLE = str.maketrans(
+    {
+        **{c: " " for c in _WHITESPACE if chr(c) not in "\n\r"},
+        **{c: None for c in map(ord, _ZERO_WIDTH)},
+    }
+)
+# 表头: 删除所有空白和零宽字符，NFKC 不处理的全角句号替换为半角
+_HEADER_TABLE = str.maketrans(
+    {
+        **{c: None for c in _WHITESPACE},
+        **{c: None for c in map(ord, _ZERO_WIDTH)},
+        "。": ".",
+    }
+)
+
+
+def _nfkc(text):
+    # 纯 ASCII 文本 NFKC 后不变，跳过 unicodedata 调用
+    if text.isascii():
+        return text
+    return unicodedata.normalize("NFKC", text)
+
+
+def normalize_cell(text):
+    """标准化数据单元格文本: NFKC、统一空白字符、去除零宽字符，并去掉首尾空白。"""
+    if text is None:
+        return ""
+    text = _nfkc(str(text))
+    # NFKC 之后，需要 translate 处理的字符 (控制类空白、零宽字符等) 都是不可打印字符
+    if not text.isprintable():
+        text = text.translate(_CELL_TABLE)
+    return text.strip()
+
+
+# 来源部门、提交人、接收人、存放位置、日期等取值高度重复，缓存标准化结果
+normalize_cell_cached = functools.lru_cache(maxsize=65536)(normalize_cell)
+
+
+@functools.lru_cache(maxsize=1024)
 def normalize_header(header_text):
     """标准化表头文本：去除所有空格，并将全角标点替换为半角。"""
     if header_text is None:
         return ""
-    text = str(header_text).strip()
-    # 替换常见全角符号为对应半角
-    text = (
-        text.replace("（", "(")
-        .replace("）", ")")
-        .replace("：", ":")
-        .replace("，", ",")
-        .replace("。", ".")
-    )
-    # 移除所有空白字符 (包括全角空格 \u3000 和其他如换行符、制表符等)
-    text = re.sub(r"\s+", "", text)
-    return text  # strip() 不再需要，因为所有空格已被移除
+    # NFKC 把全角括号、冒号、逗号等转换为半角，translate 移除所有空白字符 (包括全角空格 \u3000、换行符、制表符等)
+    text = _nfkc(str(header_text))
+    if " " not in text and "。" not in text and text.isprintable():
+        return text  # 没有任何空白或零宽字符
+    return text.translate(_HEADER_TABLE)
 
 
+# 常见的日期格式列表
+DATE_FORMATS = [
+    "%Y-%m-%d",  # 2023-10-26
+    "%Y/%m/%d",  # 2023/10/26
+    "%Y.%m.%d",  # 2023.10.26
+    "%y-%m-%d",  # 23-10-26
+    "%y/%m/%d",  # 23/10/26
+    "%y.%m.%d",  # 23.10.26
+    # 可以根据需要添加更多格式
+]
+
+
+@functools.lru_cache(maxsize=4096)
 def parse_date(date_str):
-    """尝试解析多种常见格式的日期字符串。"""
+    """尝试解析多种常见格式的日期字符串。
+
+    结果会被缓存 (同一文档中的日期高度重复)；返回的 datetime 不可变，可安全共享。
+    """
     if not date_str:
         return None
-    # 常见的日期格式列表
-    formats = [
-        "%Y-%m-%d",  # 2023-10-26
-        "%Y/%m/%d",  # 2023/10/26
-        "%Y.%m.%d",  # 2023.10.26
-        "%y-%m-%d",  # 23-10-26
-        "%y/%m/%d",  # 23/10/26
-        "%y.%m.%d",  # 23.10.26
-        # 可以根据需要添加更多格式
-    ]
-    for fmt in formats:
+    for fmt in DATE_FORMATS:
+        # 分隔符是格式中的字面量，字符串中不包含该分隔符时 strptime 必然失败，直接跳过
+        if fmt[2] not in date_str:
+            continue
         try:
             return datetime.strptime(date_str, fmt)
         except ValueError:
@@ -0,0 +1,557 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""监视收件文件夹，自动转换新放入或被修改的 Word 文档。
+
+Linux 下使用 inotify (通过 ctypes，无额外依赖)，其它平台或 inotify 不可用时退化为按 mtime 轮询。
+收件文件夹在网络共享上 (CIFS/NFS 等) 时也使用轮询: inotify 只能看到本机的写入，收不到其它主机写入的事件。
+文件在大小与修改时间保持不变 settle 秒、且是完整的 zip 包后才会被转换，避免读取写了一半的文件。
+已处理的文件 (路径 + mtime + 大小) 记录在 SQLite 状态库中，重启后不会重复处理。
+转换失败的文件同样记录 (状态 error 及尝试次数)，在 retry_delay 秒后重试，最多 max_attempts 次；
+文件被修改后重新计数。--once 运行时不等待重试，留给下一次运行的启动扫描。
+
+运行: python -m src.watcher INBOX --output-dir OUT [--workers 2]
+      python -m src.watcher INBOX --target master.xlsx   (共享目标，任务串行执行)
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from . import converter
+from . import docid
+from . import prefetch
+
+DEFAULT_SETTLE_SECONDS = 2.0
+DEFAULT_POLL_INTERVAL = 2.0
+DEFAULT_METRICS_INTERVAL = 30.0
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_ATTEMPTS = 3  # 同一版本的文件最多转换几次 (失败后重试)
+DEFAULT_RETRY_DELAY = 60.0  # 第 n 次失败后等待 n * retry_delay 秒再重试
+FAILED_STATUS = "error"
+STATE_FILENAME = ".docconverter_state.sqlite"
+
+logger = logging.getLogger("docConverterApp.watcher")
+
+
+def is_candidate(name):
+    """只处理 .docx，忽略 Word 的锁文件 (~$xxx.docx) 和隐藏文件。"""
+    return (
+        name.lower().endswith(".docx")
+        and not name.startswith("~$")
+        and not name.startswith(".")
+    )
+
+
+def scan_candidates(folder):
+    """返回文件夹中所有待处理文件的路径。"""
+    return [
+        entry.path
+        for entry in os.scandir(folder)
+        if entry.is_file() and is_candidate(entry.name)
+    ]
+
+
+# --- 事件来源 ---
+class PollingSource:
+    """按固定间隔扫描目录，返回 mtime 或大小发生变化的文件。"""
+
+    name = "polling"
+
+    def __init__(self, folder, interval=DEFAULT_POLL_INTERVAL):
+        self.folder = folder
+        self.interval = interval
+        self._snapshot = {}
+        self._next_scan = 0.0
+
+    def poll(self, timeout):
+        now = time.monotonic()
+        if now < self._next_scan:
+            time.sleep(min(timeout, self._next_scan - now))
+            return set()
+        self._next_scan = now + self.interval
+        changed = set()
+        current = {}
+        try:
+            entries = list(os.scandir(self.folder))
+        except OSError as e:
+            logger.error(f"Failed to scan inbox '{self.folder}': {e}")
+            return changed
+        for entry in entries:
+            if not entry.is_file() or not is_candidate(entry.name):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            signature = (stat.st_mtime, stat.st_size)
+            current[entry.path] = signature
+            if self._snapshot.get(entry.path) != signature:
+                changed.add(entry.path)
+        self._snapshot = current
+        return changed
+
+    def close(self):
+        pass
+
+
+class InotifySource:
+    """基于 Linux inotify 的事件来源 (不递归子目录)。
+
+    内核事件队列溢出 (IN_Q_OVERFLOW) 时部分事件已丢失，此时返回文件夹中的所有文件 (完整重新扫描)。
+    """
+
+    name = "inotify"
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    IN_NONBLOCK = os.O_NONBLOCK if hasattr(os, "O_NONBLOCK") else 0
+    IN_CLOEXEC = os.O_CLOEXEC if hasattr(os, "O_CLOEXEC") else 0
+    _EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self, folder):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.folder = folder
+        self._fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE | self.IN_MODIFY
+        wd = libc.inotify_add_watch(self._fd, os.fsencode(folder), mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f"inotify_add_watch failed for '{folder}'")
+
+    def poll(self, timeout):
+        changed = set()
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return changed
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        overflowed = False
+        while offset + self._EVENT_HEADER.size <= len(data):
+            _, mask, _, length = self._EVENT_HEADER.unpack_from(data, offset)
+            offset += self._EVENT_HEADER.size
+            if mask & self.IN_Q_OVERFLOW:
+                overflowed = True
+            name = (
+                data[offset : offset + length]
+                .rstrip(b"\0")
+                .decode(sys.getfilesystemencoding(), "surrogateescape")
+            )
+            offset += length
+            if name and is_candidate(name):
+                changed.add(os.path.join(self.folder, name))
+        if overflowed:
+            logger.warning(
+                f"inotify event queue overflowed for '{self.folder}'. Rescanning the folder."
+            )
+            try:
+                changed.update(scan_candidates(self.folder))
+            except OSError as e:
+                logger.error(f"Failed to scan inbox '{self.folder}': {e}")
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+def make_source(folder, use_inotify=True, poll_interval=DEFAULT_POLL_INTERVAL):
+    """优先使用 inotify；不可用或文件夹在网络共享上时使用轮询。"""
+    if use_inotify and prefetch.is_network_path(folder):
+        logger.info(
+            f"'{folder}' is on a network share, where inotify misses writes from other hosts. "
+            "Using mtime polling."
+        )
+        use_inotify = False
+    if use_inotify:
+        try:
+            return InotifySource(folder)
+        except (OSError, AttributeError) as e:
+            logger.info(f"inotify unavailable ({e}). Falling back to mtime polling.")
+    return PollingSource(folder, poll_interval)
+
+
+# --- 状态库 ---
+class StateStore:
+    """SQLite 状态库，记录已处理的文件及其 mtime/大小、转换状态和尝试次数。
+
+    监视器可以在一个线程中创建、在另一个线程中 run()，因此连接不绑定创建它的线程，
+    所有访问由锁串行。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS processed ("
+                " path TEXT PRIMARY KEY, mtime REAL, size INTEGER, status TEXT,"
+                " excel_path TEXT, message TEXT, processed_at REAL,"
+                " attempts INTEGER NOT NULL DEFAULT 1)"
+            )
+            columns = [
+                row[1] for row in self._db.execute("PRAGMA table_info(processed)")
+            ]
+            if "attempts" not in columns:
+                # 旧版本创建的状态库: 其中失败的记录按尝试过一次处理，会被重试
+                self._db.execute(
+                    "ALTER TABLE processed ADD COLUMN attempts INTEGER NOT NULL DEFAULT 1"
+                )
+            self._db.commit()
+
+    def _lookup(self, path, mtime, size):
+        """返回该版本文件的 (状态, 尝试次数)；没有记录或文件已变化时返回 None。"""
+        row = self._db.execute(
+            "SELECT mtime, size, status, attempts FROM processed WHERE path = ?",
+            (path,),
+        ).fetchone()
+        if row is None or row[0] != mtime or row[1] != size:
+            return None
+        return row[2], row[3]
+
+    def is_processed(self, path, mtime, size, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        """该版本的文件是否不需要再转换: 已转换成功，或失败次数已达 max_attempts。"""
+        with self._lock:
+            state = self._lookup(path, mtime, size)
+        if state is None:
+            return False
+        status, attempts = state
+        return status != FAILED_STATUS or attempts >= max_attempts
+
+    def record(self, path, mtime, size, result):
+        """记录一次转换结果，返回该版本文件累计的尝试次数。"""
+        with self._lock:
+            state = self._lookup(path, mtime, size)
+            attempts = state[1] + 1 if state else 1
+            self._db.execute(
+                "INSERT OR REPLACE INTO processed (path, mtime, size, status,"
+                " excel_path, message, processed_at, attempts)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    path,
+                    mtime,
+                    size,
+                    result.get("status"),
+                    result.get("excel_path"),
+                    result.get("message"),
+                    time.time(),
+                    attempts,
+                ),
+            )
+            self._db.commit()
+        return attempts
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def _convert_file(word_path, excel_path, options):
+    """工作进程入口。"""
+    return converter.DocConverter(word_path, excel_path, **options).convert()
+
+
+# --- 监视器 ---
+class FolderWatcher:
+    """把收件文件夹中稳定下来的 .docx 送入转换进程池。"""
+
+    def __init__(
+        self,
+        inbox,
+        output_dir=None,
+        target=None,
+        workers=DEFAULT_WORKERS,
+        settle_seconds=DEFAULT_SETTLE_SECONDS,
+        poll_interval=DEFAULT_POLL_INTERVAL,
+        metrics_interval=DEFAULT_METRICS_INTERVAL,
+        state_path=None,
+        use_inotify=True,
+        options=None,
+        max_attempts=DEFAULT_MAX_ATTEMPTS,
+        retry_delay=DEFAULT_RETRY_DELAY,
+    ):
+        if (output_dir is None) == (target is None):
+            raise ValueError("Exactly one of output_dir or target must be given.")
+        self.inbox = os.path.abspath(inbox)
+        self.output_dir = output_dir
+        self.target = target
+        # 共享目标必须串行追加，否则后写入者会覆盖先写入者
+        self.workers = 1 if target else max(1, workers)
+        self.settle_seconds = settle_seconds
+        self.metrics_interval = metrics_interval
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
+        self.options = options or {}
+        self.state = StateStore(state_path or os.path.join(self.inbox, STATE_FILENAME))
+        self.source = make_source(self.inbox, use_inotify, poll_interval)
+
+        self._pending = {}  # path -> (mtime, size, 最后变化时间, 首次发现时间)
+        self._ready = deque()  # (path, mtime, size, 首次发现时间)
+        self._inflight = {}  # future -> (path, mtime, size, 首次发现时间)
+        self._retries = {}  # 转换失败、等待重试的 path -> 重试时间
+        self._latencies = deque(maxlen=1000)
+        self._processed = 0
+        self._failed = 0
+        self._next_metrics = time.monotonic() + metrics_interval
+        self._running = False
+
+    def _excel_path_for(self, word_path):
+        if self.target:
+            return self.target
+        stem = os.path.splitext(os.path.basename(word_path))[0]
+        return os.path.join(self.output_dir, f"{stem}.xlsx")
+
+    def _observe(self, path, now):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self._pending.pop(path, None)  # 文件已被删除或移走
+            return
+        signature = (stat.st_mtime, stat.st_size)
+        if self.state.is_processed(path, *signature, self.max_attempts):
+            return
+        if any(item[0] == path for item in self._ready) or any(
+            job[0] == path for job in self._inflight.values()
+        ):
+            return  # 已在排队或处理中，_collect 在结束后按新的 mtime 再次检查
+        previous = self._pending.get(path)
+        if previous is None:
+            self._pending[path] = (*signature, now, now)
+        elif previous[:2] != signature:
+            self._pending[path] = (*signature, now, previous[3])
+
+    def _promote_settled(self, now):
+        for path, (mtime, size, changed_at, seen_at) in list(self._pending.items()):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                del self._pending[path]
+                continue
+            if (stat.st_mtime, stat.st_size) != (mtime, size):
+                self._pending[path] = (stat.st_mtime, stat.st_size, now, seen_at)
+                continue
+            if now - changed_at < self.settle_seconds:
+                continue
+            if not zipfile.is_zipfile(path):
+                # 仍在写入，或者不是有效的 .docx；保持等待直到内容变化
+                self._pending[path] = (mtime, size, now, seen_at)
+                continue
+            del self._pending[path]
+            self._ready.append((path, mtime, size, seen_at))
+
+    def _dispatch(self, executor):
+        while self._ready and len(self._inflight) < self.workers:
+            path, mtime, size, seen_at = self._ready.popleft()
+            excel_path = self._excel_path_for(path)
+            logger.info(f"Converting '{path}' -> '{excel_path}'")
+            future = executor.submit(_convert_file, path, excel_path, self.options)
+            self._inflight[future] = (path, mtime, size, seen_at)
+
+    def _collect(self):
+        for future in [f for f in self._inflight if f.done()]:
+            path, mtime, size, seen_at = self._inflight.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"status": "error", "message": f"转换过程中发生意外错误: {e}"}
+            latency = time.monotonic() - seen_at
+            self._latencies.append(latency)
+            attempts = self.state.record(path, mtime, size, result)
+            if result.get("status") == FAILED_STATUS:
+                self._failed += 1
+                logger.error(
+                    f"Conversion failed for '{path}' (attempt {attempts} of {self.max_attempts}): "
+                    f"{result.get('message')}"
+                )
+                if attempts < self.max_attempts:
+                    delay = self.retry_delay * attempts
+                    self._retries[path] = time.monotonic() + delay
+                    logger.info(f"Retrying '{path}' in {delay:.0f}s.")
+                else:
+                    logger.warning(f"Giving up on '{path}' until it is modified.")
+            else:
+                self._processed += 1
+                logger.info(
+                    f"Converted '{path}' in {latency:.1f}s: {result.get('message')}"
+                )
+            # 排队或转换期间文件又被修改 (期间的事件被忽略了)：按当前内容重新排队
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if (stat.st_mtime, stat.st_size) != (mtime, size):
+                logger.info(f"'{path}' changed during conversion. Queuing it again.")
+                self._observe(path, time.monotonic())
+
+    def _retry_due(self, now):
+        """把到期的失败文件重新送入等待队列 (仍需稳定 settle 秒)。"""
+        for path, due in list(self._retries.items()):
+            if due <= now:
+                del self._retries[path]
+                self._observe(path, now)
+
+    def metrics_line(self):
+        latencies = sorted(self._latencies)
+        if latencies:
+            avg = sum(latencies) / len(latencies)
+            p95 = latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)]
+            latency_text = (
+                f"latency avg={avg:.1f}s p95={p95:.1f}s max={latencies[-1]:.1f}s"
+            )
+        else:
+            latency_text = "latency n/a"
+        return (
+            f"metrics: queue_depth={len(self._pending) + len(self._ready)} "
+            f"(settling={len(self._pending)}, ready={len(self._ready)}) "
+            f"inflight={len(self._inflight)} retrying={len(self._retries)} "
+            f"processed={self._processed} "
+            f"failed={self._failed} {latency_text}"
+        )
+
+    def run(self, once=False):
+        """主循环。once=True 时处理完当前收件箱中的文件后返回。"""
+        logger.info(
+            f"Watching '{self.inbox}' using {self.source.name} with {self.workers} worker(s)."
+        )
+        self._running = True
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            # 启动时先完整扫描一次，处理停机期间放入的文件
+            now = time.monotonic()
+            for path in scan_candidates(self.inbox):
+                self._observe(path, now)
+            try:
+                while self._running:
+                    for path in self.source.poll(timeout=0.5):
+                        self._observe(path, time.monotonic())
+                    now = time.monotonic()
+                    self._retry_due(now)
+                    self._promote_settled(now)
+                    self._collect()
+                    self._dispatch(executor)
+                    if now >= self._next_metrics:
+                        logger.info(self.metrics_line())
+                        self._next_metrics = now + self.metrics_interval
+                    if once and not (self._pending or self._ready or self._inflight):
+                        break
+            finally:
+                for future in list(self._inflight):
+                    future.cancel()
+                self.source.close()
+                self.state.close()
+        logger.info(self.metrics_line())
+
+    def stop(self):
+        self._running = False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="监视文件夹并自动转换 Word 文档")
+    parser.add_argument("inbox", help="收件文件夹")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--output-dir", help="每个文档输出为该目录下同名的 .xlsx")
+    group.add_argument("--target", help="所有文档追加到同一个 Excel 文件 (串行执行)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=DEFAULT_SETTLE_SECONDS,
+        help="文件保持不变多少秒后才处理",
+    )
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL)
+    parser.add_argument(
+        "--metrics-interval", type=float, default=DEFAULT_METRICS_INTERVAL
+    )
+    parser.add_argument("--state", help="状态库路径 (默认位于收件文件夹中)")
+    parser.add_argument("--no-inotify", action="store_true", help="强制使用轮询")
+    parser.add_argument("--once", action="store_true", help="处理完当前文件后退出")
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=DEFAULT_MAX_ATTEMPTS,
+        help="转换失败的文件最多尝试几次 (文件被修改后重新计数)",
+    )
+    parser.add_argument(
+        "--retry-delay",
+        type=float,
+        default=DEFAULT_RETRY_DELAY,
+        help="第 n 次失败后等待 n 倍该秒数再重试",
+    )
+    parser.add_argument(
+        "--profile", action="store_true", help="对每次转换做性能分析 (结果在日志旁边)"
+    )
+    parser.add_argument(
+        "--id-pattern",
+        help='自动填写 "文档 ID" 列的格式，如 "DOC-{n:06d}" (编号接在目标文件中已有的最大编号之后)',
+    )
+    parser.add_argument(
+        "--rejects",
+        choices=("xlsx", "csv", "none"),
+        default="xlsx",
+        help="问题行报告的格式 (写在输出 Excel 旁边)，none 表示不写",
+    )
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help="行数较多的表格按列批量映射 (需要 pandas)",
+    )
+    args = parser.parse_args(argv)
+
+    options = {}
+    if args.rejects != "xlsx":
+        options["rejects_format"] = None if args.rejects == "none" else args.rejects
+    if args.profile:
+        options["profile"] = True
+    if args.columnar:
+        options["columnar"] = True
+    if args.id_pattern:
+        try:
+            docid.compile_pattern(args.id_pattern)
+        except ValueError as e:
+            parser.error(str(e))
+        options["id_pattern"] = args.id_pattern
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+    watcher = FolderWatcher(
+        args.inbox,
+        output_dir=args.output_dir,
+        target=args.target,
+        workers=args.workers,
+        settle_seconds=args.settle,
+        poll_interval=args.poll_interval,
+        metrics_interval=args.metrics_interval,
+        state_path=args.state,
+        use_inotify=not args.no_inotify,
+        options=options or None,
+        max_attempts=args.max_attempts,
+        retry_delay=args.retry_delay,
+    )
+    try:
+        watcher.run(once=args.once)
+    except KeyboardInterrupt:
+        logger.info("Watcher stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import sys
+
+import pytest
+
+# 直接运行 pytest (而不是 python -m pytest) 时也能导入 src 和 benchmarks
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--perf-gate",
+        action="store_true",
+        default=False,
+        help="运行标记为 perf 的性能门禁用例 (与基线比较绝对耗时，结果取决于机器和负载)",
+    )
+    parser.addoption(
+        "--run-slow",
+        action="store_true",
+        default=False,
+        help="同时运行标记为 slow 的用例 (如 100k 行和追加到大文件的性能门禁用例)",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: 耗时较长，默认跳过，--run-slow 时运行")
+    config.addinivalue_line("markers", "perf: 性能门禁，默认跳过，--perf-gate 时运行")
+
+
+def pytest_collection_modifyitems(config, items):
+    skips = {}
+    if not config.getoption("--perf-gate"):
+        skips["perf"] = pytest.mark.skip(
+            reason="performance gate; use --perf-gate to run"
+        )
+    if not config.getoption("--run-slow"):
+        skips["slow"] = pytest.mark.skip(reason="slow; use --run-slow to run")
+    for item in items:
+        for keyword, skip in skips.items():
+            if keyword in item.keywords:
+                item.add_marker(skip)
+                break
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import contextlib
+import logging
+import threading
+import time
+
+from benchmarks.docgen import write_docx
+from src import filelock
+from src.coalesce import AppendCoalescer, default_coalescer
+from src.converter import DocConverter
+
+
+def _wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def _pending(coalescer):
+    with coalescer._lock:
+        return sum(len(requests) for requests in coalescer._pending.values())
+
+
+class _Gate:
+    """lock_factory: 第一个 leader 在 open() 之前阻塞，让其它请求有机会排队。"""
+
+    def __init__(self):
+        self.opened = threading.Event()
+
+    @contextlib.contextmanager
+    def __call__(self):
+        self.opened.wait()
+        yield
+
+
+def _submit(coalescer, path, rows, options, gate, calls, results):
+    def writer(batches):
+        calls.append((options, list(batches)))
+        return [path]
+
+    def run():
+        results[rows] = coalescer.write(path, rows, writer, gate, options=options)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_requests_with_same_options_share_one_write(tmp_path):
+    coalescer, gate, calls, results = AppendCoalescer(), _Gate(), [], {}
+    path = str(tmp_path / "out.xlsx")
+    threads = [
+        _submit(coalescer, path, name, ("rows", 10), gate, calls, results)
+        for name in ("a", "b", "c")
+    ]
+    _wait_for(lambda: _pending(coalescer) == 3)
+    gate.opened.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(calls[0][1]) == ["a", "b", "c"]
+    assert {batch_size for _, batch_size in results.values()} == {3}
+
+
+def test_requests_with_different_options_are_not_merged(tmp_path):
+    coalescer, gate, calls, results = AppendCoalescer(), _Gate(), [], {}
+    path = str(tmp_path / "out.xlsx")
+    threads = [
+        _submit(coalescer, path, "a", ("rows", 10), gate, calls, results),
+        _submit(coalescer, path, "b", ("rows", 20), gate, calls, results),
+        _submit(coalescer, path, "c", ("rows", 10), gate, calls, results),
+    ]
+    _wait_for(lambda: _pending(coalescer) == 3)
+    gate.opened.set()
+    for thread in threads:
+        thread.join()
+
+    written = sorted((options, sorted(batches)) for options, batches in calls)
+    assert written == [(("rows", 10), ["a", "c"]), (("rows", 20), ["b"])]
+    assert results["b"][1] == 1
+
+
+def test_failed_write_is_reported_to_every_request(tmp_path):
+    coalescer, gate = AppendCoalescer(), _Gate()
+    path = str(tmp_path / "out.xlsx")
+    errors = []
+
+    def writer(batches):
+        raise OSError("disk full")
+
+    def run(rows):
+        try:
+            coalescer.write(path, rows, writer, gate)
+        except OSError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(name,)) for name in "ab"]
+    for thread in threads:
+        thread.start()
+    _wait_for(lambda: _pending(coalescer) == 2)
+    gate.opened.set()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 2
+    assert not coalescer._pending and not coalescer._leaders
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def test_concurrent_conversions_log_their_own_batches(tmp_path):
+    word_paths = [
+        write_docx(str(tmp_path / f"source{i}.docx"), 30, seed=i) for i in range(2)
+    ]
+    excel_path = str(tmp_path / "target.xlsx")
+    handlers, results = [], [None, None]
+
+    def run(index):
+        logger = logging.getLogger(f"docConverter.tests.coalesce.{index}")
+        logger.setLevel(logging.INFO)
+        handler = _ListHandler()
+        logger.addHandler(handler)
+        handlers.append((index, handler, logger))
+        converter = DocConverter(
+            word_paths[index], excel_path, logger=logger, id_pattern="DOC-{n:06d}"
+        )
+        results[index] = converter.convert()
+
+    # 持有目标文件锁，让两个转换的写入请求都排队后再一起写入
+    held = filelock.FileLock(excel_path).acquire()
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(2)]
+    try:
+        for thread in threads:
+            thread.start()
+        _wait_for(lambda: _pending(default_coalescer) == 2, timeout=30)
+    finally:
+        held.release()
+    for thread in threads:
+        thread.join()
+
+    try:
+        assert [result["coalesced_jobs"] for result in results] == [2, 2]
+        for _, handler, _ in handlers:
+            appended = [m for m in handler.messages if m.startswith("Appended ")]
+            assert len(appended) == 1
+            assert appended[0].startswith("Appended 30 rows")
+        # 恰好一个任务的行由另一个任务保存
+        shared = [
+            m
+            for _, handler, _ in handlers
+            for m in handler.messages
+            if m.startswith("Appended ") and " in a save by job " in m
+        ]
+        assert len(shared) == 1
+    finally:
+        for _, handler, logger in handlers:
+            logger.removeHandler(handler)
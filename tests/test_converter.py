@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import subprocess
+import sys
+import textwrap
+
+from benchmarks.docgen import write_docx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_stream_conversion_without_logging_config_is_silent(tmp_path):
+    # 含无法解析日期的行会产生警告；没有配置日志时不应出现在 stderr
+    word_path = write_docx(str(tmp_path / "source.docx"), 120, seed=1)
+    script = textwrap.dedent(f"""
+        import io
+        from src.converter import DocConverter
+        result = DocConverter({word_path!r}, io.BytesIO()).convert()
+        assert result["status"] in ("success", "warning"), result
+        """)
+    completed = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stderr == ""
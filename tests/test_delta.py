@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import json
+import os
+
+from openpyxl import load_workbook
+
+from benchmarks.docgen import write_docx
+from src import delta
+from src.converter import DocConverter
+
+
+def _data_rows(excel_path):
+    workbook = load_workbook(excel_path, read_only=True)
+    try:
+        return workbook.active.max_row - 1
+    finally:
+        workbook.close()
+
+
+def _manifest(excel_path):
+    with open(delta.manifest_path(excel_path), "r", encoding="utf-8") as f:
+        return json.load(f)["documents"]
+
+
+def _convert(word_path, excel_path):
+    result = DocConverter(word_path, excel_path, delta=True).convert()
+    assert result["status"] in ("success", "warning"), result["message"]
+    return result
+
+
+def test_unchanged_document_is_skipped(tmp_path):
+    word_path = write_docx(str(tmp_path / "source.docx"), 60, tables=2)
+    excel_path = str(tmp_path / "target.xlsx")
+    first = _convert(word_path, excel_path)
+    assert first["success"] == _data_rows(excel_path) > 0
+
+    second = _convert(word_path, excel_path)
+    assert second["success"] == 0
+    assert second["unchanged_tables"] == 2
+    assert _data_rows(excel_path) == first["success"]
+
+
+def test_only_new_rows_are_appended(tmp_path):
+    word_path = str(tmp_path / "source.docx")
+    excel_path = str(tmp_path / "target.xlsx")
+    write_docx(word_path, 60)
+    first = _convert(word_path, excel_path)
+
+    write_docx(word_path, 70)  # 同一种子: 前 60 行不变，新增 10 行
+    second = _convert(word_path, excel_path)
+    assert 0 < second["success"] <= 10
+    assert second["unchanged_rows"] == 60
+    assert _data_rows(excel_path) == first["success"] + second["success"]
+
+
+def test_manifest_is_keyed_by_full_path(tmp_path):
+    excel_path = str(tmp_path / "target.xlsx")
+    word_paths = []
+    for folder, seed in (("a", 1), ("b", 2)):
+        os.makedirs(tmp_path / folder)
+        word_paths.append(
+            write_docx(str(tmp_path / folder / "资料清单.docx"), 30, seed=seed)
+        )
+    results = [_convert(path, excel_path) for path in word_paths]
+    assert all(result["success"] > 0 for result in results)
+    assert set(_manifest(excel_path)) == {delta.document_key(p) for p in word_paths}
+    # 两个同名文档都被各自识别为未变化
+    assert all(_convert(path, excel_path)["success"] == 0 for path in word_paths)
+
+
+def test_legacy_file_name_key_is_migrated(tmp_path):
+    word_path = write_docx(str(tmp_path / "source.docx"), 40)
+    excel_path = str(tmp_path / "target.xlsx")
+    first = _convert(word_path, excel_path)
+
+    # 改写为旧版本的清单 (只用文件名作键)
+    path = delta.manifest_path(excel_path)
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    data["documents"] = {
+        "source.docx": data["documents"].pop(delta.document_key(word_path))
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+    assert _convert(word_path, excel_path)["success"] == 0
+    assert _data_rows(excel_path) == first["success"]
+    assert set(_manifest(excel_path)) == {delta.document_key(word_path)}
+
+
+def test_manifest_is_not_written_when_saving_fails(tmp_path, monkeypatch):
+    word_path = write_docx(str(tmp_path / "source.docx"), 30)
+    excel_path = str(tmp_path / "target.xlsx")
+
+    def fail(self, batches):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(DocConverter, "_write_batches", fail)
+    result = DocConverter(word_path, excel_path, delta=True).convert()
+    assert result["status"] == "error"
+    assert not os.path.exists(delta.manifest_path(excel_path))
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+from openpyxl import load_workbook
+
+from benchmarks.docgen import write_docx
+from src import docid
+from src.converter import DocConverter
+
+
+@pytest.mark.parametrize("pattern", ["DOC-{n:6}", "DOC-{n:6d}", "DOC-{x}", "{n}{n}"])
+def test_compile_pattern_rejects_unscannable_patterns(pattern):
+    with pytest.raises(ValueError):
+        docid.compile_pattern(pattern)
+
+
+@pytest.mark.parametrize("pattern", ["DOC-{n:06d}", "DOC-{n:06}", "DOC-{n}", "{n:d}"])
+def test_compile_pattern_matches_formatted_ids(pattern):
+    regex = docid.compile_pattern(pattern)
+    assert int(regex.fullmatch(pattern.format(n=42)).group(1)) == 42
+
+
+def _ids(excel_path):
+    workbook = load_workbook(excel_path, read_only=True)
+    try:
+        return [
+            row[0] for row in workbook.active.iter_rows(min_row=2, values_only=True)
+        ]
+    finally:
+        workbook.close()
+
+
+@pytest.mark.parametrize("pattern", ["DOC-{n:06d}", "DOC-{n}"])
+def test_ids_continue_after_sidecar_is_lost(tmp_path, pattern):
+    word_path = write_docx(str(tmp_path / "source.docx"), 120, tables=2)
+    excel_path = str(tmp_path / "target.xlsx")
+
+    first = DocConverter(word_path, excel_path, id_pattern=pattern).convert()
+    assert first["status"] in ("success", "warning")
+    os.remove(docid.sidecar_path(excel_path))  # 强制重新扫描 A 列
+    second = DocConverter(word_path, excel_path, id_pattern=pattern).convert()
+    assert second["status"] in ("success", "warning")
+
+    ids = _ids(excel_path)
+    assert len(ids) == first["success"] + second["success"]
+    assert len(set(ids)) == len(ids)
+    assert second["document_ids"][0] == pattern.format(n=first["success"] + 1)
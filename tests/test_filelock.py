@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import glob
+import json
+import os
+import socket
+import time
+
+import pytest
+
+from src import filelock
+
+
+def _write_lock(target, **owner):
+    path = filelock.lock_path(str(target))
+    owner = {"host": socket.gethostname(), "pid": os.getpid(), "token": "x", **owner}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(owner, f)
+    return path
+
+
+def _read_lock(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_acquire_and_release(tmp_path):
+    target = tmp_path / "out.xlsx"
+    with filelock.FileLock(str(target)) as lock:
+        assert _read_lock(lock.path)["token"] == lock.token
+    assert not os.path.exists(filelock.lock_path(str(target)))
+
+
+def test_live_lock_times_out(tmp_path):
+    target = tmp_path / "out.xlsx"
+    path = _write_lock(target, token="other")
+    with pytest.raises(filelock.LockTimeout):
+        filelock.FileLock(str(target), timeout=0.3, poll_interval=0.05).acquire()
+    assert _read_lock(path)["token"] == "other"
+
+
+def test_lock_without_heartbeat_is_broken(tmp_path):
+    target = tmp_path / "out.xlsx"
+    path = _write_lock(target, host="other-host", pid=1, token="old")
+    old = time.time() - 60
+    os.utime(path, (old, old))
+    lock = filelock.FileLock(str(target), timeout=1, stale_after=30)
+    with lock:
+        assert _read_lock(path)["token"] == lock.token
+    assert not glob.glob(f"{path}.stale-*")
+
+
+def test_lock_of_dead_local_process_is_broken(tmp_path, monkeypatch):
+    target = tmp_path / "out.xlsx"
+    path = _write_lock(target, pid=123456, token="old")
+    monkeypatch.setattr(filelock, "_pid_alive", lambda pid: pid != 123456)
+    with filelock.FileLock(str(target), timeout=1) as lock:
+        assert _read_lock(path)["token"] == lock.token
+
+
+def test_lock_reacquired_while_breaking_is_restored(tmp_path, monkeypatch):
+    # 判断过期时读到的是旧持有者，改名前锁已被其它进程重新获得
+    target = tmp_path / "out.xlsx"
+    path = _write_lock(target, token="new")
+    lock = filelock.FileLock(str(target))
+    read_owner = lock._read_owner
+    monkeypatch.setattr(
+        lock,
+        "_read_owner",
+        lambda p=None: {"token": "old"} if p is None else read_owner(p),
+    )
+    lock._break_stale()
+    assert _read_lock(path)["token"] == "new"
+    assert not glob.glob(f"{path}.stale-*")
+
+
+def test_release_keeps_a_lock_taken_over_by_another_holder(tmp_path):
+    target = tmp_path / "out.xlsx"
+    lock = filelock.FileLock(str(target)).acquire()
+    _write_lock(target, token="other")
+    lock.release()
+    assert _read_lock(lock.path)["token"] == "other"
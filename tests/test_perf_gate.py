@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""把 benchmarks/perf_gate.py 的每个用例作为一个 pytest 用例运行。
+
+测量和比较都由 perf_gate 完成 (run_cases / compare)，这里只负责收集用例并在超出基线容差时
+以差异表作为失败信息。基线是参考机器上的绝对耗时，在其它机器或负载较高时会误报，因此所有用例
+标记为 perf，只在 --perf-gate 时运行；100k 行和追加到 10 万行大文件的用例另外标记为 slow，
+还需要 --run-slow:
+
+    python -m pytest tests/test_perf_gate.py --perf-gate                # fresh-1k、fresh-10k
+    python -m pytest tests/test_perf_gate.py --perf-gate --run-slow     # 全部用例 (约 15–20 分钟)
+"""
+
+import json
+
+import pytest
+
+pytest.importorskip("resource")  # perf_gate 用 resource 读取峰值内存 (仅 Unix)
+
+from benchmarks import perf_gate  # noqa: E402
+
+REPEAT = 3  # 与 perf_gate 命令行的默认值相同，取最好值以减少噪声
+FAST_CASES = {"fresh-1k", "fresh-10k"}
+
+pytestmark = pytest.mark.perf
+
+
+def _params():
+    for name in perf_gate.CASES:
+        marks = () if name in FAST_CASES else (pytest.mark.slow,)
+        yield pytest.param(name, id=name, marks=marks)
+
+
+@pytest.fixture(scope="module")
+def baseline():
+    with open(perf_gate.BASELINE_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="module")
+def workdir(tmp_path_factory):
+    # 同一模块的用例共用生成的文档和追加用的大文件
+    return str(tmp_path_factory.mktemp("perf_gate"))
+
+
+@pytest.mark.parametrize("name", list(_params()))
+def test_no_regression(name, baseline, workdir):
+    if name not in baseline.get("cases", {}):
+        pytest.skip(f"no baseline for {name}")
+    results = perf_gate.run_cases([name], workdir, REPEAT)
+    lines, regressed = perf_gate.compare(baseline, results)
+    assert not regressed, "performance regression:\n" + "\n".join(lines)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import logging
+import threading
+import tracemalloc
+
+import pytest
+
+from src import profiling
+
+
+@pytest.fixture
+def logger():
+    return logging.getLogger("docConverter.tests.profiling")
+
+
+def test_only_one_profile_uses_cprofile(tmp_path, logger, caplog):
+    first = profiling.ConversionProfiler(str(tmp_path / "first"), logger)
+    second = profiling.ConversionProfiler(str(tmp_path / "second"), logger)
+    first.start()
+    try:
+        with caplog.at_level(logging.WARNING, logger=logger.name):
+            second.start()
+        assert "cProfile skipped" in caplog.text
+        second_paths = second.stop()
+    finally:
+        first_paths = first.stop()
+
+    assert "pstats" not in second_paths
+    assert set(first_paths) == {"pstats", "collapsed", "tracemalloc"}
+    assert not tracemalloc.is_tracing()
+    # 两个分析都结束后 cProfile 可以再次使用
+    third = profiling.ConversionProfiler(str(tmp_path / "third"), logger)
+    third.start()
+    assert "pstats" in third.stop()
+
+
+def test_failed_cprofile_enable_is_not_fatal(tmp_path, logger, monkeypatch):
+    class BusyProfile:
+        def enable(self):
+            raise ValueError("Another profiling tool is already active")
+
+    monkeypatch.setattr(profiling.cProfile, "Profile", BusyProfile)
+    profiler = profiling.ConversionProfiler(str(tmp_path / "busy"), logger)
+    profiler.start()
+    assert "pstats" not in profiler.stop()
+    assert not profiling._cprofile_slot.locked()
+
+
+def test_failed_start_is_rolled_back(tmp_path, logger, monkeypatch):
+    def fail(self):
+        raise RuntimeError("can't start new thread")
+
+    monkeypatch.setattr(profiling._StackSampler, "start", fail)
+    threads = threading.active_count()
+    profiler = profiling.ConversionProfiler(str(tmp_path / "failed"), logger)
+    with pytest.raises(RuntimeError):
+        profiler.start()
+
+    assert not profiling._cprofile_slot.locked()
+    assert profiling._tracemalloc_users == 0
+    assert not tracemalloc.is_tracing()
+    assert threading.active_count() == threads
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import csv
+import os
+
+from openpyxl import load_workbook
+
+from benchmarks.docgen import write_docx
+from src import rejects
+from src.converter import DocConverter
+
+
+def _read_xlsx(path):
+    workbook = load_workbook(path, read_only=True)
+    try:
+        return [list(row) for row in workbook.active.iter_rows(values_only=True)]
+    finally:
+        workbook.close()
+
+
+def test_report_path_names_target_and_source(tmp_path):
+    excel_path = str(tmp_path / "master.xlsx")
+    assert rejects.report_path(excel_path, "/in/资料清单.docx", "csv") == str(
+        tmp_path / "master_资料清单_rejects.csv"
+    )
+    assert rejects.report_path(excel_path, "<bytes>", "xlsx") == str(
+        tmp_path / "master_rejects.xlsx"
+    )
+
+
+def test_report_spools_batches_and_writes_both_formats(tmp_path, monkeypatch):
+    monkeypatch.setattr(rejects, "REJECTS_BATCH_ROWS", 2)
+    report = rejects.RejectsReport(["A", "B"], {"bad_date": "日期无法解析"})
+    report.add(1, 2, ["bad_date"], ["x", "y"])
+    report.add(1, 3, ["bad_date", "extra"], ["x", "y", "z"])
+    report.add(2, 5, ["extra"], ["a\x07b"])
+    assert report.rows == 3
+    assert report.counts == {"bad_date": 2, "extra": 2}
+
+    csv_path = str(tmp_path / "r.csv")
+    xlsx_path = str(tmp_path / "r.xlsx")
+    report.write(csv_path, "csv")
+    report.write(xlsx_path, "xlsx")
+    report.close()
+
+    with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["表格", "行号", "原因", "说明", "A", "B", "额外列 1"]
+    assert rows[2][:4] == ["1", "3", "bad_date;extra", "日期无法解析; extra"]
+    sheet = _read_xlsx(xlsx_path)
+    assert sheet[0] == rows[0]
+    assert sheet[3][:5] == [2, 5, "extra", "extra", "ab"]  # 控制字符已去除
+
+
+def test_conversion_reports_only_problem_rows(tmp_path):
+    # 第 50、100、150 行的日期无法解析；第 200 行为空行，跳过且不算问题行
+    word_path = write_docx(str(tmp_path / "source.docx"), 200)
+    excel_path = str(tmp_path / "target.xlsx")
+    result = DocConverter(word_path, excel_path).convert()
+
+    assert result["rejects_path"] == str(tmp_path / "target_source_rejects.xlsx")
+    assert result["reject_counts"] == {"bad_date": 3}
+    rows = _read_xlsx(result["rejects_path"])
+    assert [row[1] for row in rows[1:]] == [51, 101, 151]
+    assert all(row[2] == "bad_date" and row[9] == "待定" for row in rows[1:])
+
+
+def test_clean_conversion_removes_outdated_report(tmp_path):
+    word_path = write_docx(str(tmp_path / "source.docx"), 30)
+    excel_path = str(tmp_path / "target.xlsx")
+    outdated = rejects.report_path(excel_path, word_path, "csv")
+    with open(outdated, "w", encoding="utf-8") as f:
+        f.write("old\n")
+    other_target = str(tmp_path / "other_source_rejects.csv")
+    with open(other_target, "w", encoding="utf-8") as f:
+        f.write("old\n")
+
+    result = DocConverter(word_path, excel_path, rejects_format="csv").convert()
+    assert result["rejects_path"] is None
+    assert not os.path.exists(outdated)
+    assert os.path.exists(other_target)  # 其它目标的报告不受影响
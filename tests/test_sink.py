@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import logging
+import os
+
+import pytest
+from openpyxl import load_workbook
+
+from src import sink
+
+HEADERS = ["ID", "名称", "备注"]
+logger = logging.getLogger("docConverter.tests.sink")
+
+
+def _rows(count, start=1):
+    return [[str(i), f"资料{i:04d}", "备注"] for i in range(start, start + count)]
+
+
+def _write(path, rows, mode="create", **options):
+    excel_sink = sink.ExcelSink(path, mode, HEADERS, logger, **options)
+    excel_sink.open()
+    for row in rows:
+        excel_sink.append(row)
+    return excel_sink.close()
+
+
+def _sheet_rows(path):
+    workbook = load_workbook(path, read_only=True)
+    try:
+        return {
+            ws.title: [list(r) for r in ws.iter_rows(values_only=True)]
+            for ws in workbook.worksheets
+        }
+    finally:
+        workbook.close()
+
+
+def test_rows_roll_over_to_new_sheets(tmp_path):
+    path = str(tmp_path / "out.xlsx")
+    shards = _write(path, _rows(7), shard_rows=3)
+    sheets = _sheet_rows(path)
+    assert list(sheets) == ["Sheet", "Sheet_part002", "Sheet_part003"]
+    assert [len(rows) - 1 for rows in sheets.values()] == [3, 3, 1]
+    assert all(rows[0] == HEADERS for rows in sheets.values())
+    assert [(s["sheet"], s["rows"]) for s in shards] == [
+        ("Sheet", 3),
+        ("Sheet_part002", 3),
+        ("Sheet_part003", 1),
+    ]
+
+
+def test_rows_roll_over_to_new_files(tmp_path):
+    path = str(tmp_path / "out.xlsx")
+    shards = _write(path, _rows(7), shard_rows=3, shard_by="file")
+    paths = [sink.part_path(path, n) for n in (1, 2, 3)]
+    assert [s["path"] for s in shards] == paths
+    assert [len(_sheet_rows(p)["Sheet"]) - 1 for p in paths] == [3, 3, 1]
+    assert not os.path.exists(sink.part_path(path, 4))
+
+
+def test_bytes_roll_over_to_new_files(tmp_path):
+    path = str(tmp_path / "out.xlsx")
+    rows = _rows(5)
+    budget = sink.estimate_row_bytes(HEADERS) + sum(
+        map(sink.estimate_row_bytes, rows[:2])
+    )
+    shards = _write(path, rows, shard_bytes=budget)
+    assert [s["rows"] for s in shards] == [2, 2, 1]
+    assert [s["path"] for s in shards] == [sink.part_path(path, n) for n in (1, 2, 3)]
+
+
+def test_append_continues_the_last_sheet(tmp_path):
+    path = str(tmp_path / "out.xlsx")
+    _write(path, _rows(4), shard_rows=3)
+    shards = _write(path, _rows(3, start=5), mode="append", shard_rows=3)
+    assert [(s["sheet"], s["rows"]) for s in shards] == [
+        ("Sheet_part002", 2),
+        ("Sheet_part003", 1),
+    ]
+    sheets = _sheet_rows(path)
+    assert [len(rows) - 1 for rows in sheets.values()] == [3, 3, 1]
+
+
+def test_append_counts_existing_rows_against_byte_budget(tmp_path):
+    path = str(tmp_path / "out.xlsx")
+    rows = _rows(5)
+    budget = sink.estimate_row_bytes(HEADERS) + sum(
+        map(sink.estimate_row_bytes, rows[:3])
+    )
+    _write(path, rows[:2])
+    shards = _write(path, rows[2:], mode="append", shard_bytes=budget)
+    assert [s["rows"] for s in shards] == [1, 2]
+    assert len(_sheet_rows(path)["Sheet"]) - 1 == 3
+
+
+@pytest.mark.parametrize("value", [0, -1, 1.5, True, "3"])
+def test_invalid_shard_limits_are_rejected(tmp_path, value):
+    with pytest.raises(ValueError):
+        sink.ExcelSink(
+            str(tmp_path / "out.xlsx"), "create", HEADERS, logger, shard_rows=value
+        )
+    with pytest.raises(ValueError):
+        sink.ExcelSink(
+            str(tmp_path / "out.xlsx"), "create", HEADERS, logger, shard_bytes=value
+        )
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import sqlite3
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from src import watcher
+
+FAILED = {"status": "error", "message": "boom"}
+OK = {"status": "success", "message": "ok"}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = watcher.StateStore(str(tmp_path / "state.sqlite"))
+    yield store
+    store.close()
+
+
+def test_failures_are_retried_up_to_max_attempts(store):
+    assert store.record("a.docx", 1.0, 10, FAILED) == 1
+    assert not store.is_processed("a.docx", 1.0, 10, max_attempts=3)
+    assert store.record("a.docx", 1.0, 10, FAILED) == 2
+    assert store.record("a.docx", 1.0, 10, FAILED) == 3
+    assert store.is_processed("a.docx", 1.0, 10, max_attempts=3)
+    # 文件被修改后重新计数
+    assert not store.is_processed("a.docx", 2.0, 10, max_attempts=3)
+    assert store.record("a.docx", 2.0, 10, FAILED) == 1
+
+
+def test_success_is_processed(store):
+    store.record("a.docx", 1.0, 10, FAILED)
+    store.record("a.docx", 1.0, 10, OK)
+    assert store.is_processed("a.docx", 1.0, 10, max_attempts=3)
+    assert not store.is_processed("a.docx", 1.0, 11, max_attempts=3)
+
+
+def test_old_state_database_is_migrated(tmp_path):
+    path = str(tmp_path / "state.sqlite")
+    db = sqlite3.connect(path)
+    db.execute(
+        "CREATE TABLE processed (path TEXT PRIMARY KEY, mtime REAL, size INTEGER,"
+        " status TEXT, excel_path TEXT, message TEXT, processed_at REAL)"
+    )
+    db.execute(
+        "INSERT INTO processed VALUES ('a.docx', 1.0, 10, 'error', NULL, 'boom', 0)"
+    )
+    db.execute(
+        "INSERT INTO processed VALUES ('b.docx', 1.0, 10, 'success', NULL, 'ok', 0)"
+    )
+    db.commit()
+    db.close()
+
+    store = watcher.StateStore(path)
+    try:
+        assert not store.is_processed("a.docx", 1.0, 10, max_attempts=3)
+        assert store.is_processed("b.docx", 1.0, 10, max_attempts=3)
+        assert store.record("a.docx", 1.0, 10, FAILED) == 2
+    finally:
+        store.close()
+
+
+def _finished(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def test_failed_conversion_is_scheduled_for_retry(tmp_path):
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    word_path = str(inbox / "a.docx")
+    with open(word_path, "wb") as f:
+        f.write(b"not yet a docx")
+    stat = os.stat(word_path)
+    folder_watcher = watcher.FolderWatcher(
+        str(inbox),
+        output_dir=str(tmp_path),
+        use_inotify=False,
+        settle_seconds=0,
+        max_attempts=2,
+        retry_delay=0,
+    )
+    try:
+        job = (word_path, stat.st_mtime, stat.st_size, time.monotonic())
+        folder_watcher._inflight[_finished(FAILED)] = job
+        folder_watcher._collect()
+        assert word_path in folder_watcher._retries
+
+        folder_watcher._retry_due(time.monotonic())
+        assert word_path in folder_watcher._pending
+
+        # 第二次失败达到上限: 不再重试，直到文件被修改
+        del folder_watcher._pending[word_path]
+        folder_watcher._inflight[_finished(FAILED)] = job
+        folder_watcher._collect()
+        assert word_path not in folder_watcher._retries
+        folder_watcher._observe(word_path, time.monotonic())
+        assert word_path not in folder_watcher._pending
+
+        os.utime(word_path, ns=(stat.st_mtime_ns + 10**9,) * 2)
+        folder_watcher._observe(word_path, time.monotonic())
+        assert word_path in folder_watcher._pending
+    finally:
+        folder_watcher.source.close()
+        folder_watcher.state.close()
+
+
+def test_network_inbox_uses_polling(tmp_path, monkeypatch):
+    monkeypatch.setattr(watcher.prefetch, "is_network_path", lambda path: True)
+    source = watcher.make_source(str(tmp_path), use_inotify=True)
+    assert isinstance(source, watcher.PollingSource)
+
+
+@pytest.mark.skipif(
+    not watcher.sys.platform.startswith("linux"), reason="inotify is Linux only"
+)
+def test_inotify_overflow_rescans_folder(tmp_path, monkeypatch):
+    for name in ("a.docx", "b.docx", "~$a.docx", "notes.txt"):
+        (tmp_path / name).write_bytes(b"")
+    source = watcher.InotifySource(str(tmp_path))
+    try:
+        overflow = watcher.InotifySource._EVENT_HEADER.pack(
+            -1, watcher.InotifySource.IN_Q_OVERFLOW, 0, 0
+        )
+        monkeypatch.setattr(watcher.os, "read", lambda fd, size: overflow)
+        monkeypatch.setattr(
+            watcher.select, "select", lambda r, w, x, timeout: (r, [], [])
+        )
+        changed = source.poll(timeout=0)
+    finally:
+        monkeypatch.undo()
+        source.close()
+    assert changed == {str(tmp_path / "a.docx"), str(tmp_path / "b.docx")}